@@ -0,0 +1,62 @@
+import numpy as np
+
+
+# Fields stored for every bar, in the order of a bar stream row
+HISTORY_FIELDS = ("open", "high", "low", "close", "volume", "adj_close")
+
+
+class BarRingBuffer(object):
+    """
+    BarRingBuffer keeps the most recent capacity bars of a single
+    ticker in a fixed-size NumPy array, so that memory remains
+    constant however long the backtest runs.
+
+    Every bar is written twice, at slot i and at slot
+    i + capacity of an array of length 2 * capacity. The latest
+    n bars therefore always occupy a contiguous range of the
+    array, and can be returned as a zero-copy view in O(1) time
+    rather than being copied out of a wrapped buffer.
+    """
+    def __init__(self, capacity, fields=HISTORY_FIELDS):
+        """
+        Parameters:
+        capacity - The maximum number of bars retained.
+        fields - The names of the values of each bar.
+        """
+        self.capacity = capacity
+        self.fields = fields
+        self.field_index = dict((f, i) for i, f in enumerate(fields))
+        self.data = np.full((len(fields), 2 * capacity), np.nan)
+        self.head = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def append(self, values):
+        """
+        Appends the values of a bar, ordered as fields,
+        overwriting the oldest bar once full.
+        """
+        i = self.head
+        self.data[:, i] = values
+        self.data[:, i + self.capacity] = values
+        self.head = i + 1 if i + 1 < self.capacity else 0
+        if self.count < self.capacity:
+            self.count += 1
+
+    def latest(self, n, field):
+        """
+        Returns a read-only view of the latest n (or fewer, if
+        fewer are available) values of a field, oldest first.
+        A negative n raises a ValueError.
+        """
+        if n < 0:
+            raise ValueError(
+                "Cannot return the latest {} bars.".format(n)
+            )
+        n = min(n, self.count)
+        end = self.head + self.capacity
+        view = self.data[self.field_index[field], end - n:end]
+        view.flags.writeable = False
+        return view
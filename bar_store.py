@@ -0,0 +1,253 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from price_handler import AbstractBarPriceHandler
+from bar_stream import (
+    BAR_COLUMNS, DEFAULT_CHUNKSIZE, MergedBarStream, _to_nanoseconds,
+    resume_positions
+)
+
+
+# On-disk field name and fixed dtype of each column file,
+# in the same order as BAR_COLUMNS
+STORE_FIELDS = [
+    ("open", np.float64),
+    ("high", np.float64),
+    ("low", np.float64),
+    ("close", np.float64),
+    ("volume", np.float64),
+    ("adj_close", np.float64),
+]
+TIME_FIELD = "time"
+INDEX_FILENAME = "index.json"
+
+
+def write_bar_store(path, tickers_data):
+    """
+    Converts a dictionary of per-ticker DataFrames, in the format
+    produced by HistoricQuandlBarPriceHandler._download_quandl_data,
+    into a bar store at path.
+
+    The store consists of one fixed-dtype .npy column file per
+    field (plus a "time" column of int64 nanoseconds) holding the
+    bars of every ticker contiguously and in date order, together
+    with an index of the [start, stop) row offsets of each ticker.
+
+    Parameters:
+    path - The directory in which to write the store.
+    tickers_data - Dictionary of ticker symbol to DataFrame,
+        indexed by timestamp and containing BAR_COLUMNS.
+    """
+    path = os.path.expanduser(path)
+    if not os.path.exists(path):
+        os.makedirs(path)
+    tickers = sorted(tickers_data.keys())
+    total = sum(len(tickers_data[ticker]) for ticker in tickers)
+
+    columns = {}
+    columns[TIME_FIELD] = np.lib.format.open_memmap(
+        os.path.join(path, TIME_FIELD + ".npy"),
+        mode="w+", dtype=np.int64, shape=(total,)
+    )
+    for field, dtype in STORE_FIELDS:
+        columns[field] = np.lib.format.open_memmap(
+            os.path.join(path, field + ".npy"),
+            mode="w+", dtype=dtype, shape=(total,)
+        )
+
+    # Fill the columns one ticker at a time
+    index = {}
+    start = 0
+    for ticker in tickers:
+        df = tickers_data[ticker].sort_index()
+        stop = start + len(df)
+        columns[TIME_FIELD][start:stop] = df.index.values.astype(
+            "datetime64[ns]"
+        ).view("i8")
+        for (field, dtype), col in zip(STORE_FIELDS, BAR_COLUMNS):
+            columns[field][start:stop] = df[col].values
+        index[ticker] = [start, stop]
+        start = stop
+
+    for col in columns.values():
+        col.flush()
+    with open(os.path.join(path, INDEX_FILENAME), "w") as f:
+        json.dump(index, f)
+
+
+class BarStore(object):
+    """
+    BarStore provides read-only, memory-mapped access to a bar
+    store written by write_bar_store().
+
+    Opening the store only reads the small ticker index; the
+    column files are mapped into memory rather than read, so
+    only the pages covering the bars actually requested are
+    ever loaded. Since the files are mapped read-only, several
+    processes on one machine share the same OS page cache.
+    """
+    def __init__(self, path):
+        self.path = os.path.expanduser(path)
+        with open(os.path.join(self.path, INDEX_FILENAME)) as f:
+            self.index = dict(
+                (ticker, tuple(offsets))
+                for ticker, offsets in json.load(f).items()
+            )
+        self.columns = {}
+        for field in [TIME_FIELD] + [f for f, _ in STORE_FIELDS]:
+            self.columns[field] = np.load(
+                os.path.join(self.path, field + ".npy"), mmap_mode="r"
+            )
+
+    @property
+    def tickers(self):
+        return sorted(self.index.keys())
+
+    def __contains__(self, ticker):
+        return ticker in self.index
+
+    def window(self, ticker, start_date=None, end_date=None):
+        """
+        Returns the [lo, hi) row positions of the ticker bars
+        within the [start_date, end_date) window, by a binary
+        search of the ticker's time column.
+        """
+        start, stop = self.index[ticker]
+        times = self.columns[TIME_FIELD][start:stop]
+        lo = start
+        hi = stop
+        if start_date is not None:
+            lo = start + np.searchsorted(
+                times, _to_nanoseconds(start_date), "left"
+            )
+        if end_date is not None:
+            hi = start + np.searchsorted(
+                times, _to_nanoseconds(end_date), "left"
+            )
+        return lo, max(lo, hi)
+
+    def iter_chunks(
+        self, ticker, start_date=None,
+        end_date=None, chunksize=DEFAULT_CHUNKSIZE, resume_from=None
+    ):
+        """
+        Yields the ticker bars within the window as (times, values,
+        position) chunks of at most chunksize rows, in the format
+        consumed by MergedBarStream, starting from the row at
+        position resume_from, if given.
+        """
+        lo, hi = self.window(ticker, start_date, end_date)
+        if resume_from is not None:
+            lo = resume_from
+        for clo in range(lo, hi, chunksize):
+            chi = min(clo + chunksize, hi)
+            values = np.empty((chi - clo, len(STORE_FIELDS)), order="F")
+            for i, (field, _) in enumerate(STORE_FIELDS):
+                values[:, i] = self.columns[field][clo:chi]
+            yield np.array(self.columns[TIME_FIELD][clo:chi]), values, clo
+
+    def to_frame(self, ticker, start_date=None, end_date=None):
+        """
+        Returns the ticker bars within the window as a DataFrame
+        in the same format as the one written to the store.
+        """
+        lo, hi = self.window(ticker, start_date, end_date)
+        index = pd.DatetimeIndex(
+            np.array(self.columns[TIME_FIELD][lo:hi]).view("datetime64[ns]")
+        )
+        return pd.DataFrame(dict(
+            (col, np.array(self.columns[field][lo:hi]))
+            for (field, _), col in zip(STORE_FIELDS, BAR_COLUMNS)
+        ), index=index, columns=BAR_COLUMNS)
+
+
+class BarStorePriceHandler(AbstractBarPriceHandler):
+    """
+    BarStorePriceHandler streams historic bars from a memory-mapped
+    BarStore in a manner identical to a live trading interface.
+
+    It opens instantly, regardless of the size of the store, and
+    only touches the pages of each column file that fall within
+    the requested [start_date, end_date) window.
+    """
+    def __init__(
+        self, events_queue, store,
+        init_tickers=None,
+        start_date=None, end_date=None,
+        chunksize=DEFAULT_CHUNKSIZE, period=86400,
+        snapshot=False, lookback=0
+    ):
+        """
+        Parameters:
+        events_queue - The events queue to place BarEvents onto.
+        store - A BarStore, or the path to one.
+        init_tickers - Optional list of ticker symbols. If None,
+            every ticker within the store is subscribed.
+        start_date - Optional first date to stream.
+        end_date - Optional date at which to stop (exclusive).
+        chunksize - Maximum number of rows copied per ticker at a time.
+        period - The time period covered by each bar in seconds.
+        snapshot - If True, emit one BarSnapshotEvent per timestamp.
+        lookback - Number of bars of history kept per ticker
+            for get_latest_bars, where zero disables the history.
+        """
+        if not isinstance(store, BarStore):
+            store = BarStore(store)
+        self.events_queue = events_queue
+        self.store = store
+        self.chunksize = chunksize
+        self.period = period
+        self.snapshot = snapshot
+        self.lookback = lookback
+        self.continue_backtest = True
+        self.tickers = {}
+        self.bar_history = {}
+        self.tickers_data = {}
+        self.start_date = start_date
+        self.end_date = end_date
+        if init_tickers is None:
+            init_tickers = self.store.tickers
+        for ticker in init_tickers:
+            self.subscribe_ticker(ticker)
+        self.bar_stream = self._merge_sort_ticker_data()
+
+    def _merge_sort_ticker_data(self, resume=None):
+        """
+        Merges the per-ticker windows of the store, by
+        (timestamp, ticker), into a single chronological
+        bar stream, from the positions of an optional
+        resume state.
+        """
+        return MergedBarStream(dict(
+            (ticker, self.store.iter_chunks(
+                ticker, self.start_date, self.end_date,
+                self.chunksize, position
+            ))
+            for ticker, position in resume_positions(self.tickers, resume)
+        ), resume)
+
+    def subscribe_ticker(self, ticker):
+        """
+        Subscribes the price handler to a new ticker symbol.
+        """
+        if ticker not in self.tickers:
+            if ticker in self.store:
+                self.tickers[ticker] = {
+                    "close": None,
+                    "parsed_close": None,
+                    "adj_close": None,
+                    "timestamp": None
+                }
+            else:
+                print(
+                    "Could not subscribe ticker {} "\
+                    "as it is not in the bar store.".format(ticker)
+                )
+        else:
+            print(
+                "Could not subscribe ticker {} "\
+                "as it is already subscribed".format(ticker)
+            )
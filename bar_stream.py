@@ -0,0 +1,407 @@
+import heapq
+import io
+import itertools
+
+import numpy as np
+import pandas as pd
+
+
+# Columns read from each ticker DataFrame, in the order that
+# they are returned within a bar tuple (after time and ticker).
+BAR_COLUMNS = ["Open", "High", "Low", "Close", "Volume", "Adj Close"]
+
+# Number of rows of a ticker DataFrame that are converted
+# into column arrays at any one time.
+DEFAULT_CHUNKSIZE = 4096
+
+
+def _to_nanoseconds(date):
+    """
+    Converts a date-like object (string, datetime or Timestamp)
+    into an integer number of nanoseconds since the epoch.
+    """
+    return pd.Timestamp(date).value
+
+
+def window_bounds(times, start_date=None, end_date=None):
+    """
+    Returns the (start, end) integer positions of the
+    [start_date, end_date) window within a sorted array of
+    nanosecond timestamps.
+    """
+    start = 0
+    end = len(times)
+    if start_date is not None:
+        start = np.searchsorted(times, _to_nanoseconds(start_date), "left")
+    if end_date is not None:
+        end = np.searchsorted(times, _to_nanoseconds(end_date), "left")
+    return start, max(start, end)
+
+
+def iter_frame_chunks(
+    df, columns=BAR_COLUMNS, start_date=None,
+    end_date=None, chunksize=DEFAULT_CHUNKSIZE, resume_from=None
+):
+    """
+    Lazily converts a time-sorted DataFrame into a sequence of
+    (times, values, position) chunks of at most chunksize rows,
+    where times is an int64 array of nanosecond timestamps,
+    values is a float64 array of shape (rows, len(columns))
+    whose columns are each contiguous in memory, and position
+    is the row index of the first row of the chunk.
+
+    If resume_from is given, the chunks start at that
+    position, e.g. that of a chunk saved in a checkpoint.
+    """
+    times = df.index.values.astype("datetime64[ns]").view("i8")
+    start, end = window_bounds(times, start_date, end_date)
+    if resume_from is not None:
+        start = resume_from
+    for lo in range(start, end, chunksize):
+        hi = min(lo + chunksize, end)
+        values = np.asfortranarray(
+            df[columns].iloc[lo:hi].values, dtype=np.float64
+        )
+        yield times[lo:hi], values, lo
+
+
+def _parse_time(field, date_format=None):
+    """
+    Converts a date field of a CSV file into an integer number
+    of nanoseconds since the epoch.
+    """
+    if date_format is None:
+        return _to_nanoseconds(field)
+    return pd.to_datetime(field, format=date_format).value
+
+
+def _find_start_offset(f, lo, hi, date_index, start, date_format=None):
+    """
+    Returns the byte offset of the first row of an open, date-sorted
+    CSV file, between the offsets lo (the start of the first row)
+    and hi (the end of the file), whose date is at or after start.
+
+    The offsets are binary searched, parsing only the date of the
+    row starting at or after each probed offset, so the rows before
+    start are skipped without being read.
+    """
+    first = lo
+
+    def row_at(offset):
+        # The first row starting at or after offset
+        if offset > first:
+            f.seek(offset - 1)
+            f.readline()
+        else:
+            f.seek(offset)
+        return f.tell(), f.readline()
+
+    while lo < hi:
+        mid = (lo + hi) // 2
+        _, row = row_at(mid)
+        if (
+            not row.strip() or _parse_time(
+                row.split(b",")[date_index].decode(), date_format
+            ) >= start
+        ):
+            hi = mid
+        else:
+            lo = mid + 1
+    return row_at(lo)[0]
+
+
+def iter_csv_chunks(
+    filename, date_column, columns=BAR_COLUMNS, start_date=None,
+    end_date=None, chunksize=DEFAULT_CHUNKSIZE, date_format=None,
+    resume_from=None
+):
+    """
+    Lazily reads a date-sorted CSV file (with a header row) as a
+    sequence of (times, values, position) chunks of at most
+    chunksize rows, loading only date_column and columns, where
+    position is the byte offset of the first row of the chunk.
+
+    The [start_date, end_date) window is pushed down into the read.
+    The first row at or after start_date is found by a binary
+    search of the byte offsets of the file, so the rows before it
+    are never parsed, and reading stops at the first chunk past
+    end_date, so the remainder of the file is never read.
+
+    The file is reopened at the stored byte offset for every chunk,
+    so that no file handle is kept open per ticker between reads
+    and the number of tickers merged at once is not limited by the
+    number of open files.
+
+    If resume_from is given, the chunks start at that byte
+    offset, e.g. that of a chunk saved in a checkpoint, without
+    searching for or reading any of the rows before it.
+    """
+    with open(filename, "rb") as f:
+        names = f.readline().decode().strip().split(",")
+        offset = f.tell()
+        size = f.seek(0, 2)
+        if resume_from is not None:
+            offset = resume_from
+        elif start_date is not None:
+            offset = _find_start_offset(
+                f, offset, size, names.index(date_column),
+                _to_nanoseconds(start_date), date_format
+            )
+    end = None
+    if end_date is not None:
+        end = _to_nanoseconds(end_date)
+    usecols = [date_column] + list(columns)
+
+    while offset < size:
+        position = offset
+        with open(filename, "rb") as f:
+            f.seek(offset)
+            data = b"".join(itertools.islice(f, chunksize))
+            offset = f.tell()
+        if not data.strip():
+            return
+
+        df = pd.read_csv(
+            io.BytesIO(data), header=None, names=names, usecols=usecols
+        )
+        times = pd.to_datetime(
+            df[date_column], format=date_format
+        ).values.astype("datetime64[ns]").view("i8")
+        hi = len(times)
+        if end is not None:
+            hi = np.searchsorted(times, end, "left")
+        if hi > 0:
+            values = np.asfortranarray(
+                df[columns].values[:hi], dtype=np.float64
+            )
+            yield times[:hi], values, position
+        if hi < len(times):
+            # The remainder of the file is past the end date
+            return
+
+
+def resume_positions(tickers, resume=None):
+    """
+    Returns a list of (ticker, position) pairs, giving the
+    position at which the chunks of each ticker restart for a
+    resume state (see MergedBarStream.get_resume_state), or
+    of every ticker with a position of None, i.e. from the
+    start of the window, if resume is None.
+    """
+    if resume is None:
+        return [(ticker, None) for ticker in tickers]
+    return [(ticker, position) for ticker, (position, _) in resume.items()]
+
+
+class _TickerCursor(object):
+    """
+    Position of the merge within the stream of chunks
+    of a single ticker.
+    """
+    __slots__ = ("ticker", "chunks", "times", "values", "position", "pos")
+
+    def __init__(self, ticker, chunks):
+        self.ticker = ticker
+        self.chunks = iter(chunks)
+        self.times = None
+        self.values = None
+        self.position = None
+        self.pos = 0
+
+    def load_next_chunk(self):
+        """
+        Moves onto the next non-empty chunk, returning
+        False once the ticker has no more data.
+        """
+        for times, values, position in self.chunks:
+            if len(times) > 0:
+                # Python integers compare faster than NumPy
+                # scalars within the heap
+                self.times = times.tolist()
+                self.values = values
+                self.position = position
+                self.pos = 0
+                return True
+        self.times = None
+        self.values = None
+        self.position = None
+        return False
+
+
+class MergedBarStream(object):
+    """
+    MergedBarStream carries out a k-way merge of a set of
+    per-ticker streams, each of which is already time-sorted.
+
+    A heap of per-ticker cursors, ordered by (timestamp, ticker),
+    is used in place of concatenating and globally sorting all
+    of the data. Memory therefore grows with the number of
+    tickers (one chunk each) rather than with the total number
+    of rows, and the first bar is available immediately.
+
+    Bars are returned as tuples of (time, ticker, *values),
+    ordered by (timestamp, ticker) so that the ticker events
+    are always deterministic.
+    """
+    def __init__(self, ticker_chunks, resume=None):
+        """
+        Parameters:
+        ticker_chunks - Dictionary of ticker symbol to an
+            iterable of (times, values, position) chunks, as
+            produced by iter_frame_chunks(), where position is
+            None for a source which cannot seek to a chunk.
+        resume - Optional resume state, as returned by
+            get_resume_state(), for chunks that restart at the
+            saved chunk of each ticker, within which the rows
+            before the saved row are skipped.
+        """
+        self.tickers = sorted(ticker_chunks.keys())
+        self.cursor = 0
+        self._cursors = []
+        self._heap = []
+        for ticker in self.tickers:
+            tc = _TickerCursor(ticker, ticker_chunks[ticker])
+            self._cursors.append(tc)
+            if tc.load_next_chunk():
+                if resume is not None:
+                    tc.pos = resume[ticker][1]
+                self._heap.append((tc.times[tc.pos], ticker, tc))
+        heapq.heapify(self._heap)
+
+        # The same timestamp is shared by every ticker printing
+        # at that time, so the Timestamp object is reused
+        self._last_ns = None
+        self._last_timestamp = None
+
+    def peek_time(self):
+        """
+        Returns the timestamp, in nanoseconds, of the next bar
+        without consuming it, or None once the stream is exhausted.
+        """
+        if self._heap:
+            return self._heap[0][0]
+        return None
+
+    def buffered_rows(self):
+        """
+        Returns the number of rows currently held in memory,
+        which is never more than one chunk per ticker.
+        """
+        return sum(
+            len(tc.times) for tc in self._cursors if tc.times is not None
+        )
+
+    def get_resume_state(self):
+        """
+        Returns a dictionary of each ticker with rows left to
+        stream to the (position, row) of its next row, i.e. the
+        position of its current chunk and the row within it, from
+        which a stream created with resume carries on. None is
+        returned if a current chunk has no position.
+        """
+        resume = {}
+        for tc in self._cursors:
+            if tc.times is not None:
+                if tc.position is None:
+                    return None
+                resume[tc.ticker] = (tc.position, tc.pos)
+        return resume
+
+    def skip(self, n):
+        """
+        Advances the stream past its next n rows without
+        creating them, e.g. to resume from a checkpoint where
+        a source cannot seek to the chunks of get_resume_state.
+
+        The merged position of a row depends on the timestamps of
+        every ticker, so the stream cannot seek to row n directly:
+        the chunks holding the skipped rows are still read and
+        parsed, and only the creation of the bars is saved.
+        """
+        heap = self._heap
+        for _ in range(n):
+            if not heap:
+                break
+            _, ticker, tc = heap[0]
+            pos = tc.pos + 1
+            if pos < len(tc.times):
+                tc.pos = pos
+                heapq.heapreplace(heap, (tc.times[pos], ticker, tc))
+            elif tc.load_next_chunk():
+                heapq.heapreplace(heap, (tc.times[0], ticker, tc))
+            else:
+                heapq.heappop(heap)
+            self.cursor += 1
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        """
+        Returns the next bar in (timestamp, ticker) order
+        and advances that ticker's cursor.
+        """
+        heap = self._heap
+        if not heap:
+            raise StopIteration
+        ns, ticker, tc = heap[0]
+        pos = tc.pos
+        row = tc.values[pos].tolist()
+
+        # Advance the cursor, replacing or removing the heap
+        # entry for this ticker as appropriate
+        pos += 1
+        if pos < len(tc.times):
+            tc.pos = pos
+            heapq.heapreplace(heap, (tc.times[pos], ticker, tc))
+        elif tc.load_next_chunk():
+            heapq.heapreplace(heap, (tc.times[0], ticker, tc))
+        else:
+            heapq.heappop(heap)
+        self.cursor += 1
+
+        if ns != self._last_ns:
+            self._last_ns = ns
+            self._last_timestamp = pd.Timestamp(ns)
+        return (self._last_timestamp, ticker) + tuple(row)
+
+
+class ColumnarBarStream(MergedBarStream):
+    """
+    ColumnarBarStream merges a dictionary of per-ticker OHLCV
+    DataFrames (as downloaded by HistoricQuandlBarPriceHandler)
+    restricted to the [start_date, end_date) window.
+
+    Each DataFrame is converted into contiguous column arrays
+    lazily, a chunk at a time, as the merge reaches it.
+    """
+    def __init__(
+        self, tickers_data, start_date=None,
+        end_date=None, chunksize=DEFAULT_CHUNKSIZE, resume=None
+    ):
+        """
+        Parameters:
+        tickers_data - Dictionary of ticker symbol to DataFrame,
+            indexed by timestamp and containing BAR_COLUMNS.
+        start_date - Optional first date to include.
+        end_date - Optional date at which to stop (exclusive).
+        chunksize - Number of rows converted per ticker at a time.
+        resume - Optional resume state of a previous stream
+            (see MergedBarStream.get_resume_state).
+        """
+        self._length = 0
+        for df in tickers_data.values():
+            times = df.index.values.astype("datetime64[ns]").view("i8")
+            start, end = window_bounds(times, start_date, end_date)
+            self._length += end - start
+
+        super(ColumnarBarStream, self).__init__(dict(
+            (ticker, iter_frame_chunks(
+                tickers_data[ticker], BAR_COLUMNS, start_date,
+                end_date, chunksize, position
+            ))
+            for ticker, position in resume_positions(tickers_data, resume)
+        ), resume)
+
+    def __len__(self):
+        return self._length
@@ -0,0 +1,80 @@
+"""
+Compares the number of bars streamed per second, and the
+time taken to obtain the first bar, for the old concat,
+sort and DataFrame.iterrows() merge and the heap-merged
+columnar bar stream.
+
+Run from the repository root with:
+    python -m benchmark.bar_stream_benchmark
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+from bar_stream import ColumnarBarStream
+
+
+def make_universe(n_tickers, n_days):
+    """
+    Creates n_tickers random-walk daily DataFrames in the format
+    produced by HistoricQuandlBarPriceHandler._download_quandl_data.
+    """
+    dates = pd.bdate_range("2000-01-03", periods=n_days)
+    rng = np.random.RandomState(42)
+    tickers_data = {}
+    for i in range(n_tickers):
+        ticker = "T{:04d}".format(i)
+        close = 100.0 + np.cumsum(rng.normal(0.0, 1.0, n_days))
+        df = pd.DataFrame({
+            "Open": close, "Low": close, "High": close,
+            "Close": close, "Volume": np.full(n_days, 1000.0),
+            "Adj Close": close
+        }, index=dates)
+        df["Ticker"] = ticker
+        tickers_data[ticker] = df
+    return tickers_data
+
+
+def iterrows_stream(tickers_data):
+    """
+    The original merge and stream, reading each field of the
+    bar by label as _create_event() used to.
+    """
+    df = pd.concat(tickers_data.values()).sort_index()
+    df["colFromIndex"] = df.index
+    df = df.sort_values(by=["colFromIndex", "Ticker"])
+    for index, row in df.iterrows():
+        yield (
+            index, row["Ticker"], row["Open"], row["High"], row["Low"],
+            row["Close"], int(row["Volume"]), row["Adj Close"]
+        )
+
+
+def columnar_stream(tickers_data):
+    for bar in ColumnarBarStream(tickers_data):
+        yield bar[:6] + (int(bar[6]), bar[7])
+
+
+def run(n_tickers=300, n_days=250):
+    tickers_data = make_universe(n_tickers, n_days)
+    for name, func in [
+        ("iterrows", iterrows_stream),
+        ("columnar", columnar_stream)
+    ]:
+        start = time.perf_counter()
+        stream = func(tickers_data)
+        next(stream)
+        first = time.perf_counter() - start
+        count = 1 + sum(1 for _ in stream)
+        elapsed = time.perf_counter() - start
+        print(
+            "{:>10}: {:>9} bars in {:.3f}s, {:>12,.0f} bars/sec, "
+            "first bar after {:.4f}s".format(
+                name, count, elapsed, count / elapsed, first
+            )
+        )
+
+
+if __name__ == "__main__":
+    run()
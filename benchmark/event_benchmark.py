@@ -0,0 +1,136 @@
+"""
+Compares the cost of constructing and dispatching the slotted
+event classes against dict-backed equivalents of the previous
+event classes, together with the memory held per event.
+
+Run from the repository root with:
+    python -m benchmark.event_benchmark
+"""
+import time
+import tracemalloc
+
+import pandas as pd
+
+from event import BarEvent, EventType, FillEvent, SignalEvent
+
+
+class DictBarEvent(object):
+    """
+    The previous dict-backed BarEvent, which rebuilt its
+    period lookup table on every instantiation.
+    """
+    def __init__(
+        self, ticker, time, period,
+        open_price, high_price, low_price,
+        close_price, volume, adj_close_price=None
+    ):
+        self.type = EventType.BAR
+        self.ticker = ticker
+        self.time = time
+        self.period = period
+        self.open_price = open_price
+        self.high_price = high_price
+        self.low_price = low_price
+        self.close_price = close_price
+        self.volume = volume
+        self.adj_close_price = adj_close_price
+        self.period_readable = self._readable_period()
+
+    def _readable_period(self):
+        lut = {
+            1: "1sec", 5: "5sec", 10: "10sec", 30: "30sec",
+            60: "1min", 300: "5min", 600: "10min", 900: "15min",
+            1800: "30min", 3600: "1hr", 86400: "1day", 604800: "1wk"
+        }
+        if self.period in lut:
+            return lut[self.period]
+        else:
+            return "{}sec".format(self.period)
+
+
+class DictSignalEvent(object):
+    def __init__(self, ticker, action, suggested_quantity=None):
+        self.type = EventType.SIGNAL
+        self.ticker = ticker
+        self.action = action
+        self.suggested_quantity = suggested_quantity
+
+
+class DictFillEvent(object):
+    def __init__(
+        self, timestamp, ticker, action, quantity,
+        exchange, price, commission
+    ):
+        self.type = EventType.FILL
+        self.timestamp = timestamp
+        self.ticker = ticker
+        self.action = action
+        self.quantity = quantity
+        self.exchange = exchange
+        self.price = price
+        self.commission = commission
+
+
+def construct(bar_cls, signal_cls, fill_cls, n_events, now):
+    """
+    Creates n_events events, cycling bars, signals and fills.
+    """
+    events = []
+    for i in range(n_events // 3):
+        events.append(bar_cls(
+            "GOOG", now, 86400, 1.0, 2.0, 0.5, 1.5, 1000, 1.5
+        ))
+        events.append(signal_cls("GOOG", "BOT", 100))
+        events.append(fill_cls(
+            now, "GOOG", "BOT", 100, "ARCA", 1.5, 1.0
+        ))
+    return events
+
+
+def dispatch(events):
+    """
+    Dispatches on the event type and reads a couple of
+    attributes, as the TradingSession event loop does.
+    """
+    total = 0.0
+    for event in events:
+        if event.type == EventType.BAR:
+            total += event.close_price
+        elif event.type == EventType.SIGNAL:
+            total += event.suggested_quantity
+        elif event.type == EventType.FILL:
+            total += event.price
+    return total
+
+
+def run(n_events=1500000):
+    now = pd.Timestamp("2016-01-04")
+    for name, classes in (
+        ("dict-backed", (DictBarEvent, DictSignalEvent, DictFillEvent)),
+        ("slotted", (BarEvent, SignalEvent, FillEvent)),
+    ):
+        start = time.perf_counter()
+        events = construct(classes[0], classes[1], classes[2], n_events, now)
+        construct_time = time.perf_counter() - start
+        start = time.perf_counter()
+        dispatch(events)
+        dispatch_time = time.perf_counter() - start
+        del events
+
+        tracemalloc.start()
+        events = construct(classes[0], classes[1], classes[2], 30000, now)
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del events
+
+        print(
+            "{:>12}: construct {:,.0f} events/sec, dispatch "\
+            "{:,.0f} events/sec, {:.0f} bytes/event".format(
+                name, n_events / construct_time,
+                n_events / dispatch_time, size / 30000.0
+            )
+        )
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,75 @@
+"""
+Measures the per-event overhead of the session loop for a
+queue.Queue drained with get(False) and queue.Empty, as the
+TradingSession used to do, and for both event buses drained
+with poll().
+
+Each market event is followed by a signal, an order and a
+fill, and every market event is preceded by a poll of the
+empty bus, mirroring a backtest in which every bar trades.
+
+Run from the repository root with:
+    python -m benchmark.event_bus_benchmark
+"""
+import queue
+import time
+
+from event import SignalEvent
+from event_bus import DequeEventBus, ThreadSafeEventBus
+
+
+def drain_queue(events_queue, n_bars, event):
+    """
+    The previous, exception-driven, session loop.
+    """
+    count = 0
+    bars = 0
+    while bars < n_bars:
+        try:
+            ev = events_queue.get(False)
+        except queue.Empty:
+            events_queue.put(event)
+            bars += 1
+        else:
+            count += 1
+            if count % 4:
+                events_queue.put(ev)
+    return count
+
+
+def drain_bus(bus, n_bars, event):
+    """
+    The current session loop, polling until None.
+    """
+    poll = bus.poll
+    count = 0
+    bars = 0
+    while bars < n_bars:
+        ev = poll()
+        if ev is None:
+            bus.put(event)
+            bars += 1
+            continue
+        count += 1
+        if count % 4:
+            bus.put(ev)
+    return count
+
+
+def run(n_bars=250000):
+    event = SignalEvent("GOOG", "BOT", 100)
+    for name, drain, events_queue in (
+        ("queue.Queue + Empty", drain_queue, queue.Queue()),
+        ("ThreadSafeEventBus", drain_bus, ThreadSafeEventBus()),
+        ("DequeEventBus", drain_bus, DequeEventBus()),
+    ):
+        start = time.perf_counter()
+        count = drain(events_queue, n_bars, event)
+        elapsed = time.perf_counter() - start
+        print("{:>20}: {:,.0f} events, {:.0f} ns/event".format(
+            name, count, elapsed / count * 1e9
+        ))
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,103 @@
+"""
+Compares the time taken to backtest N strategies as N
+separate TradingSessions, each streaming the bars itself,
+against a single MultiStrategySession streaming them once.
+
+Run from the repository root with:
+    python -m benchmark.multi_strategy_benchmark
+"""
+import contextlib
+import io
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from bar_store import BarStorePriceHandler, write_bar_store
+from event import SignalEvent
+from event_bus import DequeEventBus
+from strategy import Strategy
+from trading_session import MultiStrategySession, TradingSession
+
+
+class TradeEveryNthBarStrategy(Strategy):
+    def __init__(self, events_queue, n):
+        self.events_queue = events_queue
+        self.n = n
+        self.counts = {}
+
+    def calculate_signals(self, event):
+        count = self.counts.get(event.ticker, 0) + 1
+        self.counts[event.ticker] = count
+        if count % self.n == 0:
+            action = "BOT" if count % (2 * self.n) else "SLD"
+            self.events_queue.put(SignalEvent(event.ticker, action, 10))
+
+
+def make_store(path, n_tickers, n_days):
+    rng = np.random.RandomState(0)
+    dates = pd.bdate_range("2000-01-03", periods=n_days)
+    tickers_data = {}
+    for i in range(n_tickers):
+        close = 100.0 + np.cumsum(rng.normal(0.0, 1.0, n_days))
+        tickers_data["T{:02d}".format(i)] = pd.DataFrame({
+            "Open": close, "High": close, "Low": close, "Close": close,
+            "Volume": 1000.0, "Adj Close": close
+        }, index=dates)
+    write_bar_store(path, tickers_data)
+    return list(tickers_data.keys())
+
+
+def run_separate(output_dir, store_path, tickers, ns):
+    for n in ns:
+        events_queue = DequeEventBus()
+        TradingSession(
+            output_dir, TradeEveryNthBarStrategy(events_queue, n),
+            tickers, 100000.0, None, None, events_queue,
+            price_handler=BarStorePriceHandler(
+                events_queue, store_path, snapshot=True
+            )
+        ).start_trading(testing=True)
+
+
+def run_multi(output_dir, store_path, tickers, ns):
+    events_queue = DequeEventBus()
+    MultiStrategySession(
+        output_dir,
+        [TradeEveryNthBarStrategy(DequeEventBus(), n) for n in ns],
+        tickers, 100000.0, None, None, events_queue,
+        price_handler=BarStorePriceHandler(
+            events_queue, store_path, snapshot=True
+        )
+    ).start_trading(testing=True)
+
+
+def run(n_tickers=10, n_days=2000):
+    output_dir = tempfile.mkdtemp()
+    store_path = tempfile.mkdtemp()
+    try:
+        tickers = make_store(store_path, n_tickers, n_days)
+        for n_strategies in (1, 2, 4, 8):
+            ns = [20 + 5 * i for i in range(n_strategies)]
+            timings = []
+            for runner in (run_separate, run_multi):
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    runner(output_dir, store_path, tickers, ns)
+                timings.append(time.perf_counter() - start)
+            print(
+                "{} strategies: separate {:.2f}s, multi {:.2f}s "
+                "({:.1f}x)".format(
+                    n_strategies, timings[0], timings[1],
+                    timings[0] / timings[1]
+                )
+            )
+    finally:
+        shutil.rmtree(output_dir)
+        shutil.rmtree(store_path)
+
+
+if __name__ == "__main__":
+    run()
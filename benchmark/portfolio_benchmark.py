@@ -0,0 +1,80 @@
+"""
+Measures the cost of marking a large Portfolio to market each
+time slice when only a few of its tickers print, revaluing
+only the dirty Positions against revaluing every Position,
+with the Positions held in a dictionary and in a PositionBook.
+
+Run from the repository root with:
+    python -m benchmark.portfolio_benchmark
+"""
+import time
+
+import numpy as np
+
+from portfolio import Portfolio
+from position_book import PositionBook
+from price_parser import PriceParser
+from price_handler import AbstractBarPriceHandler
+
+
+class SlicePriceHandler(AbstractBarPriceHandler):
+    def __init__(self, tickers):
+        self.tickers = dict(
+            (ticker, {
+                "close": 100.0, "parsed_close": PriceParser.parse(100),
+                "adj_close": 100.0, "timestamp": None
+            })
+            for ticker in tickers
+        )
+
+    def get_last_close(self, ticker):
+        return self.tickers[ticker]["close"]
+
+    def store_prices(self, tickers, prices):
+        for ticker, price in zip(tickers, prices):
+            self.tickers[ticker]["close"] = price
+            self.tickers[ticker]["parsed_close"] = PriceParser.parse(price)
+        for dirty in self.dirty_sets:
+            dirty.update(dict.fromkeys(tickers))
+
+
+def run(n_positions=2000, n_updates=50, n_slices=2000):
+    rng = np.random.RandomState(0)
+    tickers = ["T{:04d}".format(i) for i in range(n_positions)]
+    updates = [
+        (
+            [tickers[i] for i in rng.choice(n_positions, n_updates, False)],
+            (100.0 + rng.normal(0.0, 1.0, n_updates)).tolist()
+        )
+        for _ in range(n_slices)
+    ]
+    for name, dirty, book in (
+        ("every position", False, False),
+        ("every position, book", False, True),
+        ("dirty positions", True, False),
+        ("dirty positions, book", True, True),
+    ):
+        price_handler = SlicePriceHandler(tickers)
+        portfolio = Portfolio(
+            price_handler, PriceParser.parse(10 ** 9), positions=PositionBook() if book else None
+        )
+        for ticker in tickers:
+            portfolio.transact_position(
+                "BOT", ticker, 10, PriceParser.parse(100), PriceParser.parse(1)
+            )
+        if not dirty:
+            portfolio.dirty = None
+
+        start = time.perf_counter()
+        for slice_tickers, prices in updates:
+            price_handler.store_prices(slice_tickers, prices)
+            portfolio.update_market_values()
+            portfolio.equity
+        elapsed = time.perf_counter() - start
+        print("{:>22}: {:.1f} us/slice, equity {:.2f}".format(
+            name, elapsed / n_slices * 1e6, PriceParser.display(portfolio.equity)
+        ))
+
+
+if __name__ == "__main__":
+    run()
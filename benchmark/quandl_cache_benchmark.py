@@ -0,0 +1,63 @@
+"""
+Reports cold and warm startup times of HistoricQuandlBarPriceHandler
+using a QuandlCache.
+
+By default a synthetic downloader with a fixed per-request latency
+stands in for quandl.get, so that the benchmark is repeatable and
+does not need an API key. Pass --live to use Quandl itself.
+
+Run from the repository root with:
+    python -m benchmark.quandl_cache_benchmark [--live]
+"""
+import queue
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from price_handler import HistoricQuandlBarPriceHandler
+from quandl_cache import QuandlCache
+
+
+def synthetic_downloader(latency=0.25, n_days=5000):
+    """
+    Returns a quandl.get stand-in which sleeps for latency seconds
+    and returns n_days of data with the EOD dataset columns.
+    """
+    def downloader(code, start_date=None):
+        time.sleep(latency)
+        dates = pd.bdate_range(end="2017-12-29", periods=n_days)
+        close = 100.0 + np.cumsum(np.random.normal(0.0, 1.0, n_days))
+        df = pd.DataFrame({
+            "Open": close, "High": close, "Low": close, "Close": close,
+            "Volume": 1000.0, "Adj_Close": close
+        }, index=dates)
+        if start_date is not None:
+            df = df[df.index >= pd.Timestamp(start_date)]
+        return df
+    return downloader
+
+
+def run(tickers=("AMZN", "GOOG", "MSFT", "AAPL", "XOM"), live=False):
+    cache_dir = tempfile.mkdtemp()
+    downloader = None if live else synthetic_downloader()
+    try:
+        for name in ("cold", "warm"):
+            cache = QuandlCache(cache_dir, downloader=downloader)
+            start = time.perf_counter()
+            HistoricQuandlBarPriceHandler(
+                queue.Queue(), list(tickers), cache=cache
+            )
+            elapsed = time.perf_counter() - start
+            print("{} startup ({} tickers): {:.3f}s".format(
+                name, len(tickers), elapsed
+            ))
+    finally:
+        shutil.rmtree(cache_dir)
+
+
+if __name__ == "__main__":
+    run(live="--live" in sys.argv)
@@ -0,0 +1,80 @@
+"""
+Measures the throughput of HistoricCSVTickPriceHandler, in ticks
+per second, and checks that the number of ticks held in memory
+stays bounded by one chunk per ticker.
+
+Run from the repository root with:
+    python -m benchmark.tick_stream_benchmark
+"""
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from tick_price_handler import HistoricCSVTickPriceHandler
+
+
+class NullQueue(object):
+    """
+    Discards events so that only the price handler is measured.
+    """
+    def put(self, event):
+        pass
+
+
+def write_ticks(csv_dir, tickers, n_ticks):
+    """
+    Writes n_ticks random quotes per ticker, with irregular
+    millisecond spacing, into "<csv_dir>/<ticker>.csv".
+    """
+    rng = np.random.RandomState(42)
+    for ticker in tickers:
+        times = pd.Timestamp("2016-01-04 09:30:00") + pd.to_timedelta(
+            np.cumsum(rng.randint(1, 200, n_ticks)), unit="ms"
+        )
+        bid = 100.0 + np.cumsum(rng.normal(0.0, 0.01, n_ticks))
+        pd.DataFrame({
+            "Ticker": ticker,
+            "Time": times.strftime("%Y-%m-%d %H:%M:%S.%f"),
+            "Bid": bid.round(2),
+            "Ask": (bid + 0.01).round(2),
+        }).to_csv(os.path.join(csv_dir, ticker + ".csv"), index=False)
+
+
+def run(n_tickers=10, n_ticks=100000, chunksize=4096):
+    csv_dir = tempfile.mkdtemp()
+    try:
+        tickers = ["T{:03d}".format(i) for i in range(n_tickers)]
+        write_ticks(csv_dir, tickers, n_ticks)
+
+        price_handler = HistoricCSVTickPriceHandler(
+            NullQueue(), csv_dir, tickers, chunksize=chunksize,
+            time_format="%Y-%m-%d %H:%M:%S.%f"
+        )
+        count = 0
+        max_buffered = 0
+        start = time.perf_counter()
+        while price_handler.continue_backtest:
+            price_handler.stream_next()
+            count += 1
+            if count % chunksize == 0:
+                max_buffered = max(
+                    max_buffered, price_handler.tick_stream.buffered_rows()
+                )
+        elapsed = time.perf_counter() - start
+        count -= 1
+        print("{} ticks in {:.3f}s, {:,.0f} ticks/sec".format(
+            count, elapsed, count / elapsed
+        ))
+        print("max ticks buffered: {} (bound {} = {} tickers x {})".format(
+            max_buffered, n_tickers * chunksize, n_tickers, chunksize
+        ))
+    finally:
+        shutil.rmtree(csv_dir)
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,70 @@
+"""
+Compares the time taken to screen moving-average crossover
+rules with the vectorized backtester against running a single
+rule through the event-driven TradingSession.
+
+Run from the repository root with:
+    python -m benchmark.vectorized_benchmark
+"""
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from bar_store import BarStorePriceHandler, write_bar_store
+from event_bus import DequeEventBus
+from strategy import TargetPositionStrategy
+from trading_session import TradingSession
+from vectorized import calculate_equity
+from benchmark.bar_stream_benchmark import make_universe
+
+
+def crossover_targets(close, window, quantity=100):
+    signal = np.sign(close - close.rolling(window).mean())
+    return (signal * quantity).ffill().fillna(0).astype(int)
+
+
+def run(n_tickers=20, n_days=2520, n_rules=200):
+    tickers_data = make_universe(n_tickers, n_days)
+    close = pd.DataFrame(dict(
+        (ticker, df["Close"]) for ticker, df in tickers_data.items()
+    ))
+    windows = [2 + i % 200 for i in range(n_rules)]
+
+    start = time.perf_counter()
+    targets = np.array([
+        crossover_targets(close, window).values for window in windows
+    ])
+    calculate_equity(close.values, targets, 100000.0)
+    elapsed = time.perf_counter() - start
+    print("vectorized: {} rules in {:.2f}s, {:.2f}ms/rule".format(
+        n_rules, elapsed, elapsed / n_rules * 1000.0
+    ))
+
+    store_path = tempfile.mkdtemp()
+    output_dir = tempfile.mkdtemp()
+    try:
+        write_bar_store(store_path, tickers_data)
+        events_queue = DequeEventBus()
+        session = TradingSession(
+            output_dir, TargetPositionStrategy(
+                events_queue, crossover_targets(close, windows[0])
+            ),
+            list(tickers_data.keys()), 100000.0, None, None, events_queue,
+            price_handler=BarStorePriceHandler(
+                events_queue, store_path, snapshot=True
+            )
+        )
+        start = time.perf_counter()
+        session.start_trading(testing=True)
+        elapsed = time.perf_counter() - start
+        print("event-driven: 1 rule in {:.2f}s".format(elapsed))
+    finally:
+        shutil.rmtree(store_path)
+        shutil.rmtree(output_dir)
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,214 @@
+import itertools
+import os
+import pickle
+
+
+# Session attributes holding components that are recreated,
+# rather than restored, when a session resumes from a checkpoint
+LIVE_COMPONENTS = (
+    "events_queue", "price_handler", "portfolio_handler",
+    "execution_handler", "compliance", "position_sizer",
+    "risk_manager", "dispatcher", "scheduler"
+)
+
+
+class _CheckpointPickler(pickle.Pickler):
+    """
+    Pickles references to the live components of a session by
+    name, so that they are neither written to the checkpoint
+    nor duplicated when it is loaded.
+    """
+    def __init__(self, file, live):
+        super(_CheckpointPickler, self).__init__(
+            file, pickle.HIGHEST_PROTOCOL
+        )
+        self.live = dict((id(obj), name) for name, obj in live.items())
+
+    def persistent_id(self, obj):
+        return self.live.get(id(obj))
+
+
+class _CheckpointUnpickler(pickle.Unpickler):
+    def __init__(self, file, live):
+        super(_CheckpointUnpickler, self).__init__(file)
+        self.live = live
+
+    def persistent_load(self, pid):
+        return self.live[pid]
+
+
+def _live_components(session):
+    live = dict(
+        (name, getattr(session, name)) for name in LIVE_COMPONENTS
+        if getattr(session, name, None) is not None
+    )
+    live["session"] = session
+    return live
+
+
+def _pending_events(events_queue):
+    if hasattr(events_queue, "pending"):
+        return events_queue.pending()
+    # A queue.Queue
+    with events_queue.mutex:
+        return list(events_queue.queue)
+
+
+class SessionCheckpointer(object):
+    """
+    SessionCheckpointer periodically writes the state of a
+    backtest TradingSession to a file, from which an identically
+    configured session can resume after a failure.
+
+    A checkpoint holds only what a freshly created session cannot
+    rebuild: the price handler position and latest prices, the
+    Portfolio and its Positions, the statistics, the strategy,
+    the scheduled items and any pending events, as well as the
+    name and size of the trade log of a compliance component
+    supporting checkpoints, to which the log is truncated on
+    restore, so that the trades recorded by the failed session
+    after the checkpoint are dropped. It is written
+    with the highest pickle protocol, to a temporary file which
+    then atomically replaces the previous checkpoint, so that a
+    failure while writing never leaves a corrupt checkpoint.
+
+    Statistics supporting get_history are not saved whole at
+    every checkpoint. Instead, the rows added since the last
+    checkpoint are appended to a history file alongside it,
+    and the checkpoint holds the number of rows and the size
+    of the history file, to which it is truncated on restore.
+
+    The strategy, and any callbacks scheduled on the session
+    scheduler, must be picklable. References from them to the
+    components of the session are saved by name and reattached
+    to the components of the resuming session.
+    """
+    def __init__(self, path, every=10000):
+        """
+        Parameters:
+        path - The checkpoint file.
+        every - The number of market events between checkpoints.
+        """
+        self.path = os.path.expanduser(path)
+        self.history_path = self.path + ".history"
+        self.every = every
+        self.count = 0
+        # The number of statistics rows in the history file
+        self.history_rows = 0
+
+    def step(self, session):
+        """
+        Called by the session before streaming each market
+        event, writing a checkpoint every "every" calls.
+        """
+        self.count += 1
+        if self.count % self.every == 0:
+            self.save(session)
+
+    def save(self, session):
+        """
+        Writes the state of the session to the checkpoint file.
+        """
+        scheduler = session.scheduler
+        seq = next(scheduler.seq)
+        scheduler.seq = itertools.count(seq)
+        get_compliance_state = getattr(
+            session.compliance, "get_checkpoint_state", None
+        )
+        state = {
+            "count": self.count,
+            "cur_time": session.cur_time,
+            "price_handler": session.price_handler.get_checkpoint_state(),
+            "portfolio": session.portfolio_handler.portfolio,
+            "statistics": self._save_statistics(session.statistics),
+            "strategy": session.strategy,
+            "scheduler": (scheduler.now, scheduler.heap, seq),
+            "events": _pending_events(session.events_queue),
+            "compliance": (
+                None if get_compliance_state is None
+                else get_compliance_state()
+            ),
+        }
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            _CheckpointPickler(f, _live_components(session)).dump(state)
+        os.replace(tmp_path, self.path)
+
+    def _save_statistics(self, statistics):
+        """
+        Appends the statistics rows added since the last
+        checkpoint to the history file, starting a new one at
+        the first checkpoint of a session, and returns the
+        number of rows and the size of the file.
+        """
+        if not hasattr(statistics, "get_history"):
+            return statistics
+        rows = statistics.get_history(self.history_rows)
+        mode = "ab" if self.history_rows else "wb"
+        with open(self.history_path, mode) as f:
+            pickle.dump(rows, f, pickle.HIGHEST_PROTOCOL)
+            size = f.tell()
+        self.history_rows += len(rows)
+        return self.history_rows, size
+
+    def _restore_statistics(self, session, state):
+        """
+        Restores the statistics saved by _save_statistics,
+        dropping any rows appended after the checkpoint.
+        """
+        if not hasattr(session.statistics, "restore_history"):
+            session.statistics = state
+            return
+        self.history_rows, size = state
+        rows = []
+        with open(self.history_path, "r+b") as f:
+            f.truncate(size)
+            while f.tell() < size:
+                rows.extend(pickle.load(f))
+        session.statistics.restore_history(rows)
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def remove(self):
+        """
+        Removes the checkpoint and history files, once the
+        session has finished, so that a later session using
+        the same path cannot resume from them.
+        """
+        for path in (self.path, self.history_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def restore(self, session):
+        """
+        Restores the state saved in the checkpoint file into a
+        newly created session, configured identically to the one
+        that was checkpointed, which has yet to start trading.
+        """
+        with open(self.path, "rb") as f:
+            state = _CheckpointUnpickler(f, _live_components(session)).load()
+        self.count = state["count"]
+        session.cur_time = state["cur_time"]
+        session.price_handler.restore_checkpoint_state(state["price_handler"])
+        if state["compliance"] is not None:
+            session.compliance.restore_checkpoint_state(state["compliance"])
+
+        # The restored Portfolio has registered its own dirty set
+        # with the price handler, replacing that of the Portfolio
+        # created with the session
+        portfolio = session.portfolio_handler.portfolio
+        if portfolio.dirty is not None:
+            session.price_handler.unregister_dirty_set(portfolio.dirty)
+        session.portfolio_handler.portfolio = state["portfolio"]
+        self._restore_statistics(session, state["statistics"])
+
+        # The strategy is restored in place, as its methods are
+        # already subscribed to the dispatcher
+        session.strategy.__dict__.update(state["strategy"].__dict__)
+
+        scheduler = session.scheduler
+        scheduler.now, scheduler.heap, seq = state["scheduler"]
+        scheduler.seq = itertools.count(seq)
+        for event in state["events"]:
+            session.events_queue.put(event)
@@ -31,6 +31,8 @@ import datetime
 import os
 import csv
 
+from price_parser import PriceParser
+
 class NaiveCompliance(AbstractCompliance):
     """
     A basic compliance module which writes trades to a CSV file
@@ -38,24 +40,35 @@ class NaiveCompliance(AbstractCompliance):
     """
 
     def __init__(self, output_dir):
+        """
+        Names the trade log for the day. The log is started by
+        start_log(), before the first trade is recorded.
+        """
+        self.output_dir = output_dir
+        today = datetime.datetime.utcnow().date()
+        self.csv_filename = "tradelog_" + today.strftime("%Y-%m-%d") + ".csv"
+        self.log_started = False
+
+    def _log_path(self, csv_filename):
+        return os.path.expanduser(os.path.join(self.output_dir, csv_filename))
+
+    def start_log(self):
         """
         Wipe the existing trade log for the day, leaving
-        only the headers in an empty CSV.
+        only the headers in an empty CSV, unless the log
+        has already been started or restored.
 
         It allows for multiple backtests to be run
         in a simple way, but quite likely makes it
         unsuitable for a production environment that
         requires strict record-keeping
         """
-        self.output_dir = output_dir
+        if self.log_started:
+            return
+        self.log_started = True
         # Remove the previous CSV file
-        today = datetime.datetime.utcnow().date()
-        self.csv_filename = "tradelog_" + today.strftime("%Y-%m-%d") + ".csv"
-
         try:
-            fname = os.path.expanduser(os.path.join(output_dir,
-                                                    self.csv_filename))
-            os.remove(fname)
+            os.remove(self._log_path(self.csv_filename))
         except (IOError, OSError):
             print("No tradelog files to clean.")
 
@@ -66,24 +79,61 @@ class NaiveCompliance(AbstractCompliance):
             "exchange", "price",
             "commission"
         ]
-        fname = os.path.expanduser(os.path.join(self.output_dir,
-                                                self.csv_filename))
-        with open(fname, "a") as csvfile:
+        with open(self._log_path(self.csv_filename), "a") as csvfile:
             writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
             writer.writeheader()
 
+    def get_checkpoint_state(self):
+        """
+        Returns the filename and size of the trade log, so
+        that a resuming session carries on the same log from
+        the checkpoint, without the trades recorded after it.
+        """
+        self.start_log()
+        return (
+            self.csv_filename,
+            os.path.getsize(self._log_path(self.csv_filename))
+        )
+
+    def restore_checkpoint_state(self, state):
+        """
+        Truncates the trade log returned by get_checkpoint_state
+        to its size at the checkpoint and records any further
+        trades to it, removing the log of today if the checkpoint
+        was written on an earlier day.
+        """
+        csv_filename, size = state
+        if csv_filename != self.csv_filename:
+            try:
+                os.remove(self._log_path(self.csv_filename))
+            except (IOError, OSError):
+                pass
+            self.csv_filename = csv_filename
+        with open(self._log_path(self.csv_filename), "r+b") as csvfile:
+            csvfile.truncate(size)
+        self.log_started = True
 
     def record_trade(self, fill):
         """
-        Append all details about the FillEvent to the CSV trade log.
+        Append all details about the FillEvent to the CSV trade log,
+        with the price and commission displayed as decimal amounts.
         """
-        fname = os.path.expanduser(os.path.join(self.output_dir,
-                                                self.csv_filename))
-        with open(fname, "a") as csvfile:
+        self.start_log()
+        with open(self._log_path(self.csv_filename), "a") as csvfile:
             writer = csv.writer(csvfile)
             writer.writerow([
                 fill.timestamp, fill.ticker,
                 fill.action, fill.quantity,
-                fill.exchange, fill.price,
-                fill.commission
+                fill.exchange, PriceParser.display(fill.price, None),
+                PriceParser.display(fill.commission, None)
             ])
+
+
+class NullCompliance(AbstractCompliance):
+    """
+    A compliance module which discards every trade, for runs
+    such as parameter sweeps where no trade log is wanted.
+    """
+
+    def record_trade(self, fill):
+        pass
@@ -0,0 +1,59 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+
+def load_concurrently(
+    load, keys, max_workers=1, use_processes=False, args=None
+):
+    """
+    Calls load(key) for every key, using a bounded pool of
+    workers, and returns a tuple of (results, errors).
+
+    results is a dictionary of key to the value returned by load
+    and errors is a dictionary of key to the exception raised by
+    load. Both are ordered as keys, whatever the order in which
+    the individual loads complete, so the outcome is deterministic.
+
+    A thread pool suits I/O-bound loads (e.g. downloads), whereas
+    a process pool (use_processes=True) suits parse-heavy loads
+    that would otherwise contend for the GIL. In the latter case
+    load and its return values must be picklable.
+
+    Parameters:
+    load - Callable taking a single key.
+    keys - The keys to load.
+    max_workers - Maximum number of concurrent loads. With
+        one (or fewer) workers, keys are loaded serially in
+        the calling thread.
+    use_processes - Use a process pool rather than a thread pool.
+    args - Optional sequence of the arguments given to load, in
+        place of the keys, with which they are aligned, e.g. when
+        the keys are indices of unhashable arguments.
+    """
+    outcomes = []
+    if args is None:
+        args = keys
+    calls = list(zip(keys, args))
+    if max_workers is None or max_workers > 1:
+        executor_cls = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+        with executor_cls(max_workers=max_workers) as executor:
+            futures = [(key, executor.submit(load, arg)) for key, arg in calls]
+            for key, future in futures:
+                try:
+                    outcomes.append((key, future.result(), None))
+                except Exception as e:
+                    outcomes.append((key, None, e))
+    else:
+        for key, arg in calls:
+            try:
+                outcomes.append((key, load(arg), None))
+            except Exception as e:
+                outcomes.append((key, None, e))
+
+    results = {}
+    errors = {}
+    for key, result, error in outcomes:
+        if error is None:
+            results[key] = result
+        else:
+            errors[key] = error
+    return results, errors
@@ -51,7 +51,7 @@ class HistoricQuandlDataHandler(DataHandler):
     to a live trading interface.
     """
 
-    def __init__(self, events, symbol_list, start_date):
+    def __init__(self, events, symbol_list, start_date, cache=None):
         """
         Initialize the historic data handler by requesting
         a list of symbols.
@@ -60,10 +60,12 @@ class HistoricQuandlDataHandler(DataHandler):
         Parameters:
         events - The Event Queue
         symbol_list - A list of symbol strings.
+        cache - An optional QuandlCache to read the data from.
         """
         self.events = events
         self.symbol_list = symbol_list
         self.start_date = start_date
+        self.cache = cache
 
         self.symbol_data = {}
         self.latest_symbol_data = {}
@@ -83,9 +85,13 @@ class HistoricQuandlDataHandler(DataHandler):
         comb_index = None
         for s in self.symbol_list:
             # download quandl data
-            data = quandl.get('EOD/{}'.format(s),
-                            start_date=self.start_date,
-                            end_date=datetime.datetime.today().strftime('%Y-%m-%d'))
+            if self.cache is not None:
+                data = self.cache.get('EOD', s)
+                data = data[data.index >= pd.Timestamp(self.start_date)]
+            else:
+                data = quandl.get('EOD/{}'.format(s),
+                                start_date=self.start_date,
+                                end_date=datetime.datetime.today().strftime('%Y-%m-%d'))
             data = data[["Adj_Open", "Adj_Low", "Adj_High",
                         "Adj_Close", "Adj_Volume"]]
             data.columns = ['open', 'low', 'high',
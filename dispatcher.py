@@ -0,0 +1,89 @@
+class EventDispatcher(object):
+    """
+    EventDispatcher routes every event taken off the events queue
+    to the handlers that have subscribed to its event type, in
+    the order in which they subscribed.
+
+    A handler may optionally subscribe to a set of tickers only,
+    in which case it is only called for events of one of those
+    tickers (or, for a BarSnapshotEvent, for snapshots containing
+    at least one of them). The handlers for each (event type,
+    ticker) pair are resolved once and cached, so a strategy
+    trading a handful of names out of a large feed costs nothing
+    for the bars of every other name.
+    """
+    def __init__(self):
+        self.subscriptions = {}
+        self.routes = {}
+
+    def subscribe(self, event_type, handler, tickers=None):
+        """
+        Subscribes a handler to an event type.
+
+        Parameters:
+        event_type - The EventType member to handle.
+        handler - A callable taking the event.
+        tickers - Optional iterable of ticker symbols to which
+            the subscription is restricted.
+        """
+        if tickers is not None:
+            tickers = frozenset(tickers)
+        self.subscriptions.setdefault(event_type, []).append(
+            (handler, tickers)
+        )
+        self.routes[event_type] = {}
+
+    def subscribe_many(self, event_types, handler, tickers=None):
+        """
+        Subscribes a handler to each of several event types.
+        """
+        for event_type in event_types:
+            self.subscribe(event_type, handler, tickers)
+
+    def handlers(self, event_type, ticker=None):
+        """
+        Returns the list of handlers for events of an event
+        type and ticker, raising NotImplementedError if no
+        handler has subscribed to the event type.
+        """
+        try:
+            routes = self.routes[event_type]
+        except KeyError:
+            raise NotImplementedError(
+                "Unsupported event type '{}'".format(event_type)
+            )
+        try:
+            return routes[ticker]
+        except KeyError:
+            handlers = [
+                handler
+                for handler, tickers in self.subscriptions[event_type]
+                if tickers is None or ticker in tickers
+            ]
+            routes[ticker] = handlers
+            return handlers
+
+    def dispatch(self, event):
+        """
+        Calls every handler subscribed to the event.
+        """
+        ticker = getattr(event, "ticker", None)
+        if ticker is None and hasattr(event, "tickers"):
+            handlers = self._snapshot_handlers(event)
+        else:
+            handlers = self.handlers(event.type, ticker)
+        for handler in handlers:
+            handler(event)
+
+    def _snapshot_handlers(self, event):
+        """
+        Returns the handlers for an event carrying several
+        tickers, which are not cached as the set of tickers
+        varies from one event to the next.
+        """
+        self.handlers(event.type)
+        return [
+            handler
+            for handler, tickers in self.subscriptions[event.type]
+            if tickers is None or not tickers.isdisjoint(event.tickers)
+        ]
@@ -1,7 +1,24 @@
 from enum import Enum
 
 
-EventType = Enum("EventType", "TICK BAR SIGNAL ORDER FILL")
+EventType = Enum("EventType", "TICK BAR SIGNAL ORDER FILL SNAPSHOT TIMER")
+
+
+# Human-readable names of the common bar periods, in seconds
+PERIOD_READABLE = {
+    1: "1sec",
+    5: "5sec",
+    10: "10sec",
+    30: "30sec",
+    60: "1min",
+    300: "5min",
+    600: "10min",
+    900: "15min",
+    1800: "30min",
+    3600: "1hr",
+    86400: "1day",
+    604800: "1wk"
+}
 
 
 class Event(object):
@@ -9,7 +26,13 @@ class Event(object):
     Event is base class providing an interface for all subsequent
     (inherited) events, that will trigger further events in the
     trading infrastructure.
+
+    Events are created at a very high rate, so every event
+    class declares __slots__ rather than carrying a per-instance
+    attribute dictionary, and its type is a class attribute.
     """
+    __slots__ = ()
+
     @property
     def typename(self):
         return self.type.name
@@ -21,6 +44,8 @@ class TickEvent(Event):
     which is defined as a ticker symbol and associated best
     bid and ask from the top of the order book.
     """
+    __slots__ = ("ticker", "time", "bid", "ask")
+    type = EventType.TICK
 
     def __init__(self, ticker, time, bid, ask):
         """
@@ -32,7 +57,6 @@ class TickEvent(Event):
         bid - The best bid price at the time of the tick.
         ask - The best ask price at the time of the tick.
         """
-        self.type = EventType.TICK
         self.ticker = ticker
         self.time = time
         self.bid = bid
@@ -53,6 +77,12 @@ class BarEvent(Event):
     Handles the event of receiving a new market
     open-high-low-close-volume bar.
     """
+    __slots__ = (
+        "ticker", "time", "period", "open_price", "high_price",
+        "low_price", "close_price", "volume", "adj_close_price"
+    )
+    type = EventType.BAR
+
     def __init__(
         self, ticker, time, period,
         open_price, high_price, low_price,
@@ -77,7 +107,6 @@ class BarEvent(Event):
         of "open_price", "close_price" as "open" is a reserved
         word in Python.
         """
-        self.type = EventType.BAR
         self.ticker = ticker
         self.time = time
         self.period = period
@@ -87,9 +116,9 @@ class BarEvent(Event):
         self.close_price = close_price
         self.volume = volume
         self.adj_close_price = adj_close_price
-        self.period_readable = self._readable_period()
 
-    def _readable_period(self):
+    @property
+    def period_readable(self):
         """
         Creates a human-readable period from the number
         of seconds specified for "period."
@@ -98,23 +127,9 @@ class BarEvent(Event):
         readable period is simply passed through from period,
         in seconds.
         """
-        lut = {
-            1: "1sec",
-            5: "5sec",
-            10: "10sec",
-            30: "30sec",
-            60: "1min",
-            300: "5min",
-            600: "10min",
-            900: "15min",
-            1800: "30min",
-            3600: "1hr",
-            86400: "1day",
-            604800: "1wk"
-        }
-        if self.period in lut:
-            return lut[self.period]
-        else:
+        try:
+            return PERIOD_READABLE[self.period]
+        except KeyError:
             return "{}sec".format(self.period)
 
     def __str__(self):
@@ -133,11 +148,117 @@ class BarEvent(Event):
         return str(self)
 
 
+class BarSnapshotEvent(Event):
+    """
+    Handles the event of receiving the bars of every ticker
+    that printed at a particular timestamp, as a single event.
+
+    The open-high-low-close-volume values are held in NumPy
+    arrays that are aligned with the list of tickers.
+    """
+    __slots__ = (
+        "time", "period", "tickers", "open_prices", "high_prices",
+        "low_prices", "close_prices", "volumes", "adj_close_prices"
+    )
+    type = EventType.SNAPSHOT
+
+    def __init__(
+        self, time, period, tickers,
+        open_prices, high_prices, low_prices,
+        close_prices, volumes, adj_close_prices
+    ):
+        """
+        Initializes the BarSnapshotEvent.
+
+        Parameters:
+        time - The timestamp shared by all of the bars.
+        period - The time period convered by the bars in seconds.
+        tickers - The list of ticker symbols that printed at time.
+        open_prices - Array of unadjusted opening prices.
+        high_prices - Array of unadjusted high prices.
+        low_prices - Array of unadjusted low prices.
+        close_prices - Array of unadjusted close prices.
+        volumes - Array of volumes traded within the bars.
+        adj_close_prices - Array of adjusted closing prices.
+        """
+        self.time = time
+        self.period = period
+        self.tickers = tickers
+        self.open_prices = open_prices
+        self.high_prices = high_prices
+        self.low_prices = low_prices
+        self.close_prices = close_prices
+        self.volumes = volumes
+        self.adj_close_prices = adj_close_prices
+
+    def bar_events(self):
+        """
+        Returns the snapshot as a list of individual BarEvents,
+        ordered by ticker.
+        """
+        return [
+            BarEvent(
+                ticker, self.time, self.period,
+                open_price, high_price, low_price,
+                close_price, int(volume), adj_close_price
+            )
+            for (
+                ticker, open_price, high_price, low_price,
+                close_price, volume, adj_close_price
+            ) in zip(
+                self.tickers, self.open_prices.tolist(),
+                self.high_prices.tolist(), self.low_prices.tolist(),
+                self.close_prices.tolist(), self.volumes.tolist(),
+                self.adj_close_prices.tolist()
+            )
+        ]
+
+    def __str__(self):
+        return "Type: {}, Time: {}, Period: {}, Tickers: {}".format(
+                str(self.type), str(self.time),
+                str(self.period), len(self.tickers)
+            )
+
+    def __repr__(self):
+        return str(self)
+
+
+class TimerEvent(Event):
+    """
+    Handles the event of a timer, scheduled with the Scheduler of
+    a TradingSession, firing at a particular simulated time, e.g.
+    for end-of-day processing or periodic rebalancing.
+    """
+    __slots__ = ("time", "name")
+    type = EventType.TIMER
+
+    def __init__(self, time, name):
+        """
+        Initializes the TimerEvent.
+
+        Parameters:
+        time - The simulated time at which the timer fired.
+        name - The name given to the timer when scheduled.
+        """
+        self.time = time
+        self.name = name
+
+    def __str__(self):
+        return "Type: {}, Time: {}, Name: {}".format(
+                str(self.type), str(self.time), str(self.name)
+            )
+
+    def __repr__(self):
+        return str(self)
+
+
 class SignalEvent(Event):
     """
     Handles the event of sending a Signal from a Strategy object.
     This is received by a Portfolio object and acted upon.
     """
+    __slots__ = ("ticker", "action", "suggested_quantity")
+    type = EventType.SIGNAL
 
     def __init__(self, ticker, action, suggested_quantity=None):
         """
@@ -151,8 +272,6 @@ class SignalEvent(Event):
             of an asset to transact in, which is used by the
             PositionSizer and RiskManager.
         """
-
-        self.type = EventType.SIGNAL
         self.ticker = ticker
         self.action = action
         self.suggested_quantity = suggested_quantity
@@ -167,6 +286,8 @@ class OrderEvent(Event):
     ## TODO:
     ## in the future, add order type (market or limit) and qualifier (ftk)
     ## https://www.cmegroup.com/confluence/display/EPICSANDBOX/Order+Types+for+Futures+and+Options
+    __slots__ = ("ticker", "action", "quantity")
+    type = EventType.ORDER
 
     def __init__(self, ticker, action, quantity):
         """
@@ -177,8 +298,6 @@ class OrderEvent(Event):
         action - 'BOT' or 'SLD' for long or short.
         quantity - Non-negative integer for quantity.
         """
-
-        self.type = EventType.ORDER
         self.ticker = ticker
         self.action = action
         self.quantity = quantity
@@ -204,6 +323,11 @@ class FillEvent(Event):
     ## TODO: Currently does not support filling positions at
     ## different prices. This will be simulated by averaging
     ## the cost.
+    __slots__ = (
+        "timestamp", "ticker", "action", "quantity",
+        "exchange", "price", "commission"
+    )
+    type = EventType.FILL
 
     def __init__(
         self, timestamp, ticker,
@@ -219,11 +343,11 @@ class FillEvent(Event):
         action - "BOT" (for long) or "SLD" (for short).
         quantity - The filled quantity.
         exchange - The exchange where the order was filled.
-        price - The price at which the trade was filled.
-        commission - The brokerage commission for carrying out the trade.
+        price - The price at which the trade was filled,
+            parsed by PriceParser.
+        commission - The brokerage commission for carrying out the
+            trade, parsed by PriceParser.
         """
-
-        self.type = EventType.FILL
         self.timestamp = timestamp
         self.ticker = ticker
         self.action = action
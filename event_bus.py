@@ -0,0 +1,140 @@
+from abc import ABCMeta, abstractmethod
+from collections import deque
+import queue
+
+
+class EventBus(object):
+    """
+    EventBus is an abstract base class providing an interface
+    for the events queue shared by all of the components of a
+    TradingSession.
+
+    Events are placed onto the bus with put, and taken off it,
+    in first-in first-out order, with poll. Rather than raising
+    an exception, poll returns None once the bus is empty, so
+    that the session loop need not rely on exceptions for its
+    control flow.
+
+    The get and empty methods mirror those of queue.Queue so
+    that a bus can be used wherever an events queue was, except
+    that get does not block by default, and only a bus that may
+    be written to by other threads supports blocking at all.
+    """
+
+    __metaclass__ = ABCMeta
+
+    @abstractmethod
+    def put(self, event):
+        raise NotImplementedError("Should implement put()")
+
+    @abstractmethod
+    def poll(self):
+        raise NotImplementedError("Should implement poll()")
+
+    @abstractmethod
+    def __len__(self):
+        raise NotImplementedError("Should implement __len__()")
+
+    @abstractmethod
+    def pending(self):
+        """
+        Returns a list of the events on the bus, in the order
+        in which they will be polled, without removing them.
+        """
+        raise NotImplementedError("Should implement pending()")
+
+    def empty(self):
+        return len(self) == 0
+
+    def qsize(self):
+        return len(self)
+
+    def get(self, block=False, timeout=None):
+        """
+        Returns the next event, raising queue.Empty if
+        there is none.
+
+        No other thread can place an event onto the bus while
+        get waits, so a blocking get raises a ValueError rather
+        than waiting forever.
+        """
+        if block:
+            raise ValueError(
+                "{} does not support blocking gets, "
+                "use poll() instead.".format(self.__class__.__name__)
+            )
+        event = self.poll()
+        if event is None:
+            raise queue.Empty
+        return event
+
+
+class DequeEventBus(EventBus):
+    """
+    DequeEventBus is an unsynchronised event bus backed by a
+    collections.deque, for backtests in which every component
+    runs on a single thread.
+
+    Unlike queue.Queue it takes no lock and notifies no
+    condition variable on each put and get.
+    """
+    def __init__(self):
+        self.events = deque()
+
+    def put(self, event):
+        self.events.append(event)
+
+    def poll(self):
+        events = self.events
+        return events.popleft() if events else None
+
+    def __len__(self):
+        return len(self.events)
+
+    def pending(self):
+        return list(self.events)
+
+
+class ThreadSafeEventBus(EventBus):
+    """
+    ThreadSafeEventBus is an event bus backed by a queue.Queue,
+    for live sessions in which events may be placed onto the
+    bus by other threads (e.g. a brokerage connection).
+    """
+    def __init__(self):
+        self.events = queue.Queue()
+
+    def put(self, event):
+        self.events.put(event)
+
+    def poll(self):
+        try:
+            return self.events.get(False)
+        except queue.Empty:
+            return None
+
+    def get(self, block=False, timeout=None):
+        """
+        Returns the next event, raising queue.Empty if there
+        is none, waiting (up to timeout seconds) for another
+        thread to place one onto the bus if block is True.
+        """
+        return self.events.get(block, timeout)
+
+    def __len__(self):
+        return self.events.qsize()
+
+    def pending(self):
+        with self.events.mutex:
+            return list(self.events.queue)
+
+
+def create_event_bus(session_type="backtest"):
+    """
+    Returns the appropriate event bus for a session, which is
+    a ThreadSafeEventBus for live sessions and a DequeEventBus
+    otherwise.
+    """
+    if session_type == "live":
+        return ThreadSafeEventBus()
+    return DequeEventBus()
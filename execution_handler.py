@@ -33,6 +33,7 @@ class AbstractExecutionHandler(object):
 
 ###########
 from event import FillEvent, EventType
+from price_parser import PriceParser
 
 class IBSimulatedExecutionHandler(AbstractExecutionHandler):
     """
@@ -64,12 +65,14 @@ class IBSimulatedExecutionHandler(AbstractExecutionHandler):
         a transaction. This is based on the US Fixed pricing,
         the details of which can be found here:
         https://www.interactivebrokers.com/en/index.php?f=1590
+
+        The fill price and commission are parsed by PriceParser.
         """
         # fee structure maybe outdated, need to double check
         # if eventually going with IB
         commission = min(
-                0.5 * fill_price * quantity,
-                max(1.0, 0.005 * quantity)
+                fill_price * quantity // 2,
+                max(PriceParser.parse(1), PriceParser.parse("0.005") * quantity)
         )
         return commission
 
@@ -88,17 +91,28 @@ class IBSimulatedExecutionHandler(AbstractExecutionHandler):
             action = event.action
             quantity = event.quantity
 
-            # Obtain the fill price
-            if self.price_handler.istick():
-                bid, ask = self.price_handler.get_best_bid_ask(ticker)
+            # Obtain the fill price, parsed by PriceParser, which
+            # the price handler does once as it stores the prices
+            get_parsed_bid_ask = getattr(
+                self.price_handler, "get_parsed_bid_ask", None
+            )
+            if get_parsed_bid_ask is not None:
+                bid, ask = get_parsed_bid_ask(ticker)
                 if event.action == "BOT":
                     fill_price = ask
                 else:
                     fill_price = bid
 
+            elif self.price_handler.istick():
+                bid, ask = self.price_handler.get_best_bid_ask(ticker)
+                if event.action == "BOT":
+                    fill_price = PriceParser.parse(ask)
+                else:
+                    fill_price = PriceParser.parse(bid)
+
             else:
                 close_price = self.price_handler.get_last_close(ticker)
-                fill_price = close_price
+                fill_price = PriceParser.parse(close_price)
 
             # Set a dummy exchange and calculate trade commission
             exchange = "ARCA"
@@ -0,0 +1,216 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from price_handler import AbstractBarPriceHandler
+from bar_stream import (
+    BAR_COLUMNS, DEFAULT_CHUNKSIZE, MergedBarStream, iter_csv_chunks,
+    resume_positions
+)
+
+
+# Name of the date column (or field) within each ticker file
+DATE_COLUMN = "Date"
+
+FILE_EXTENSIONS = {
+    "csv": ".csv",
+    "parquet": ".parquet",
+    "npy": ".npy",
+}
+
+
+class HistoricFileBarPriceHandler(AbstractBarPriceHandler):
+    """
+    HistoricFileBarPriceHandler streams historic bars from per-ticker
+    files stored within a local directory, e.g. "<data_dir>/GOOG.csv",
+    rather than downloading them from a remote vendor. It is a
+    drop-in replacement for HistoricQuandlBarPriceHandler.
+
+    Each file contains a "Date" column plus the "Open", "High",
+    "Low", "Close", "Volume" and "Adj Close" columns, sorted by date.
+    The supported formats are:
+
+    csv - Comma separated text with a header row.
+    parquet - Apache Parquet (requires pyarrow).
+    npy - A NumPy structured array with the above field names,
+        where "Date" is a datetime64 field.
+
+    Files are read lazily in chunks of at most chunksize rows, and
+    only one chunk per ticker is held in memory at any time, so the
+    handler works even when the full ticker set does not fit into
+    RAM. Only the required columns are loaded and the
+    [start_date, end_date) window is applied during the read, so
+    bars after end_date are never read at all. The CSV rows before
+    start_date are skipped by a binary search of the file, without
+    being parsed.
+    """
+    def __init__(
+        self, events_queue, data_dir,
+        init_tickers=None,
+        start_date=None, end_date=None,
+        file_format="csv", chunksize=DEFAULT_CHUNKSIZE,
+        period=86400, snapshot=False, lookback=0
+    ):
+        """
+        Takes the events queue, the data directory and a possible
+        list of initial ticker symbols then creates an (optional)
+        list of ticker subscriptions.
+
+        Parameters:
+        events_queue - The events queue to place BarEvents onto.
+        data_dir - The directory containing the ticker files.
+        init_tickers - Optional list of ticker symbols.
+        start_date - Optional first date to stream.
+        end_date - Optional date at which to stop (exclusive).
+        file_format - One of "csv", "parquet" or "npy".
+        chunksize - Maximum number of rows read per ticker at a time.
+        period - The time period covered by each bar in seconds.
+        snapshot - If True, emit one BarSnapshotEvent per timestamp.
+        lookback - Number of bars of history kept per ticker
+            for get_latest_bars, where zero disables the history.
+        """
+        if file_format not in FILE_EXTENSIONS:
+            raise ValueError(
+                "Unsupported file format '{}'".format(file_format)
+            )
+        self.events_queue = events_queue
+        self.data_dir = os.path.expanduser(data_dir)
+        self.file_format = file_format
+        self.chunksize = chunksize
+        self.period = period
+        self.snapshot = snapshot
+        self.lookback = lookback
+        self.continue_backtest = True
+        self.tickers = {}
+        self.bar_history = {}
+        self.tickers_data = {}
+        self.start_date = start_date
+        self.end_date = end_date
+        if init_tickers is not None:
+            for ticker in init_tickers:
+                self.subscribe_ticker(ticker)
+        self.bar_stream = self._merge_sort_ticker_data()
+
+    def _ticker_filename(self, ticker):
+        return os.path.join(
+            self.data_dir, ticker + FILE_EXTENSIONS[self.file_format]
+        )
+
+    def _iter_parquet_chunks(self, filename):
+        """
+        Reads a Parquet file in record batches, pushing the column
+        selection and date window down into the scan so that row
+        groups outside the window are skipped.
+        """
+        import pyarrow.dataset as ds
+
+        dataset = ds.dataset(filename, format="parquet")
+        date = ds.field(DATE_COLUMN)
+        condition = None
+        if self.start_date is not None:
+            condition = date >= pd.Timestamp(self.start_date)
+        if self.end_date is not None:
+            before_end = date < pd.Timestamp(self.end_date)
+            condition = (
+                before_end if condition is None else condition & before_end
+            )
+        for batch in dataset.to_batches(
+            columns=[DATE_COLUMN] + BAR_COLUMNS,
+            filter=condition, batch_size=self.chunksize
+        ):
+            df = batch.to_pandas()
+            times = df[DATE_COLUMN].values.astype("datetime64[ns]").view("i8")
+            values = np.asfortranarray(
+                df[BAR_COLUMNS].values, dtype=np.float64
+            )
+            # Batches have no position to resume from
+            yield times, values, None
+
+    def _iter_npy_chunks(self, filename, resume_from=None):
+        """
+        Memory-maps a NumPy structured array, binary searches the
+        date field for the [start_date, end_date) window and copies
+        out one chunk at a time, so that only the pages within the
+        window are ever read. The file is mapped again for each
+        chunk, so that no handle is held open per ticker between
+        reads. The chunks start at the row resume_from, if given.
+        """
+        data = np.load(filename, mmap_mode="r")
+        dates = data[DATE_COLUMN]
+        start = 0
+        end = len(dates)
+        if self.start_date is not None:
+            start = np.searchsorted(
+                dates, pd.Timestamp(self.start_date).to_datetime64(), "left"
+            )
+        if self.end_date is not None:
+            end = np.searchsorted(
+                dates, pd.Timestamp(self.end_date).to_datetime64(), "left"
+            )
+        del dates, data
+        if resume_from is not None:
+            start = resume_from
+        for lo in range(start, end, self.chunksize):
+            data = np.load(filename, mmap_mode="r")
+            chunk = data[lo:min(lo + self.chunksize, end)]
+            times = chunk[DATE_COLUMN].astype("datetime64[ns]").view("i8")
+            values = np.empty((len(chunk), len(BAR_COLUMNS)), order="F")
+            for i, col in enumerate(BAR_COLUMNS):
+                values[:, i] = chunk[col]
+            del chunk, data
+            yield times, values, lo
+
+    def _iter_ticker_chunks(self, ticker, resume_from=None):
+        """
+        Returns a lazy iterator of (times, values, position)
+        chunks for the ticker file, starting from the chunk at
+        position resume_from, if given.
+        """
+        filename = self._ticker_filename(ticker)
+        if self.file_format == "csv":
+            return iter_csv_chunks(
+                filename, DATE_COLUMN, BAR_COLUMNS, self.start_date,
+                self.end_date, self.chunksize, resume_from=resume_from
+            )
+        elif self.file_format == "parquet":
+            return self._iter_parquet_chunks(filename)
+        else:
+            return self._iter_npy_chunks(filename, resume_from)
+
+    def _merge_sort_ticker_data(self, resume=None):
+        """
+        Merges the per-ticker chunk streams, by (timestamp, ticker),
+        into a single chronological bar stream, from the positions
+        of an optional resume state.
+        """
+        return MergedBarStream(dict(
+            (ticker, self._iter_ticker_chunks(ticker, position))
+            for ticker, position in resume_positions(self.tickers, resume)
+        ), resume)
+
+    def subscribe_ticker(self, ticker):
+        """
+        Subscribes the price handler to a new ticker symbol.
+
+        No data is read at this point. The prices are
+        populated as the bars are streamed.
+        """
+        if ticker not in self.tickers:
+            if os.path.exists(self._ticker_filename(ticker)):
+                self.tickers[ticker] = {
+                    "close": None,
+                    "parsed_close": None,
+                    "adj_close": None,
+                    "timestamp": None
+                }
+            else:
+                print(
+                    "Could not subscribe ticker {} "\
+                    "as no data file is found for pricing.".format(ticker)
+                )
+        else:
+            print(
+                "Could not subscribe ticker {} "\
+                "as it is already subscribed".format(ticker)
+            )
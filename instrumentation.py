@@ -0,0 +1,256 @@
+import json
+import time
+
+
+# The number of log2 latency histogram buckets, where bucket i
+# counts calls taking from 2**(i-1) up to 2**i nanoseconds
+HISTOGRAM_BUCKETS = 48
+
+
+class CallStats(object):
+    """
+    The call count, cumulative and maximum time and log2
+    latency histogram of a profiled event type or component.
+    """
+    __slots__ = ("count", "total_ns", "max_ns", "histogram")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.histogram = [0] * HISTOGRAM_BUCKETS
+
+    def record(self, elapsed_ns):
+        self.count += 1
+        self.total_ns += elapsed_ns
+        if elapsed_ns > self.max_ns:
+            self.max_ns = elapsed_ns
+        self.histogram[min(elapsed_ns.bit_length(), HISTOGRAM_BUCKETS - 1)] += 1
+
+    def percentile_ns(self, q):
+        """
+        Returns an upper bound on the q-th percentile latency,
+        i.e. the upper edge of the histogram bucket in which
+        it lies.
+        """
+        if self.count == 0:
+            return 0
+        rank = q / 100.0 * self.count
+        seen = 0
+        for i, n in enumerate(self.histogram):
+            seen += n
+            if seen >= rank and n:
+                return min(2 ** i, self.max_ns)
+        return self.max_ns
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "total_ns": self.total_ns,
+            "max_ns": self.max_ns,
+            "histogram": self.histogram,
+        }
+
+
+def _handler_name(handler):
+    owner = getattr(handler, "__self__", None)
+    name = getattr(handler, "__name__", None) or repr(handler)
+    if owner is None:
+        return name
+    return "{}.{}".format(owner.__class__.__name__, name)
+
+
+class SessionProfiler(object):
+    """
+    SessionProfiler records, for a TradingSession, the number
+    of calls, cumulative time and latency histogram of the
+    dispatch of each event type and of each component on the
+    hot path: every handler subscribed to the dispatcher,
+    the price handler's stream_next, the portfolio revaluation
+    and the recording of trades by the compliance component.
+
+    Nothing is instrumented unless a profiler is given to the
+    session, which then wraps these callables when it starts
+    trading, so an unprofiled session runs exactly the same
+    code as before. The wrappers are removed once the session
+    stops trading, whether or not it raised.
+
+    Times are inclusive, so the time of an event type includes
+    that of its handlers, and e.g. that of the execution
+    handler includes the compliance I/O that it carries out.
+    """
+    def __init__(self):
+        self.events = {}
+        self.components = {}
+        self.wall_ns = 0
+        self._start_ns = None
+        self._restore = []
+
+    def timed(self, stats, func):
+        """
+        Returns a wrapper of func recording each call in stats.
+        """
+        perf_counter_ns = time.perf_counter_ns
+        record = stats.record
+
+        def timed_func(*args, **kwargs):
+            start = perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(perf_counter_ns() - start)
+        timed_func.__wrapped__ = func
+        return timed_func
+
+    def _component_stats(self, name):
+        if name not in self.components:
+            self.components[name] = CallStats()
+        return self.components[name]
+
+    def _time_component(self, obj, attr):
+        """
+        Replaces a method of a component, on the instance, with
+        a timed wrapper, so that calls by other components are
+        also timed.
+        """
+        method = getattr(obj, attr, None)
+        if method is None or hasattr(method, "__wrapped__"):
+            return
+        self._restore.append((obj, attr, obj.__dict__.get(attr)))
+        setattr(obj, attr, self.timed(
+            self._component_stats(_handler_name(method)), method
+        ))
+
+    def instrument(self, session):
+        """
+        Wraps the hot path components of the session, and
+        returns a timed version of its dispatcher's dispatch,
+        which records the time taken by each event type.
+        """
+        dispatcher = session.dispatcher
+        self._restore.append((dispatcher, "routes", dict(
+            (event_type, {}) for event_type in dispatcher.subscriptions
+        )))
+        self._restore.append(
+            (dispatcher, "subscriptions", dict(dispatcher.subscriptions))
+        )
+        for event_type, subscriptions in dispatcher.subscriptions.items():
+            dispatcher.subscriptions[event_type] = [
+                (handler, tickers) if hasattr(handler, "__wrapped__") else (
+                    self.timed(
+                        self._component_stats(_handler_name(handler)), handler
+                    ),
+                    tickers
+                )
+                for handler, tickers in subscriptions
+            ]
+            dispatcher.routes[event_type] = {}
+        self._time_component(session.price_handler, "stream_next")
+        self._time_component(
+            session.portfolio_handler, "update_portfolio_value"
+        )
+        if session.compliance is not None:
+            self._time_component(session.compliance, "record_trade")
+
+        events = self.events
+        perf_counter_ns = time.perf_counter_ns
+        dispatch = dispatcher.dispatch
+
+        def timed_dispatch(event):
+            start = perf_counter_ns()
+            dispatch(event)
+            elapsed = perf_counter_ns() - start
+            try:
+                events[event.type.name].record(elapsed)
+            except KeyError:
+                events[event.type.name] = CallStats()
+                events[event.type.name].record(elapsed)
+
+        if session.scheduler.sink == dispatch:
+            self._restore.append((session.scheduler, "sink", dispatch))
+            session.scheduler.sink = timed_dispatch
+        return timed_dispatch
+
+    def uninstrument(self):
+        """
+        Removes the wrappers added by instrument, restoring the
+        original handlers and methods of the session.
+        """
+        while self._restore:
+            obj, attr, value = self._restore.pop()
+            if value is None:
+                delattr(obj, attr)
+            else:
+                setattr(obj, attr, value)
+
+    def start(self):
+        self._start_ns = time.perf_counter_ns()
+
+    def stop(self):
+        if self._start_ns is not None:
+            self.wall_ns += time.perf_counter_ns() - self._start_ns
+            self._start_ns = None
+
+    def to_dict(self):
+        """
+        Returns the recorded numbers as a JSON serialisable
+        dictionary.
+        """
+        return {
+            "wall_ns": self.wall_ns,
+            "histogram_buckets": HISTOGRAM_BUCKETS,
+            "events": dict(
+                (name, stats.to_dict()) for name, stats in self.events.items()
+            ),
+            "components": dict(
+                (name, stats.to_dict())
+                for name, stats in self.components.items()
+            ),
+        }
+
+    def export_json(self, path):
+        """
+        Writes the recorded numbers to a JSON file.
+        """
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def summary(self):
+        """
+        Returns a table of the recorded numbers, by event type
+        and by component, with the components sorted by their
+        cumulative time.
+        """
+        header = "{:<44} {:>9} {:>10} {:>6} {:>9} {:>9} {:>9} {:>9}".format(
+            "", "calls", "total ms", "% wall",
+            "mean us", "p50 us", "p99 us", "max us"
+        )
+        lines = [
+            "Session wall time: {:.1f} ms".format(self.wall_ns / 1e6),
+            header
+        ]
+        for title, table in (
+            ("Event types", self.events),
+            ("Components", self.components),
+        ):
+            lines.append(title)
+            for name, stats in sorted(
+                table.items(), key=lambda item: -item[1].total_ns
+            ):
+                lines.append(
+                    "  {:<42} {:>9} {:>10.1f} {:>6.1f} {:>9.2f} {:>9.2f} "
+                    "{:>9.2f} {:>9.2f}".format(
+                        name, stats.count, stats.total_ns / 1e6,
+                        100.0 * stats.total_ns / self.wall_ns
+                        if self.wall_ns else 0.0,
+                        stats.total_ns / 1e3 / stats.count
+                        if stats.count else 0.0,
+                        stats.percentile_ns(50) / 1e3,
+                        stats.percentile_ns(99) / 1e3,
+                        stats.max_ns / 1e3
+                    )
+                )
+        return "\n".join(lines)
+
+    def print_summary(self):
+        print(self.summary())
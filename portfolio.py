@@ -1,61 +1,292 @@
+import numpy as np
+
 from position import Position
+from position_book import PositionBook
+from price_parser import PriceParser
+from round_trip_ledger import RoundTripLedger
 
 class Portfolio(object):
     """
     The Portfolio class encapsulates a list of Positions,
-    as well as a cash balance, equity and PnL.
+    as well as a cash balance, equity and PnL, all of which
+    are fixed-point integers (see PriceParser).
     """
 
-    def __init__(self, price_handler, cash):
+    def __init__(
+        self, price_handler, cash, reconcile_every=None, positions=None
+    ):
         """
         On creation, the Portfolio object contains no
         positions and all values are "reset" to the initial
         cash, with no PnL
+
+        The cash, equity and PnL are running totals, adjusted
+        by the change in the values of the one Position that
+        each transaction or revaluation touches, rather than
+        recalculated over every Position.
+
+        The Portfolio registers a dirty set with the price
+        handler, which marks each ticker whose price it stores.
+        Only the Positions in those tickers are revalued, which
+        happens before the equity or PnL is next read.
+
+        Once a Position is closed, i.e. its quantity returns
+        to zero, it is moved out of the positions into the
+        round_trips ledger, while its realized PnL remains in
+        the Portfolio totals.
+
+        Parameters:
+        price_handler - The price handler giving the latest prices.
+        cash - The initial cash, as parsed by PriceParser.
+        reconcile_every - Optional number of market revaluations
+            between checks of the running totals against totals
+            calculated "from scratch" (see reconcile).
+        positions - Optional empty store of Positions by ticker,
+            e.g. a PositionBook, rather than a dictionary.
         """
         self.price_handler = price_handler
         self.init_cash = cash
         self.cur_cash = cash
-        self.positions = {}
+        self.positions = {} if positions is None else positions
+        self.entry_times = {}
+        self.round_trips = RoundTripLedger()
+        self.reconcile_every = reconcile_every
+        self.revaluations = 0
+        self.dirty = self._register_dirty_set()
+        self._get_parsed_bid_ask = getattr(
+            price_handler, "get_parsed_bid_ask", None
+        )
         self._reset_values()
 
+    def __getstate__(self):
+        # The dirty set belongs to the price handler, with
+        # which an unpickled Portfolio registers a new one
+        state = self.__dict__.copy()
+        state["dirty"] = None
+        return state
 
-    def _reset_values(self):
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.dirty = self._register_dirty_set()
+        if self.dirty is not None:
+            self.dirty.update(dict.fromkeys(self.positions))
+
+    def _register_dirty_set(self):
         """
-        This is called after every position addition or
-        modification. It allows the calculations to be
-        carried out "from scratch" in order to minimize
-        errors.
+        Registers a dirty set with the price handler, returning
+        None for a price handler that does not support them, in
+        which case every Position is revalued on every update.
+        """
+        register = getattr(self.price_handler, "register_dirty_set", None)
+        if register is None:
+            return None
+        return register()
+
+    @property
+    def equity(self):
+        self._revalue_dirty()
+        return self._equity
+
+    @equity.setter
+    def equity(self, value):
+        self._equity = value
+
+    @property
+    def unrealized_pnl(self):
+        self._revalue_dirty()
+        return self._unrealized_pnl
+
+    @unrealized_pnl.setter
+    def unrealized_pnl(self, value):
+        self._unrealized_pnl = value
+
+    @property
+    def realized_pnl(self):
+        self._revalue_dirty()
+        return self._realized_pnl
+
+    @realized_pnl.setter
+    def realized_pnl(self, value):
+        self._realized_pnl = value
 
-        All cash is reset to the inital values and the
-        PnL is set to zero.
+
+    def _reset_values(self):
+        """
+        Resets all cash to the inital value and the PnL to
+        zero, so that the values can be calculated "from
+        scratch" by _update_portfolio.
         """
         self.cur_cash = self.init_cash
-        self.equity = self.cur_cash
-        self.unrealized_pnl = 0.0
-        self.realized_pnl = 0.0
+        self._equity = self.cur_cash
+        self._unrealized_pnl = 0
+        self._realized_pnl = 0
 
     def _update_portfolio(self):
         """
         Updates the Portfolio total values (cash, equity,
-        unrealized PnL, realized PnL, cost basis, etc.) based
-        on all of the current ticker values.
+        unrealized PnL, realized PnL) based on all of the
+        current ticker values and the round trips of the
+        closed Positions, after _reset_values.
+        """
+        closed_pnl = self.round_trips.total_pnl()
+        self.cur_cash += closed_pnl
+        self._equity += closed_pnl
+        self._realized_pnl += closed_pnl
+        for pt in self.positions.values():
+            self._add_position_values(pt)
 
-        This method is called after every Position modification.
+    def _add_position_values(self, pt):
         """
-        for ticker in self.positions:
-            pt = self.positions[ticker]
-            self.unrealized_pnl += pt.unrealized_pnl
-            self.realized_pnl += pt.realized_pnl
-            self.cur_cash -= pt.cost_basis
-            pnl_diff = pt.realized_pnl - pt.unrealized_pnl
-            self.cur_cash += pnl_diff # why is it not += pt.realized_pnl
-            self.equity += (
-                pt.market_value - pt.cost_basis + pnl_diff
+        Adds the contribution of a Position to the Portfolio
+        totals. Its cash contribution is its net total of sales
+        less purchases and commission, and its contribution to
+        the equity is that plus its market value, i.e. its
+        realized PnL.
+        """
+        self._unrealized_pnl += pt.unrealized_pnl
+        self._realized_pnl += pt.realized_pnl
+        self.cur_cash += pt.net_incl_comm
+        self._equity += pt.market_value + pt.net_incl_comm
+
+    def _remove_position_values(self, pt):
+        """
+        Removes the contribution of a Position to the Portfolio
+        totals, before the Position is modified or revalued.
+        """
+        self._unrealized_pnl -= pt.unrealized_pnl
+        self._realized_pnl -= pt.realized_pnl
+        self.cur_cash -= pt.net_incl_comm
+        self._equity -= pt.market_value + pt.net_incl_comm
+
+    def _latest_bid_ask(self, ticker):
+        """
+        Returns the latest bid and ask of a ticker, which are
+        both the latest close for a bar price handler, parsed
+        by PriceParser (once, as they were stored, by a price
+        handler supporting get_parsed_bid_ask).
+        """
+        get_parsed_bid_ask = self._get_parsed_bid_ask
+        if get_parsed_bid_ask is not None:
+            return get_parsed_bid_ask(ticker)
+        if self.price_handler.istick():
+            bid, ask = self.price_handler.get_best_bid_ask(ticker)
+            return PriceParser.parse(bid), PriceParser.parse(ask)
+        elif self.price_handler.isbar(): # does this make sense?
+            bid = PriceParser.parse(self.price_handler.get_last_close(ticker))
+            ask = bid
+        return bid, ask
+
+    def update_market_value(self, ticker):
+        """
+        Revalues the Position in a ticker at the latest prices
+        from the price handler, adjusting the Portfolio totals
+        by the change in its value.
+        """
+        pt = self.positions[ticker]
+        bid, ask = self._latest_bid_ask(ticker)
+        self._remove_position_values(pt)
+        pt.update_market_value(bid, ask)
+        self._add_position_values(pt)
+
+    def _revalue_dirty(self):
+        """
+        Revalues the Positions in the tickers whose prices have
+        changed since they were last revalued.
+        """
+        dirty = self.dirty
+        if dirty:
+            positions = self.positions
+            self._revalue([ticker for ticker in dirty if ticker in positions])
+            dirty.clear()
+
+    def _revalue(self, tickers):
+        """
+        Revalues the Positions in a list of tickers, in a single
+        vectorized pass if the Positions are held in a book.
+        """
+        positions = self.positions
+        if not isinstance(positions, PositionBook):
+            for ticker in tickers:
+                self.update_market_value(ticker)
+            return
+        if not tickers:
+            return
+        price_handler = self.price_handler
+        get_parsed_bid_ask = self._get_parsed_bid_ask
+        if get_parsed_bid_ask is not None:
+            bid_asks = [get_parsed_bid_ask(t) for t in tickers]
+            bids = np.array([bid for bid, _ in bid_asks], dtype=np.int64)
+            asks = np.array([ask for _, ask in bid_asks], dtype=np.int64)
+        elif price_handler.istick():
+            bid_asks = [price_handler.get_best_bid_ask(t) for t in tickers]
+            bids = PriceParser.parse_array([bid for bid, _ in bid_asks])
+            asks = PriceParser.parse_array([ask for _, ask in bid_asks])
+        else:
+            get_last_close = price_handler.get_last_close
+            bids = asks = PriceParser.parse_array(
+                [get_last_close(ticker) for ticker in tickers]
             )
+        d_unrealized, d_realized, d_market_value = positions.revalue(
+            bids, asks, positions.index_of(tickers)
+        )
+        self._unrealized_pnl += d_unrealized
+        self._realized_pnl += d_realized
+        self._equity += d_market_value
+
+    def update_market_values(self):
+        """
+        Revalues the Positions whose prices have changed (or
+        every Position, if the price handler does not support
+        dirty sets) at the latest prices from the price handler,
+        reconciling the Portfolio totals every reconcile_every
+        calls if it is set.
+        """
+        if self.dirty is None:
+            self._revalue(list(self.positions))
+        else:
+            self._revalue_dirty()
+        self.revaluations += 1
+        if (
+            self.reconcile_every and
+            self.revaluations % self.reconcile_every == 0
+        ):
+            self.reconcile()
+
+    def reconcile(self, tolerance=0):
+        """
+        Revalues every Position at the latest prices and then
+        recalculates the Portfolio totals "from scratch," for
+        debugging the running totals and the dirty set.
+
+        Any total differing from its running value by more than
+        the tolerance is printed, where the totals, being exact
+        integers, should not differ at all. The running totals
+        are then replaced by those recalculated, and True is
+        returned if they agreed.
+        """
+        running = (
+            ("cur_cash", self.cur_cash), ("equity", self.equity),
+            ("unrealized_pnl", self.unrealized_pnl),
+            ("realized_pnl", self.realized_pnl),
+        )
+        for ticker, pt in self.positions.items():
+            bid, ask = self._latest_bid_ask(ticker)
+            pt.update_market_value(bid, ask)
+        self._reset_values()
+        self._update_portfolio()
+        agreed = True
+        for name, value in running:
+            if abs(getattr(self, name) - value) > tolerance:
+                print(
+                    "Portfolio {} of {} does not reconcile with "
+                    "{} recalculated.".format(name, value, getattr(self, name))
+                )
+                agreed = False
+        return agreed
 
     def _add_position(
         self, action, ticker,
-        quantity, price, commission
+        quantity, price, commission, timestamp=None
     ):
         """
         Adds a new Position object to the Portfolio. This
@@ -63,23 +294,18 @@ class Portfolio(object):
         price handler in order to calculate a reasonable
         "market value."
 
-        Once the Position is added, the Portfolio values
-        are updated.
+        Once the Position is added, its values are added
+        to the Portfolio totals.
         """
-        self._reset_values()
         if ticker not in self.positions:
-            if self.price_handler.istick():
-                bid, ask = self.price_handler.get_best_bid_ask(ticker)
-            elif self.price_handler.isbar(): # does this make sense?
-                bid = self.price_handler.get_last_close(ticker)
-                ask = bid
-
+            bid, ask = self._latest_bid_ask(ticker)
             position = Position(
                 action, ticker, quantity,
                 price, commission, bid, ask
             )
             self.positions[ticker] = position
-            self._update_portfolio()
+            self.entry_times[ticker] = timestamp
+            self._add_position_values(position)
         else:
             print(
                 "Ticker {} is already in the positions list."\
@@ -88,38 +314,48 @@ class Portfolio(object):
 
     def _modify_position(
         self, action, ticker,
-        quantity, price, commission
+        quantity, price, commission, timestamp=None
     ):
         """
         Modifies a current Position object to the Portfolio.
         This requries getting the best bid/ask price from the
         price handler in order to calculate a reasonable
         "market value."
+
+        A Position closed by the modification is archived.
         """
-        self._reset_values()
         if ticker in self.positions:
-            self.positions[ticker].transact_shares(
-                action, quantity, price, commission
-            )
-
-            if self.price_handler.istick():
-                bid, ask = self.price_handler.get_best_bid_ask(ticker)
-            elif self.price_handler.isbar(): # does this make sense?
-                bid = self.price_handler.get_last_close(ticker)
-                ask = bid
+            pt = self.positions[ticker]
+            self._remove_position_values(pt)
+            pt.transact_shares(action, quantity, price, commission)
 
-            #bid, ask = self.price_handler.get_best_bid_ask(ticker)
-            self.positions[ticker].update_market_value(bid, ask)
-            self._update_portfolio()
+            bid, ask = self._latest_bid_ask(ticker)
+            pt.update_market_value(bid, ask)
+            self._add_position_values(pt)
+            if pt.quantity == 0:
+                self._archive_position(ticker, timestamp)
         else:
             print(
                 "Ticker {} not in the current position list."\
                 "Could not modify a current position.".format(ticker)
             )
 
+    def _archive_position(self, ticker, timestamp=None):
+        """
+        Moves a closed Position out of the positions into the
+        round_trips ledger. Having no market value, its realized
+        PnL is its net total including commission, which remains
+        in the Portfolio totals.
+        """
+        self.round_trips.append(
+            self.positions[ticker], self.entry_times.pop(ticker, None),
+            timestamp
+        )
+        del self.positions[ticker]
+
     def transact_position(
         self, action, ticker,
-        quantity, price, commission
+        quantity, price, commission, timestamp=None
     ):
         """
         Handles any new position or modification to
@@ -128,14 +364,17 @@ class Portfolio(object):
 
         Hence, this single method will be called by the
         Portfoliohandler to update the Portfolio itself.
+
+        The optional timestamp of the transaction is recorded
+        as the entry or exit time of a round trip.
         """
         if ticker not in self.positions:
             self._add_position(
                 action, ticker, quantity,
-                price, commission
+                price, commission, timestamp
             )
         else:
             self._modify_position(
                 action, ticker, quantity,
-                price, commission
+                price, commission, timestamp
             )
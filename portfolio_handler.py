@@ -1,10 +1,12 @@
 from event import OrderEvent
 from portfolio import Portfolio
+from position_book import PositionBook
 
 class PortfolioHandler(object):
     def __init__(
         self, initial_cash, events_queue,
-        price_handler, position_sizer, risk_manager
+        price_handler, position_sizer, risk_manager,
+        position_book=False
     ):
         """
         The PortfolioHandler is designed to interact with the
@@ -14,7 +16,8 @@ class PortfolioHandler(object):
         objects are dealt with.
 
         Each PortfolioHandler contains a Portfolio object,
-        which stores the actual Position objects.
+        which stores the actual Position objects. The
+        initial_cash is parsed by PriceParser.
 
         The PortfolioHandler takes a handle to a PositionSizer
         object which determines a mechanism, based on the current
@@ -23,13 +26,20 @@ class PortfolioHandler(object):
         The PortfolioHandler also takes a handle to the
         RiskManager, which is used to modify any generated
         Orders to remain in line with risk parameters.
+
+        If position_book is True, the Portfolio holds its
+        Positions in an array-backed PositionBook, which
+        revalues large books faster.
         """
         self.initial_cash = initial_cash
         self.events_queue = events_queue
         self.price_handler = price_handler
         self.position_sizer = position_sizer
         self.risk_manager = risk_manager
-        self.portfolio = Portfolio(price_handler, initial_cash)
+        self.portfolio = Portfolio(
+            price_handler, initial_cash,
+            positions=PositionBook() if position_book else None
+        )
 
 
     def _create_order_from_signal(self, signal_event):
@@ -73,11 +83,12 @@ class PortfolioHandler(object):
         quantity = fill_event.quantity
         price = fill_event.price
         commission = fill_event.commission
+        timestamp = fill_event.timestamp
 
         # Create or modify the position from the fill info
         self.portfolio.transact_position(
             action, ticker, quantity,
-            price, commission
+            price, commission, timestamp
         )
 
     def on_signal(self, signal_event):
@@ -125,4 +136,4 @@ class PortfolioHandler(object):
         Update the portfolio to reflect the current market value as based
         on last bid/ask of each ticker.
         """
-        self.portfolio._update_portfolio()
+        self.portfolio.update_market_values()
@@ -1,4 +1,13 @@
 class Position(object):
+    """
+    A Position in a ticker, with every price, cash amount and
+    PnL held as a fixed-point integer (see PriceParser) and the
+    quantities as integers, so that its arithmetic is exact.
+
+    The totals bought and sold are accumulated exactly, and the
+    averages derived from them are rounded down to the nearest
+    unit of the PriceParser multiplier.
+    """
     def __init__(
         self, action, ticker, init_quantity,
         init_price, init_commission,
@@ -18,15 +27,15 @@ class Position(object):
         self.init_price = init_price
         self.init_commission = init_commission
 
-        self.realized_pnl = 0.0
-        self.unrealized_pnl = 0.0
+        self.realized_pnl = 0
+        self.unrealized_pnl = 0
 
         self.buys = 0
         self.sells = 0
-        self.avg_bot = 0.0
-        self.avg_sld = 0.0
-        self.total_bot = 0.0
-        self.total_sld = 0.0
+        self.avg_bot = 0
+        self.avg_sld = 0
+        self.total_bot = 0
+        self.total_sld = 0
         self.total_commission = init_commission
 
         self._calculate_initial_value()
@@ -43,18 +52,20 @@ class Position(object):
 
         if self.action == "BOT":
             self.buys = self.quantity
+            self.total_bot = self.init_price * self.quantity
             self.avg_bot = self.init_price
-            self.total_bot = self.buys * self.avg_bot
 
-            self.avg_price = (self.init_price * self.quantity + self.init_commission)/self.quantity
+            self.avg_price = (self.init_price * self.quantity + self.init_commission) // self.quantity
             self.cost_basis = self.quantity * self.avg_price
         else: # action == "SLD"
             self.sells = self.quantity
+            self.total_sld = self.init_price * self.quantity
             self.avg_sld = self.init_price
-            self.total_sld = self.sells * self.avg_sld
-            self.avg_price = (self.init_price * self.quantity - self.init_commission)/self.quantity
+            self.avg_price = (self.init_price * self.quantity - self.init_commission) // self.quantity
             self.cost_basis = -self.quantity * self.avg_price
         self.net = self.buys - self.sells
+        # A short position holds a negative quantity
+        self.quantity = self.net
         self.net_total = self.total_sld - self.total_bot
         self.net_incl_comm = self.net_total - self.init_commission
 
@@ -70,7 +81,7 @@ class Position(object):
         allows calculation of the unrealized and realized profit
         and loss of any transactions.
         """
-        midpoint = (bid+ask) / 2.0
+        midpoint = (bid + ask) // 2
         self.market_value = self.quantity * midpoint
         self.unrealized_pnl = self.market_value - self.cost_basis
         self.realized_pnl = self.market_value + self.net_incl_comm
@@ -90,24 +101,25 @@ class Position(object):
 
         self.total_commission += commission
 
-        # Adjust total bought and sold
+        # Adjust total bought and sold, from which the
+        # averages are derived
         if action == "BOT":
-            self.avg_bot = (self.avg_bot*self.buys + price*quantity)/(self.buys + quantity)
             if self.action != "SLD":
                 self.avg_price = (
                         self.avg_price * self.buys +
                         price*quantity + commission
-                    )/(self.buys + quantity)
+                    ) // (self.buys + quantity)
             self.buys += quantity
-            self.total_bot = self.buys * self.avg_bot
+            self.total_bot += price * quantity
+            self.avg_bot = self.total_bot // self.buys
 
         # action == "SLD"
         else:
-            self.avg_sld = (self.avg_sld*self.sells + price*quantity)/(self.sells + quantity)
             if self.action != "BOT":
-                self.avg_price = (self.avg_price * self.sells + price*quantity-commission)/(self.sells + quantity)
+                self.avg_price = (self.avg_price * self.sells + price*quantity-commission) // (self.sells + quantity)
             self.sells += quantity
-            self.total_sld = self.sells * self.avg_sld
+            self.total_sld += price * quantity
+            self.avg_sld = self.total_sld // self.sells
 
         # Adjust net values, including commissions
         self.net = self.buys - self.sells
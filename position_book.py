@@ -0,0 +1,237 @@
+import numpy as np
+
+from position import Position
+
+
+# The numeric attributes of a Position, each of which is
+# held by a PositionBook in an array indexed by ticker id
+POSITION_FIELDS = (
+    "quantity", "init_price", "init_commission",
+    "realized_pnl", "unrealized_pnl",
+    "buys", "sells", "avg_bot", "avg_sld",
+    "total_bot", "total_sld", "total_commission",
+    "avg_price", "cost_basis", "net", "net_total",
+    "net_incl_comm", "market_value",
+)
+
+
+# Float64 magnitudes below which an int64 value, and an int64
+# sum, are certain not to overflow despite the float64 rounding
+INT64_SAFE_VALUE = 2.0 ** 63 * (1.0 - 2.0 ** -20)
+INT64_SAFE_SUM = 2.0 ** 62
+
+
+def _exact_sum(values):
+    """
+    Returns the sum of an int64 array as a Python int. The int64
+    sum wraps around modulo 2**64, so it is exact whenever the
+    total itself fits, as checked with a float64 estimate, and
+    otherwise the values are summed as Python ints.
+    """
+    if abs(values.sum(dtype=np.float64)) < INT64_SAFE_SUM:
+        return int(values.sum())
+    return sum(values.tolist())
+
+
+def _array_property(name):
+    def get(self):
+        return self.book.columns[name][self.index].item()
+
+    def set(self, value):
+        self.book.columns[name][self.index] = value
+    return property(get, set)
+
+
+class PositionView(Position):
+    """
+    PositionView is a Position whose numeric attributes are
+    read from, and written to, the arrays of a PositionBook.
+
+    It inherits every method of Position, so a transaction or
+    revaluation of a single position carries out exactly the
+    same arithmetic as it would on a Position.
+    """
+    def __init__(self, book, index):
+        self.book = book
+        self.index = index
+
+    @property
+    def ticker(self):
+        return self.book.tickers[self.index]
+
+    @property
+    def action(self):
+        return self.book.actions[self.index]
+
+
+for _name in POSITION_FIELDS:
+    setattr(PositionView, _name, _array_property(_name))
+
+
+class PositionBook(object):
+    """
+    PositionBook is an alternative to the dictionary of ticker
+    symbol to Position held by a Portfolio, which keeps the
+    numeric attributes of every position in parallel int64
+    NumPy arrays indexed by ticker id, in the order in which
+    the positions were opened. The prices and amounts are
+    fixed-point integers, as parsed by PriceParser.
+
+    It behaves as a dictionary of ticker symbol to PositionView
+    so that the Portfolio, and the components that read its
+    positions, work unchanged, while revalue marks many (or
+    all) of the positions to market in one vectorized pass.
+    """
+    def __init__(self, capacity=64):
+        """
+        Parameters:
+        capacity - The initial number of positions for which
+            the arrays have room, doubled whenever it is reached.
+        """
+        self.tickers = []
+        self.actions = []
+        self.ids = {}
+        self.views = []
+        self.columns = dict(
+            (name, np.zeros(capacity, dtype=np.int64))
+            for name in POSITION_FIELDS
+        )
+
+    def __len__(self):
+        return len(self.tickers)
+
+    def __contains__(self, ticker):
+        return ticker in self.ids
+
+    def __iter__(self):
+        return iter(self.tickers)
+
+    def __getitem__(self, ticker):
+        return self.views[self.ids[ticker]]
+
+    def __setitem__(self, ticker, position):
+        """
+        Copies a newly opened Position into the book.
+        """
+        if ticker in self.ids:
+            raise ValueError(
+                "Ticker {} is already in the position book.".format(ticker)
+            )
+        index = len(self.tickers)
+        if index == len(self.columns["quantity"]):
+            for name, column in self.columns.items():
+                self.columns[name] = np.concatenate(
+                    [column, np.zeros_like(column)]
+                )
+        self.ids[ticker] = index
+        self.tickers.append(ticker)
+        self.actions.append(position.action)
+        for name in POSITION_FIELDS:
+            self.columns[name][index] = getattr(position, name)
+        self.views.append(PositionView(self, index))
+
+    def __delitem__(self, ticker):
+        """
+        Removes a closed position from the book, moving the
+        last position into its ticker id, so that the order of
+        the remaining positions is not preserved.
+        """
+        index = self.ids.pop(ticker)
+        last = len(self.tickers) - 1
+        if index != last:
+            for column in self.columns.values():
+                column[index] = column[last]
+            self.tickers[index] = self.tickers[last]
+            self.actions[index] = self.actions[last]
+            self.views[index] = self.views[last]
+            self.views[index].index = index
+            self.ids[self.tickers[index]] = index
+        self.tickers.pop()
+        self.actions.pop()
+        self.views.pop()
+
+    def get(self, ticker, default=None):
+        if ticker in self.ids:
+            return self[ticker]
+        return default
+
+    def keys(self):
+        return list(self.tickers)
+
+    def values(self):
+        return list(self.views)
+
+    def items(self):
+        return list(zip(self.tickers, self.views))
+
+    def column(self, name):
+        """
+        Returns a read-only view of the values of an attribute
+        for every position, ordered by ticker id.
+        """
+        values = self.columns[name][:len(self.tickers)]
+        values.flags.writeable = False
+        return values
+
+    def index_of(self, tickers):
+        """
+        Returns the array of ticker ids of a list of tickers,
+        which must all be in the book.
+        """
+        ids = self.ids
+        return np.fromiter(
+            (ids[ticker] for ticker in tickers), dtype=np.intp,
+            count=len(tickers)
+        )
+
+    def revalue(self, bids, asks, index=None):
+        """
+        Revalues the positions at the given ticker ids (every
+        position, if index is None) at the mid-price of the
+        parsed bid and ask arrays, aligned with index, as does
+        Position.update_market_value.
+
+        Returns the changes in the total unrealized PnL, realized
+        PnL and market value of the positions, as Python ints.
+
+        Raises an OverflowError, leaving the positions unchanged,
+        if a revalued position no longer fits the int64 columns,
+        i.e. is worth more than about $9.2e11 at the PriceParser
+        scale. The totals are exact, however large.
+        """
+        if index is None:
+            index = slice(0, len(self.tickers))
+        columns = self.columns
+        quantity = columns["quantity"][index]
+        cost_basis = columns["cost_basis"][index]
+        net_incl_comm = columns["net_incl_comm"][index]
+        midpoint = (
+            np.asarray(bids, dtype=np.int64) +
+            np.asarray(asks, dtype=np.int64)
+        ) // 2
+
+        estimate = quantity.astype(np.float64) * midpoint
+        if len(estimate) > 0 and max(
+            np.abs(estimate).max(),
+            np.abs(estimate - cost_basis).max(),
+            np.abs(estimate + net_incl_comm).max()
+        ) >= INT64_SAFE_VALUE:
+            raise OverflowError(
+                "A revalued position is too large for the int64 "\
+                "columns of the PositionBook."
+            )
+
+        old_unrealized = _exact_sum(columns["unrealized_pnl"][index])
+        old_realized = _exact_sum(columns["realized_pnl"][index])
+        old_market_value = _exact_sum(columns["market_value"][index])
+        market_value = quantity * midpoint
+        unrealized_pnl = market_value - cost_basis
+        realized_pnl = market_value + net_incl_comm
+        columns["market_value"][index] = market_value
+        columns["unrealized_pnl"][index] = unrealized_pnl
+        columns["realized_pnl"][index] = realized_pnl
+        return (
+            _exact_sum(unrealized_pnl) - old_unrealized,
+            _exact_sum(realized_pnl) - old_realized,
+            _exact_sum(market_value) - old_market_value,
+        )
@@ -1,10 +1,13 @@
 import datetime
 import os
+import numpy as np
 import pandas as pd
 
 from abc import ABCMeta, abstractmethod
 
-from event import TickEvent, BarEvent
+from event import TickEvent, BarEvent, BarSnapshotEvent
+from bar_history import BarRingBuffer, HISTORY_FIELDS
+from price_parser import PriceParser
 
 import quandl
 
@@ -26,6 +29,80 @@ class AbstractPriceHandler(object):
 
     __metaclass__ = ABCMeta
 
+    # The attribute holding the merged stream of a historic
+    # handler, and the attributes saved in a checkpoint
+    stream_attr = None
+    checkpoint_attrs = ("tickers", "continue_backtest")
+
+    # The dirty sets registered by the consumers of the prices
+    dirty_sets = ()
+
+    def register_dirty_set(self):
+        """
+        Returns a new dirty set, to which every ticker whose
+        price is subsequently stored is added, so that e.g. a
+        Portfolio need only revalue the positions in tickers
+        whose prices have changed. The consumer removes the
+        tickers that it has handled.
+
+        A dirty set is an insertion-ordered dictionary of ticker
+        to None, rather than a set, so that it is iterated in
+        a deterministic order.
+        """
+        dirty = {}
+        self.dirty_sets = self.dirty_sets + (dirty,)
+        return dirty
+
+    def unregister_dirty_set(self, dirty):
+        """
+        Stops adding tickers to a dirty set returned by
+        register_dirty_set, e.g. once its consumer is replaced.
+        """
+        self.dirty_sets = tuple(
+            registered for registered in self.dirty_sets
+            if registered is not dirty
+        )
+
+    def get_checkpoint_state(self):
+        """
+        Returns the state from which a freshly created, but
+        otherwise identical, historic price handler can resume
+        streaming, i.e. the number of rows already streamed, the
+        position of each ticker within its source and the latest
+        prices of each ticker.
+        """
+        stream = getattr(self, self.stream_attr)
+        state = dict(
+            (attr, getattr(self, attr)) for attr in self.checkpoint_attrs
+        )
+        state["cursor"] = stream.cursor
+        state["resume"] = stream.get_resume_state()
+        return state
+
+    def restore_checkpoint_state(self, state):
+        """
+        Restores the state returned by get_checkpoint_state,
+        recreating the stream from the saved position of each
+        ticker, so that the rows already streamed are not read
+        again. Where a source cannot seek, the rows already
+        streamed are skipped instead, which reads and parses
+        them again (see MergedBarStream.skip).
+        """
+        stream = getattr(self, self.stream_attr)
+        if stream.cursor != 0:
+            raise ValueError(
+                "Cannot restore the {} as it has already "\
+                "streamed.".format(self.__class__.__name__)
+            )
+        if state["resume"] is not None:
+            stream = self._merge_sort_ticker_data(state["resume"])
+            stream.cursor = state["cursor"]
+            setattr(self, self.stream_attr, stream)
+        else:
+            stream.skip(state["cursor"])
+        for attr in self.checkpoint_attrs:
+            setattr(self, attr, state[attr])
+
     def unsubscribe_ticker(self, ticker):
         """
         Unsubscribes the handler from a current ticker symbol.
@@ -58,6 +135,8 @@ class AbstractPriceHandler(object):
 
 
 class AbstractTickPriceHandler(AbstractPriceHandler):
+    stream_attr = "tick_stream"
+
     def istick(self):
         return True
 
@@ -66,12 +145,23 @@ class AbstractTickPriceHandler(AbstractPriceHandler):
 
     def _store_event(self, event):
         """
-        Store price event for bid/ask
+        Store price event for bid/ask, also parsed by PriceParser.
+        A tick with a NaN bid or ask is skipped, leaving the
+        previous prices in place.
         """
         ticker = event.ticker
-        self.tickers[ticker]["bid"] = event.bid
-        self.tickers[ticker]["ask"] = event.ask
-        self.tickers[ticker]["timestamp"] = event.time
+        bid = event.bid
+        ask = event.ask
+        if bid != bid or ask != ask:
+            return
+        ticker_prices = self.tickers[ticker]
+        ticker_prices["bid"] = bid
+        ticker_prices["ask"] = ask
+        ticker_prices["parsed_bid"] = PriceParser.parse(bid)
+        ticker_prices["parsed_ask"] = PriceParser.parse(ask)
+        ticker_prices["timestamp"] = event.time
+        for dirty in self.dirty_sets:
+            dirty[ticker] = None
 
     def get_best_bid_ask(self, ticker):
         """
@@ -88,8 +178,32 @@ class AbstractTickPriceHandler(AbstractPriceHandler):
             )
             return None, None
 
+    def get_parsed_bid_ask(self, ticker):
+        """
+        Returns the most recent bid/ask price for a ticker, as
+        parsed by PriceParser when the tick was stored.
+        """
+        ticker_prices = self.tickers[ticker]
+        return ticker_prices["parsed_bid"], ticker_prices["parsed_ask"]
+
 
 class AbstractBarPriceHandler(AbstractPriceHandler):
+    # The time period covered by each bar in seconds,
+    # which defaults to one day
+    period = 86400
+
+    # If True, stream_next emits a single BarSnapshotEvent for
+    # all of the tickers that printed at the next timestamp
+    # rather than one BarEvent per ticker
+    snapshot = False
+
+    # The number of bars of history kept per ticker for
+    # get_latest_bars, where zero disables the history
+    lookback = 0
+
+    stream_attr = "bar_stream"
+    checkpoint_attrs = ("tickers", "continue_backtest", "bar_history")
+
     def istick(self):
         return False
 
@@ -98,12 +212,111 @@ class AbstractBarPriceHandler(AbstractPriceHandler):
 
     def _store_event(self, event):
         """
-        Store price event for closing price and adjusted closing price.
+        Store price event for closing price and adjusted closing price,
+        with the closing price also parsed by PriceParser.
+
+        A bar with a NaN closing price, e.g. a missing Quandl
+        close, is skipped, leaving the previous prices in place,
+        although it is still appended to the bar history.
         """
         ticker = event.ticker
-        self.tickers[ticker]["close"] = event.close_price
-        self.tickers[ticker]["adj_close"] = event.adj_close_price
-        self.tickers[ticker]["timestamp"] = event.time
+        close_price = event.close_price
+        if self.lookback > 0:
+            self._store_history(ticker, (
+                event.open_price, event.high_price, event.low_price,
+                close_price, event.volume, event.adj_close_price
+            ))
+        if close_price != close_price:
+            return
+        ticker_prices = self.tickers[ticker]
+        ticker_prices["close"] = close_price
+        ticker_prices["parsed_close"] = PriceParser.parse(close_price)
+        ticker_prices["adj_close"] = event.adj_close_price
+        ticker_prices["timestamp"] = event.time
+        for dirty in self.dirty_sets:
+            dirty[ticker] = None
+
+    def _store_snapshot(self, event):
+        """
+        Store closing price and adjusted closing price for
+        every ticker within a snapshot event, parsing the closing
+        prices at once and skipping the NaN ones as _store_event.
+        """
+        close_prices = event.close_prices
+        valid = ~np.isnan(close_prices)
+        parsed_closes = PriceParser.parse_array(
+            np.where(valid, close_prices, 0.0)
+        ).tolist()
+        adj_close_prices = event.adj_close_prices.tolist()
+        stored = []
+        for i, (ticker, close_price, is_valid) in enumerate(zip(
+            event.tickers, close_prices.tolist(), valid.tolist()
+        )):
+            adj_close_price = adj_close_prices[i]
+            if self.lookback > 0:
+                self._store_history(ticker, (
+                    event.open_prices[i], event.high_prices[i],
+                    event.low_prices[i], close_price,
+                    event.volumes[i], adj_close_price
+                ))
+            if not is_valid:
+                continue
+            ticker_prices = self.tickers[ticker]
+            ticker_prices["close"] = close_price
+            ticker_prices["parsed_close"] = parsed_closes[i]
+            ticker_prices["adj_close"] = adj_close_price
+            ticker_prices["timestamp"] = event.time
+            stored.append(ticker)
+        if self.dirty_sets:
+            tickers = dict.fromkeys(stored)
+            for dirty in self.dirty_sets:
+                dirty.update(tickers)
+
+    def _store_history(self, ticker, values):
+        """
+        Append the values of a bar, ordered as HISTORY_FIELDS,
+        to the fixed-capacity history of the ticker.
+        """
+        if ticker not in self.bar_history:
+            self.bar_history[ticker] = BarRingBuffer(self.lookback)
+        self.bar_history[ticker].append(values)
+
+    def get_latest_bars(self, ticker, n=1, fields=None):
+        """
+        Returns the latest n bars of a ticker (or fewer, if fewer
+        have been streamed), oldest first, as read-only zero-copy
+        NumPy views. At most lookback bars are available.
+
+        Parameters:
+        ticker - The ticker symbol, e.g. "GOOG".
+        n - The number of bars to return.
+        fields - A single field name, e.g. "close", for which an
+            array is returned, or a list of field names (by default
+            all of HISTORY_FIELDS) for which a dictionary of field
+            name to array is returned.
+        """
+        if self.lookback <= 0:
+            print(
+                "Bar history is not available as the lookback "\
+                "of the {} is zero.".format(self.__class__.__name__)
+            )
+            return None
+        if ticker not in self.tickers:
+            print(
+                "Latest bars for ticker {} are not "\
+                "available from the {}.".format(
+                    ticker, self.__class__.__name__
+                )
+            )
+            return None
+        history = self.bar_history.get(ticker)
+        if history is None:
+            history = BarRingBuffer(self.lookback)
+        if fields is None:
+            fields = HISTORY_FIELDS
+        if isinstance(fields, str):
+            return history.latest(n, fields)
+        return dict((field, history.latest(n, field)) for field in fields)
 
     def get_last_close(self, ticker):
         """
@@ -119,6 +332,80 @@ class AbstractBarPriceHandler(AbstractPriceHandler):
             )
             return None
 
+    def get_parsed_bid_ask(self, ticker):
+        """
+        Returns the most recent closing price for a ticker, as
+        parsed by PriceParser when the bar was stored, as both
+        the bid and the ask.
+        """
+        close_price = self.tickers[ticker]["parsed_close"]
+        return close_price, close_price
+
+    def _create_event(self, index, period, ticker, row):
+        """
+        Obtain all elements of the bar from a row of the bar
+        stream and return a BarEvent.
+        """
+        (
+            open_price, high_price, low_price,
+            close_price, volume, adj_close_price
+        ) = row[2:]
+
+        volume = int(volume)
+        bev = BarEvent(
+            ticker, index, period, open_price,
+            high_price, low_price, close_price,
+            volume, adj_close_price
+        )
+        return bev
+
+    def _create_snapshot(self):
+        """
+        Obtain the bars of every ticker sharing the next timestamp
+        from the bar stream and return a BarSnapshotEvent, or None
+        if the stream is exhausted.
+        """
+        ns = self.bar_stream.peek_time()
+        if ns is None:
+            return None
+        rows = []
+        while self.bar_stream.peek_time() == ns:
+            rows.append(next(self.bar_stream))
+        values = np.array([row[2:] for row in rows], dtype=np.float64)
+        return BarSnapshotEvent(
+            rows[0][0], self.period, [row[1] for row in rows],
+            values[:, 0], values[:, 1], values[:, 2],
+            values[:, 3], values[:, 4], values[:, 5]
+        )
+
+    def stream_next(self):
+        """
+        Place the next BarEvent (or BarSnapshotEvent, in
+        snapshot mode) onto the event queue.
+        """
+        if self.snapshot:
+            sev = self._create_snapshot()
+            if sev is None:
+                self.continue_backtest = False
+                return
+            self._store_snapshot(sev)
+            self.events_queue.put(sev)
+            return
+        try:
+            row = next(self.bar_stream)
+        except StopIteration:
+            self.continue_backtest = False
+            return
+        # Obtain all elements of the bar from the bar stream
+        index, ticker = row[0], row[1]
+        period = self.period
+        # Create the tick event for the queue
+        bev = self._create_event(index, period, ticker, row)
+        # Store event
+        self._store_event(bev)
+        # Send event to queue
+        self.events_queue.put(bev)
+
 
 
 ## below should be cut into a new file as they are not abstract classes
@@ -127,7 +414,37 @@ import pandas as pd
 import quandl
 
 # from base import AbstractTickPriceHandler
+from functools import partial
+
 from event import BarEvent
+from bar_stream import ColumnarBarStream, window_bounds
+from concurrent_loader import load_concurrently
+
+
+def fetch_quandl_data(ticker, cache=None):
+    """
+    Download the Quandl EOD data for a ticker (or read it from
+    the optional QuandlCache) and return it as a pandas DataFrame
+    in the format used by HistoricQuandlBarPriceHandler.
+
+    This is a module-level function so that it can also be
+    run within a worker process.
+    """
+    quandl.ApiConfig.api_key = 'kvQa8EEFyvB4yeMWuVxQ'
+    if cache is not None:
+        data = cache.get('EOD', ticker)
+    else:
+        data = quandl.get('EOD/{}'.format(ticker))
+    if len(data) == 0:
+        raise ValueError(
+            "No Quandl data is found for pricing {}.".format(ticker)
+        )
+    data = data[["Open", "Low", "High",
+                "Close", "Volume", "Adj_Close"]]
+    data.columns = ['Open', 'Low', 'High',
+                    'Close', 'Volume', "Adj Close"]
+    data["Ticker"] = ticker
+    return data
 
 
 class HistoricQuandlBarPriceHandler(AbstractBarPriceHandler):
@@ -137,166 +454,196 @@ class HistoricQuandlBarPriceHandler(AbstractBarPriceHandler):
     provide an interface to stream the "latest" bar in a manner
     identical to a live trading interface.
     """
+    checkpoint_attrs = AbstractBarPriceHandler.checkpoint_attrs + (
+        "adj_close_return_index",
+    )
+
     def __init__(
         self, events_queue,
         init_tickers=None,
         start_date=None, end_date=None,
-        calc_adj_returns=False
+        calc_adj_returns=False, cache=None,
+        max_workers=4, use_processes=False,
+        snapshot=False, lookback=0
     ):
         """
         Takes the events queue and a possible list of initial
         ticker symbols then creates an (optional) list of
         ticker subscriptions and associated prices.
+
+        An optional QuandlCache can be given in order to avoid
+        downloading the same data on every instantiation.
+
+        The initial tickers are loaded concurrently by up to
+        max_workers threads (or processes, if use_processes is
+        True). Any ticker that fails to load is recorded in
+        subscribe_errors along with its exception.
+
+        If snapshot is True, a single BarSnapshotEvent is emitted
+        for all of the tickers printing at each timestamp.
+
+        If lookback is positive, the latest lookback bars of each
+        ticker are kept and made available by get_latest_bars.
         """
         self.events_queue = events_queue
+        self.snapshot = snapshot
+        self.lookback = lookback
+        self.cache = cache
+        self.max_workers = max_workers
+        self.use_processes = use_processes
         self.continue_backtest = True
         self.tickers = {}
+        self.bar_history = {}
         self.tickers_data = {}
+        self.subscribe_errors = {}
         if init_tickers is not None:
-            for ticker in init_tickers:
-                self.subscribe_ticker(ticker)
+            self.subscribe_tickers(init_tickers)
         self.start_date = start_date
         self.end_date = end_date
         self.bar_stream = self._merge_sort_ticker_data()
         self.calc_adj_returns = calc_adj_returns
-        if self.calc_adj_returns: # what's this?
-            self.adj_close_price = []
+        self.adj_close_returns = {}
+        self.adj_close_return_index = {}
+        if self.calc_adj_returns:
+            self._calc_adj_close_returns()
+
+    def _calc_adj_close_returns(self):
+        """
+        Calculates the adjusted closing price percentage returns
+        of every subscribed ticker at once, with vectorized
+        operations over its full history, and stores the returns
+        of the bars within the [start_date, end_date) window in
+        adj_close_returns, in streaming order.
+
+        The return of the first bar of the window is taken
+        relative to the previous bar of the history, whereas the
+        very first bar of a ticker has no return and is NaN.
+        """
+        for ticker, data in self.tickers_data.items():
+            adj_close = data["Adj Close"].values.astype(np.float64)
+            returns = np.empty(len(adj_close))
+            returns[:1] = np.nan
+            np.divide(adj_close[1:], adj_close[:-1], out=returns[1:])
+            returns[1:] -= 1.0
+            times = data.index.values.astype("datetime64[ns]").view("i8")
+            start, end = window_bounds(times, self.start_date, self.end_date)
+            self.adj_close_returns[ticker] = returns[start:end]
+            self.adj_close_return_index[ticker] = 0
+            self.tickers[ticker]["adj_close_ret"] = np.nan
+
+    def _store_adj_close_return(self, ticker):
+        """
+        Reads the precalculated adjusted closing price return
+        of the latest bar of the ticker.
+        """
+        i = self.adj_close_return_index[ticker]
+        self.tickers[ticker]["adj_close_ret"] = float(
+            self.adj_close_returns[ticker][i]
+        )
+        self.adj_close_return_index[ticker] = i + 1
 
     def _download_quandl_data(self, ticker):
         """
         Download the Quandl data as a pandas DataFrame and
         store it in a dictionary.
         """
-        quandl.ApiConfig.api_key = 'kvQa8EEFyvB4yeMWuVxQ'
-        data = quandl.get('EOD/{}'.format(ticker))
-        data = data[["Open", "Low", "High",
-                    "Close", "Volume", "Adj_Close"]]
-        data.columns = ['Open', 'Low', 'High',
-                        'Close', 'Volume', "Adj Close"]
-        self.tickers_data[ticker] = data
-        self.tickers_data[ticker]["Ticker"] = ticker
+        self.tickers_data[ticker] = fetch_quandl_data(ticker, self.cache)
 
 
-    def _merge_sort_ticker_data(self):
+    def _merge_sort_ticker_data(self, resume=None):
         """
-        Concatenates all of the separate equities DataFrames
-        into a single DataFrame that is time ordered, allowing
-        tick data events to be added to the queue in a
-        chronological fashion.
+        Merges all of the separate (already time ordered)
+        equities DataFrames with a heap of per-ticker cursors,
+        allowing bar events to be added to the queue in a
+        chronological fashion without concatenating and
+        re-sorting the full history, from the positions of an
+        optional resume state.
 
         Note that this is an idealized situation, utilized
         solely for backtesting. In live trading ticks may arrive
         "out of order."
         """
-        df = pd.concat(self.tickers_data.values()).sort_index()
-        start = None
-        end = None
-        if self.start_date is not None:
-            start = df.index.searchsorted(self.start_date)
-        if self.end_date is not None:
-            end = df.index.searchsorted(self.end_date)
-        # This is added so that the ticker events are
-        # always deterministic, otherwise unit test
-        # values will differ
-        df["colFromIndex"] = df.index
-        df = df.sort_values(by=["colFromIndex", "Ticker"])
-        if start is None and end is None:
-            return df.iterrows()
-        elif start is not None and end is None:
-            return df.iloc[start:].iterrows()
-        elif start is None and end is not None:
-            return df.iloc[:end].iterrows()
-        else:
-            return df.iloc[start:end].iterrows()
+        # Bars are ordered by (timestamp, ticker) so that the
+        # ticker events are always deterministic, otherwise unit
+        # test values will differ
+        return ColumnarBarStream(
+            self.tickers_data, self.start_date, self.end_date,
+            resume=resume
+        )
 
 
-    def subscribe_ticker(self, ticker):
+    def _add_ticker_data(self, ticker, data):
         """
-        Subscribes the price handler to a new ticker symbol.
+        Stores the downloaded DataFrame of a ticker and
+        initialises its prices from the first bar.
         """
-        if ticker not in self.tickers:
-            try:
-                self._download_quandl_data(ticker)
-                dft = self.tickers_data[ticker]
-                row0 = dft.iloc[0]
-
-                close = row0["Close"]
-                adj_close = row0["Adj Close"]
-
-                ticker_prices = {
-                    "close": close,
-                    "adj_close": adj_close,
-                    "timestamp": dft.index[0]
-                }
-                self.tickers[ticker] = ticker_prices
-            except:
+        self.tickers_data[ticker] = data
+        row0 = data.iloc[0]
+
+        close = row0["Close"]
+        adj_close = row0["Adj Close"]
+
+        ticker_prices = {
+            "close": close,
+            "parsed_close": None if close != close else PriceParser.parse(close),
+            "adj_close": adj_close,
+            "timestamp": data.index[0]
+        }
+        self.tickers[ticker] = ticker_prices
+
+    def subscribe_tickers(self, tickers):
+        """
+        Subscribes the price handler to several new ticker
+        symbols, downloading their data concurrently.
+
+        The resulting tickers and tickers_data are always
+        ordered as the tickers given, regardless of the order
+        in which the downloads complete. Tickers that could
+        not be loaded are recorded in subscribe_errors.
+        """
+        new_tickers = []
+        for ticker in tickers:
+            if ticker in self.tickers or ticker in new_tickers:
                 print(
                     "Could not subscribe ticker {} "\
-                    "as no Quandl data is found for pricing.".format(ticker)
+                    "as it is already subscribed".format(ticker)
                 )
+            else:
+                new_tickers.append(ticker)
 
-        else:
-            print(
-                "Could not subscribe ticker {} "\
-                "as it is already subscribed".format(ticker)
-            )
-
+        results, errors = load_concurrently(
+            partial(fetch_quandl_data, cache=self.cache),
+            new_tickers, self.max_workers, self.use_processes
+        )
+        for ticker in new_tickers:
+            if ticker in results:
+                self._add_ticker_data(ticker, results[ticker])
+        self.subscribe_errors.update(errors)
 
-    def _create_event(self, index, period, ticker, row):
+    def subscribe_ticker(self, ticker):
         """
-        Obtain all elements of the bar from a row of DataFrame
-        and return a BarEvent.
+        Subscribes the price handler to a new ticker symbol.
         """
-        open_price = row["Open"]
-        high_price = row["High"]
-        low_price = row["Low"]
-        close_price = row["Close"]
-        adj_close_price = row["Adj Close"]
+        self.subscribe_tickers([ticker])
 
-        volume = int(row["Volume"])
-        bev = BarEvent(
-            ticker, index, period, open_price,
-            high_price, low_price, close_price,
-            volume, adj_close_price
-        )
-        return bev
 
     def _store_event(self, event):
         """
         Store price event for closing price and adjusted closing price.
         """
-        ticker = event.ticker
-        # If the calc_adj_returns flag is True, then calculate
-        # and store the full list of adjusted closing price
-        # percentage returns in a list
-        # TODO: Make this faster
+        # If the calc_adj_returns flag is True, then read the
+        # adjusted closing price percentage return of the bar
+        # from those precalculated for the ticker
         if self.calc_adj_returns:
-            prev_adj_close = self.tickers[ticker]["adj_close"]
-            cur_adj_close = event.adj_close_price
-            self.tickers[ticker][
-                "adj_close_ret"
-            ] = cur_adj_close / prev_adj_close - 1.0
-            self.adj_close_returns.append(self.tickers[ticker]["adj_close_ret"])
-        self.tickers[ticker]["close"] = event.close_price
-        self.tickers[ticker]["adj_close"] = event.adj_close_price
-        self.tickers[ticker]["timestamp"] = event.time
-
+            self._store_adj_close_return(event.ticker)
+        super(HistoricQuandlBarPriceHandler, self)._store_event(event)
 
-    def stream_next(self):
+    def _store_snapshot(self, event):
         """
-        Place the next BarEvent onto the event queue.
+        Store closing price and adjusted closing price for
+        every ticker within a snapshot event.
         """
-        try:
-            index, row = next(self.bar_stream)
-        except StopIteration:
-            self.continue_backtest = False
-            return
-        # Obtain all elements of the bar from the DataFrame
-        ticker = row["Ticker"]
-        period = 86400 # seconds in a day
-        # Create the tick event for the queue
-        bev = self._create_event(index, period, ticker, row)
-        # Store event
-        self._store_event(bev)
-        # Send event to queue
-        self.events_queue.put(bev)
+        if self.calc_adj_returns:
+            for ticker in event.tickers:
+                self._store_adj_close_return(ticker)
+        super(HistoricQuandlBarPriceHandler, self)._store_snapshot(event)
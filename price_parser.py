@@ -0,0 +1,68 @@
+from decimal import Decimal
+
+import numpy as np
+
+
+class PriceParser(object):
+    """
+    PriceParser converts prices and cash amounts to and from the
+    fixed-point integers in which Positions, the Portfolio, the
+    execution handler and the statistics carry out all of their
+    arithmetic, i.e. the amount multiplied by PRICE_MULTIPLIER.
+
+    Integer arithmetic is exact, so that e.g. the cash of a
+    Portfolio is unaffected by the order in which its Positions
+    are summed, and is much cheaper than that of Decimal.
+    Share quantities are plain integers, so the product of a
+    quantity and a parsed price is itself a parsed amount.
+
+    Amounts are parsed where they enter the system, i.e. as
+    prices are taken from a price handler and as the initial
+    cash of a session, and displayed as floats where they
+    leave it, e.g. in the results and the trade log.
+    """
+
+    # Seven decimal places, enough to hold the average of
+    # prices quoted in hundredths of a cent exactly
+    PRICE_MULTIPLIER = 10 ** 7
+
+    @staticmethod
+    def parse(x):
+        """
+        Returns the fixed-point integer of an int, float,
+        string or Decimal amount, rounded to the nearest
+        unit of the multiplier. A NaN amount raises a
+        ValueError, as it has no fixed-point value.
+        """
+        if isinstance(x, (int, np.integer)):
+            return int(x) * PriceParser.PRICE_MULTIPLIER
+        if isinstance(x, (str, Decimal)):
+            return int(
+                (Decimal(x) * PriceParser.PRICE_MULTIPLIER).to_integral_value()
+            )
+        if x != x:
+            raise ValueError("Cannot parse the NaN amount {}.".format(x))
+        return int(round(x * PriceParser.PRICE_MULTIPLIER))
+
+    @staticmethod
+    def parse_array(values):
+        """
+        Returns the int64 array of fixed-point integers of an
+        array (or sequence) of float amounts, rounded as parse.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        if np.isnan(values).any():
+            raise ValueError("Cannot parse NaN amounts.")
+        return np.rint(values * PriceParser.PRICE_MULTIPLIER).astype(np.int64)
+
+    @staticmethod
+    def display(x, dp=2):
+        """
+        Returns the float amount of a fixed-point integer,
+        rounded to dp decimal places, or unrounded if dp
+        is None.
+        """
+        value = x / PriceParser.PRICE_MULTIPLIER
+        if dp is None:
+            return value
+        return round(value, dp)
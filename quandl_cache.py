@@ -0,0 +1,132 @@
+import datetime
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+import quandl
+
+
+# Names of the adjusted close column within a downloaded series:
+# raw Quandl EOD frames use "Adj_Close", renamed frames "Adj Close"
+ADJ_CLOSE_COLUMNS = ("Adj_Close", "Adj Close")
+
+
+class QuandlCache(object):
+    """
+    QuandlCache keeps a persistent local copy of every series
+    downloaded from Quandl, so that repeated backtests (and unit
+    tests) do not need to fetch the same data over the network.
+
+    Each series is stored in a binary pickle file keyed by dataset
+    and ticker, e.g. "<cache_dir>/EOD/GOOG.pkl".
+
+    A cached series is considered fresh for max_age after it was
+    last written. Once stale, only the dates from the last cached
+    bar are requested and the new bars appended ("topped-up"),
+    unless the adjusted close of the last cached bar has since
+    been revised, e.g. after a split or dividend, in which case
+    the full series is downloaded again. In offline mode
+    the network is never touched and a missing series is an error.
+    """
+    def __init__(
+        self, cache_dir, max_age=datetime.timedelta(days=1),
+        offline=False, downloader=None
+    ):
+        """
+        Parameters:
+        cache_dir - The directory in which to store the series.
+        max_age - A timedelta after which a cached series is
+            topped-up. None means that the cache never goes stale.
+        offline - If True, only ever read from the cache.
+        downloader - Callable with the signature of quandl.get,
+            used to fetch data. Defaults to quandl.get.
+        """
+        self.cache_dir = os.path.expanduser(cache_dir)
+        self.max_age = max_age
+        self.offline = offline
+        if downloader is None:
+            downloader = quandl.get
+        self.downloader = downloader
+
+    def _cache_filename(self, dataset, ticker):
+        return os.path.join(self.cache_dir, dataset, "{}.pkl".format(ticker))
+
+    def _is_fresh(self, filename):
+        if self.max_age is None:
+            return True
+        modified = datetime.datetime.fromtimestamp(os.path.getmtime(filename))
+        return datetime.datetime.now() - modified < self.max_age
+
+    def _read(self, filename):
+        if os.path.exists(filename):
+            return pd.read_pickle(filename)
+        return None
+
+    def _write(self, filename, data):
+        """
+        Writes the series to a uniquely named temporary file first,
+        so that neither an interrupted write nor processes writing
+        the same series at once leave a corrupt cache entry.
+        """
+        directory = os.path.dirname(filename)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_filename = tempfile.mkstemp(suffix=".tmp", dir=directory)
+        os.close(fd)
+        try:
+            data.to_pickle(tmp_filename)
+            os.replace(tmp_filename, filename)
+        except BaseException:
+            os.remove(tmp_filename)
+            raise
+
+    def _top_up(self, code, cached):
+        """
+        Downloads only the bars from the last cached one onwards
+        and appends the new bars to the cached series.
+
+        If the adjusted close of the last cached bar differs from
+        that downloaded, the past adjusted closes have been revised
+        and the full series is downloaded again instead.
+        """
+        last = cached.index[-1]
+        new = self.downloader(code, start_date=last.strftime("%Y-%m-%d"))
+        column = next(
+            (c for c in ADJ_CLOSE_COLUMNS if c in cached.columns), None
+        )
+        if (
+            column is not None and last in new.index and
+            not np.isclose(new.at[last, column], cached.at[last, column])
+        ):
+            return self.downloader(code)
+        new = new[new.index > last]
+        if len(new) > 0:
+            return pd.concat([cached, new])
+        return cached
+
+    def get(self, dataset, ticker):
+        """
+        Returns the full history of the series for the ticker
+        as a DataFrame, downloading or topping it up first
+        if required.
+        """
+        code = "{}/{}".format(dataset, ticker)
+        filename = self._cache_filename(dataset, ticker)
+        cached = self._read(filename)
+
+        if self.offline:
+            if cached is None:
+                raise IOError(
+                    "Quandl series {} is not cached and the "\
+                    "cache is in offline mode.".format(code)
+                )
+            return cached
+
+        if cached is None:
+            data = self.downloader(code)
+        elif self._is_fresh(filename):
+            return cached
+        else:
+            data = self._top_up(code, cached)
+        self._write(filename, data)
+        return data
@@ -0,0 +1,132 @@
+import numpy as np
+import pandas as pd
+
+from price_parser import PriceParser
+
+
+# The columns of a RoundTripLedger, with their dtypes, where the
+# prices and amounts are fixed-point integers (see PriceParser)
+ROUND_TRIP_FIELDS = (
+    ("ticker_id", np.int32),
+    ("direction", np.int8),
+    ("entry_time", "datetime64[ns]"),
+    ("exit_time", "datetime64[ns]"),
+    ("quantity", np.int64),
+    ("avg_bot", np.int64),
+    ("avg_sld", np.int64),
+    ("commission", np.int64),
+    ("realized_pnl", np.int64),
+)
+
+# The columns displayed as float amounts by to_frame
+AMOUNT_FIELDS = ("avg_bot", "avg_sld", "commission", "realized_pnl")
+
+
+def _datetime64(timestamp):
+    """
+    Returns the datetime64 of a timestamp, or NaT if it is None.
+    """
+    if timestamp is None:
+        return np.datetime64("NaT", "ns")
+    return pd.Timestamp(timestamp).tz_localize(None).to_datetime64()
+
+
+class RoundTripLedger(object):
+    """
+    RoundTripLedger is an append-only record of the round trips
+    of a Portfolio, i.e. the Positions it has closed, held in
+    parallel NumPy arrays rather than as Position objects so that
+    millions of round trips remain cheap to keep and to query.
+
+    Each round trip records its ticker, its direction (1 for a
+    Position opened by a purchase, -1 by a sale), the times at
+    which it was opened and closed, the quantity bought (equal to
+    that sold), the average prices bought and sold, the total
+    commission and the realized PnL, net of commission.
+    """
+    def __init__(self, capacity=1024):
+        """
+        Parameters:
+        capacity - The initial number of round trips for which
+            the arrays have room, doubled whenever it is reached.
+        """
+        self.tickers = []
+        self.ticker_ids = {}
+        self.count = 0
+        self.columns = dict(
+            (name, np.zeros(capacity, dtype=dtype))
+            for name, dtype in ROUND_TRIP_FIELDS
+        )
+
+    def __len__(self):
+        return self.count
+
+    def append(self, position, entry_time=None, exit_time=None):
+        """
+        Records a closed Position as a round trip.
+
+        Parameters:
+        position - The Position, whose quantity is zero.
+        entry_time - The time at which the Position was opened.
+        exit_time - The time at which the Position was closed.
+        """
+        if position.quantity != 0:
+            raise ValueError(
+                "Position in {} is still open.".format(position.ticker)
+            )
+        index = self.count
+        columns = self.columns
+        if index == len(columns["quantity"]):
+            for name, column in columns.items():
+                columns[name] = np.concatenate(
+                    [column, np.zeros_like(column)]
+                )
+        ticker_id = self.ticker_ids.get(position.ticker)
+        if ticker_id is None:
+            ticker_id = len(self.tickers)
+            self.ticker_ids[position.ticker] = ticker_id
+            self.tickers.append(position.ticker)
+        columns["ticker_id"][index] = ticker_id
+        columns["direction"][index] = 1 if position.action == "BOT" else -1
+        columns["entry_time"][index] = _datetime64(entry_time)
+        columns["exit_time"][index] = _datetime64(exit_time)
+        columns["quantity"][index] = position.buys
+        columns["avg_bot"][index] = position.avg_bot
+        columns["avg_sld"][index] = position.avg_sld
+        columns["commission"][index] = position.total_commission
+        columns["realized_pnl"][index] = position.net_incl_comm
+        self.count = index + 1
+
+    def column(self, name):
+        """
+        Returns a read-only view of the values of a column for
+        every round trip, in the order in which they closed.
+        """
+        values = self.columns[name][:self.count]
+        values.flags.writeable = False
+        return values
+
+    def total_pnl(self):
+        """
+        Returns the total realized PnL of the round trips.
+        """
+        return int(self.column("realized_pnl").sum())
+
+    def to_frame(self):
+        """
+        Returns a DataFrame of the round trips, one row per round
+        trip in the order in which they closed, with the tickers
+        and actions ("BOT" or "SLD") by which they were opened,
+        and the prices and amounts displayed as floats.
+        """
+        data = {}
+        data["ticker"] = pd.Categorical.from_codes(
+            self.column("ticker_id"), categories=self.tickers
+        )
+        data["action"] = np.where(self.column("direction") > 0, "BOT", "SLD")
+        for name, _ in ROUND_TRIP_FIELDS[2:]:
+            values = self.column(name)
+            if name in AMOUNT_FIELDS:
+                values = PriceParser.display(values, None)
+            data[name] = values
+        return pd.DataFrame(data)
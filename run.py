@@ -1,19 +1,15 @@
 from trading_session import TradingSession
 from strategy import NaiveBuyAndSellStrategy
-import queue
+from event_bus import DequeEventBus
 import os
 
-from decimal import *
-
-getcontext().prec = 10
-
 output_dir = os.path.join(os.getcwd(), "outputs") # how will this interact with expanduser
 tickers = ["AMZN", "GOOG"]
 equity = 100000.0
 start_date = "2015-01-01"
 end_date = "2016-12-31"
 
-events_queue = queue.Queue()
+events_queue = DequeEventBus()
 strategy = NaiveBuyAndSellStrategy(events_queue)
 
 
@@ -0,0 +1,146 @@
+import heapq
+import itertools
+
+from event import TimerEvent
+
+
+class ScheduledItem(object):
+    """
+    A callback or event due to fire at a particular time,
+    which may be cancelled before it fires. Periodic items
+    are rescheduled every interval after firing.
+    """
+    __slots__ = ("time", "callback", "args", "event", "interval", "cancelled")
+
+    def __init__(self, time, callback=None, args=(), event=None, interval=None):
+        self.time = time
+        self.callback = callback
+        self.args = args
+        self.event = event
+        self.interval = interval
+        self.cancelled = False
+
+
+class Scheduler(object):
+    """
+    Scheduler is a discrete-event scheduler driven by a simulated
+    clock, which is advanced by the TradingSession to the time of
+    every market event before that event is handled.
+
+    Callbacks and events are held on a heap of
+    (time, seq, ScheduledItem), so that items fire in time order
+    and items due at the same time fire in the order in which
+    they were scheduled, making every run deterministic. The
+    cost of a scheduled item is only paid when it fires, rather
+    than on every bar.
+    """
+    def __init__(self, sink, start_time=None):
+        """
+        Parameters:
+        sink - A callable which is given each scheduled event
+            as it fires, e.g. EventDispatcher.dispatch.
+        start_time - Optional initial time of the clock.
+        """
+        self.sink = sink
+        self.now = start_time
+        self.heap = []
+        self.seq = itertools.count()
+
+    def __len__(self):
+        return len(self.heap)
+
+    def _push(self, item):
+        if self.now is not None and item.time < self.now:
+            raise ValueError(
+                "Cannot schedule at {} as the clock is "\
+                "already at {}.".format(item.time, self.now)
+            )
+        heapq.heappush(self.heap, (item.time, next(self.seq), item))
+        return item
+
+    def schedule_callback(self, time, callback, *args):
+        """
+        Schedules callback(*args) to be called at time.
+        Returns the ScheduledItem, which may be cancelled.
+        """
+        return self._push(ScheduledItem(time, callback, args))
+
+    def schedule_event(self, time, event):
+        """
+        Schedules an event to be given to the sink at time, e.g.
+        an OrderEvent to simulate latency. Returns the
+        ScheduledItem, which may be cancelled.
+        """
+        return self._push(ScheduledItem(time, event=event))
+
+    def schedule_periodic(self, start, interval, callback, *args):
+        """
+        Schedules callback(*args) to be called at start and then
+        every interval (e.g. a pd.Timedelta) thereafter, until
+        cancelled. Returns the ScheduledItem.
+        """
+        return self._push(
+            ScheduledItem(start, callback, args, interval=interval)
+        )
+
+    def schedule_timer(self, time, name, interval=None):
+        """
+        Schedules a TimerEvent with the given name to be given to
+        the sink at time, and every interval thereafter if an
+        interval is given. Returns the ScheduledItem.
+        """
+        if interval is None:
+            return self.schedule_event(time, TimerEvent(time, name))
+        return self.schedule_periodic(time, interval, self._fire_timer, name)
+
+    def _fire_timer(self, name):
+        self.sink(TimerEvent(self.now, name))
+
+    def cancel(self, item):
+        """
+        Cancels a scheduled item, which is discarded rather than
+        fired when it reaches the top of the heap.
+        """
+        item.cancelled = True
+
+    def peek_time(self):
+        """
+        Returns the time of the next item due to fire,
+        or None if there is none.
+        """
+        heap = self.heap
+        while heap and heap[0][2].cancelled:
+            heapq.heappop(heap)
+        return heap[0][0] if heap else None
+
+    def is_due(self, time):
+        """
+        Returns True if an item is due to fire at or before time.
+        """
+        next_time = self.peek_time()
+        return next_time is not None and next_time <= time
+
+    def advance_to(self, time):
+        """
+        Fires every item due at or before time, in order, setting
+        the clock to the time of each item as it fires, and then
+        sets the clock to time. Returns the number of items fired.
+        """
+        fired = 0
+        heap = self.heap
+        while heap and heap[0][0] <= time:
+            item_time, _, item = heapq.heappop(heap)
+            if item.cancelled:
+                continue
+            self.now = item_time
+            fired += 1
+            if item.event is not None:
+                self.sink(item.event)
+            else:
+                item.callback(*item.args)
+            if item.interval is not None and not item.cancelled:
+                item.time = item_time + item.interval
+                heapq.heappush(heap, (item.time, next(self.seq), item))
+        if self.now is None or time > self.now:
+            self.now = time
+        return fired
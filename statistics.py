@@ -71,8 +71,8 @@ import datetime
 import os
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
+
+from price_parser import PriceParser
 
 class SimpleStatistics(AbstractStatistics):
     """
@@ -82,6 +82,10 @@ class SimpleStatistics(AbstractStatistics):
     Statistics included are Sharpe Ratio, Drawdown,
     Max Drawdown, Max Drawdown Duration.
 
+    The equity, high-water marks and drawdowns are recorded as
+    fixed-point integers (see PriceParser), and only displayed
+    as floats in the results and plots.
+
     TODO think about Alpha/Beta, compare strategy of benchmark.
     TODO think about speed -- will be bad doing for every tick
         on anything that trades sub-minute.
@@ -107,6 +111,35 @@ class SimpleStatistics(AbstractStatistics):
         self.hwm = [current_equity] # high-water mark
         self.equity.append(current_equity)
 
+    @classmethod
+    def from_equity_curve(cls, output_dir, initial_equity, timestamps, equity):
+        """
+        Creates the statistics that would have been collected by
+        calling update() with each of the timestamps, when the
+        portfolio had the corresponding equity, e.g. for an
+        equity curve calculated by a vectorized backtest.
+
+        Parameters:
+        output_dir - The output directory.
+        initial_equity - The (float) equity before the first timestamp.
+        timestamps - The sequence of distinct timestamps.
+        equity - The sequence of (float) equity values at the timestamps.
+        """
+        stats = cls.__new__(cls)
+        stats.output_dir = output_dir
+        equity = np.concatenate([
+            [PriceParser.parse(initial_equity)],
+            PriceParser.parse_array(equity)
+        ])
+        hwm = np.maximum.accumulate(equity)
+        pct = (equity[1:] - equity[:-1]) / equity[1:] * 100
+        stats.equity = equity.tolist()
+        stats.equity_returns = [0.0] + [round(p, 4) for p in pct.tolist()]
+        stats.timeseries = ["0000-00-00 00:00:00"] + list(timestamps)
+        stats.hwm = hwm.tolist()
+        stats.drawdowns = [0] + (hwm - equity)[1:].tolist()
+        return stats
+
     def update(self, timestamp, portfolio_handler):
         """
         Update all statistics that must be tracked over time.
@@ -124,6 +157,27 @@ class SimpleStatistics(AbstractStatistics):
             self.hwm.append(max(self.hwm[-1], self.equity[-1]))
             self.drawdowns.append(self.hwm[-1] - self.equity[-1])
 
+    def get_history(self, start=0):
+        """
+        Returns the rows of (equity, equity return, timestamp,
+        high-water mark, drawdown) recorded from index start, so
+        that the history can be saved in increments.
+        """
+        return list(zip(
+            self.equity[start:], self.equity_returns[start:],
+            self.timeseries[start:], self.hwm[start:],
+            self.drawdowns[start:]
+        ))
+
+    def restore_history(self, rows):
+        """
+        Replaces the history with the rows returned by get_history.
+        """
+        (
+            self.equity, self.equity_returns, self.timeseries,
+            self.hwm, self.drawdowns
+        ) = [list(column) for column in zip(*rows)]
+
     def get_results(self):
         """
         Return a dict with all important results & stats.
@@ -137,14 +191,26 @@ class SimpleStatistics(AbstractStatistics):
 
         statistics = {}
         statistics["sharpe"] = self.calculate_sharpe()
-        statistics["drawdowns"] = pd.Series(self.drawdowns, index=timeseries)
-        statistics["max_drawdown"] = max(self.drawdowns)
+        statistics["drawdowns"] = pd.Series(
+            self._display(self.drawdowns), index=timeseries
+        )
+        statistics["max_drawdown"] = PriceParser.display(
+            max(self.drawdowns), None
+        )
         statistics["max_drawdown_pct"] = self.calculate_max_drawdown_pct()
-        statistics["equity"] = pd.Series(self.equity, index=timeseries)
+        statistics["equity"] = pd.Series(
+            self._display(self.equity), index=timeseries
+        )
         statistics["equity_returns"] = pd.Series(self.equity_returns, index=timeseries)
 
         return statistics
 
+    def _display(self, values):
+        """
+        Returns the float array of a list of parsed amounts.
+        """
+        return PriceParser.display(np.array(values, dtype=np.int64), None)
+
 
     def calculate_sharpe(self, benchmark_return=0.00):
         """
@@ -191,6 +257,11 @@ class SimpleStatistics(AbstractStatistics):
         A simple script to plot the balance of the portfolio, or
         "equity curve," as a function of time.
         """
+        # Plotting libraries are only imported when needed, as
+        # they are slow to import and not required to backtest
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+
         sns.set_palette("deep", desat=.6)
         sns.set_context(rc={"figure.figsize": (8, 4)})
 
@@ -199,9 +270,13 @@ class SimpleStatistics(AbstractStatistics):
         fig.patch.set_facecolor("white")
 
         df = pd.DataFrame()
-        df["equity"] = pd.Series(self.equity, index=self.timeseries)
+        df["equity"] = pd.Series(
+            self._display(self.equity), index=self.timeseries
+        )
         df["equity_returns"] = pd.Series(self.equity_returns, index=self.timeseries)
-        df["drawdowns"] = pd.Series(self.drawdowns, index=self.timeseries)
+        df["drawdowns"] = pd.Series(
+            self._display(self.drawdowns), index=self.timeseries
+        )
 
         # Plot the equity curve
         ax1 = fig.add_subplot(311, ylabel="Equity Value")
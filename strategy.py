@@ -5,7 +5,7 @@ import queue
 
 from abc import ABCMeta, abstractmethod
 
-from event import SignalEvent
+from event import EventType, SignalEvent
 
 class Strategy(object):
     """
@@ -23,6 +23,15 @@ class Strategy(object):
 
     __metaclass__ = ABCMeta
 
+    # Strategies that can act upon a BarSnapshotEvent directly
+    # should set this to True. Otherwise they are wrapped in a
+    # SnapshotStrategyAdapter when run in snapshot mode.
+    accepts_snapshots = False
+
+    # The ticker symbols whose market events the strategy is
+    # given, where None gives the strategy every market event
+    tickers = None
+
     @abstractmethod
     def calculate_signals(self):
         """
@@ -30,6 +39,77 @@ class Strategy(object):
         """
         raise NotImplementedError("Should implement calculate_signals()")
 
+    def on_timer(self, event):
+        """
+        Called with each TimerEvent scheduled on the session
+        scheduler, which is ignored unless overridden.
+        """
+        pass
+
+
+class SnapshotStrategyAdapter(Strategy):
+    """
+    Wraps a Strategy that expects one BarEvent per ticker so that
+    it can be run against a price handler in snapshot mode. Every
+    BarSnapshotEvent is split into its individual BarEvents, which
+    are passed on in ticker order (skipping any ticker that the
+    strategy does not subscribe to). Any other event is passed
+    on unchanged.
+    """
+    accepts_snapshots = True
+
+    def __init__(self, strategy):
+        self.strategy = strategy
+        self.tickers = getattr(strategy, "tickers", None)
+
+    def calculate_signals(self, event):
+        if event.type == EventType.SNAPSHOT:
+            for bev in event.bar_events():
+                if self.tickers is None or bev.ticker in self.tickers:
+                    self.strategy.calculate_signals(bev)
+        else:
+            self.strategy.calculate_signals(event)
+
+    def on_timer(self, event):
+        on_timer = getattr(self.strategy, "on_timer", None)
+        if on_timer is not None:
+            on_timer(event)
+
+
+class TargetPositionStrategy(Strategy):
+    """
+    Trades each ticker towards a precomputed target position,
+    given as a DataFrame of signed quantities indexed by
+    timestamp with a column per ticker. On every bar the
+    strategy signals the difference between the target at the
+    time of the bar and the quantity it has already signalled.
+
+    This allows a target-position matrix run through the
+    vectorized backtester to be run through the event-driven
+    backtester as well.
+
+    A bar whose timestamp is missing from the targets, or whose
+    target is NaN, is skipped, keeping the previous target.
+    """
+    def __init__(self, events_queue, targets):
+        self.events_queue = events_queue
+        self.targets = targets
+        self.tickers = list(targets.columns)
+        self.quantities = dict((ticker, 0) for ticker in self.tickers)
+
+    def calculate_signals(self, event):
+        ticker = event.ticker
+        target = self.targets[ticker].get(event.time)
+        if target is None or target != target:
+            return
+        target = int(target)
+        quantity = target - self.quantities[ticker]
+        if quantity > 0:
+            self.events_queue.put(SignalEvent(ticker, "BOT", quantity))
+        elif quantity < 0:
+            self.events_queue.put(SignalEvent(ticker, "SLD", -quantity))
+        self.quantities[ticker] = target
+
 
 ##########
 
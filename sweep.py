@@ -0,0 +1,232 @@
+import itertools
+import os
+import shutil
+import tempfile
+from collections import OrderedDict
+from functools import partial
+
+import pandas as pd
+
+from bar_store import BarStore, BarStorePriceHandler, write_bar_store
+from compliance import NaiveCompliance, NullCompliance
+from concurrent_loader import load_concurrently
+from event_bus import DequeEventBus
+from trading_session import TradingSession
+
+
+# BarStores opened by the current (worker) process, by path,
+# so that every run in a worker shares the same memory maps
+_open_stores = {}
+
+# Indicators precomputed by the current (worker) process, by
+# (store path, strategy class, parameters), so that runs over
+# different (e.g. overlapping walk-forward) windows reuse them.
+# The least recently used are evicted beyond INDICATOR_CACHE_SIZE.
+_indicator_cache = OrderedDict()
+INDICATOR_CACHE_SIZE = 16
+
+
+def expand_grid(param_grid):
+    """
+    Expands a dictionary of parameter name to list of values
+    into the list of every combination of parameters, e.g.
+    {"a": [1, 2], "b": [3]} -> [{"a": 1, "b": 3}, {"a": 2, "b": 3}].
+    """
+    names = list(param_grid.keys())
+    return [
+        dict(zip(names, values))
+        for values in itertools.product(*[param_grid[n] for n in names])
+    ]
+
+
+def _open_store(path):
+    if path not in _open_stores:
+        _open_stores[path] = BarStore(path)
+    return _open_stores[path]
+
+
+def _precomputed_indicators(store, strategy_cls, params):
+    key = (store.path, strategy_cls, tuple(sorted(params.items())))
+    if key in _indicator_cache:
+        _indicator_cache.move_to_end(key)
+    else:
+        _indicator_cache[key] = strategy_cls.precompute_indicators(
+            store, **params
+        )
+        if len(_indicator_cache) > INDICATOR_CACHE_SIZE:
+            _indicator_cache.popitem(last=False)
+    return _indicator_cache[key]
+
+
+def run_sweep_task(
+    task, strategy_cls, store_path, tickers,
+    snapshot, output_dir, trade_logs, plot
+):
+    """
+    Runs a single backtest of strategy_cls(events_queue, **params)
+    over a bar store, where task is the tuple (index, params,
+    start_date, end_date, equity), and returns its get_results()
+    dictionary.
+
+    If the strategy class has a precompute_indicators(store,
+    **params) class method, its result is computed once per
+    process over the whole store and given to the strategy as
+    its indicators keyword argument. The indicators must then
+    only depend upon past bars at each time.
+
+    This is a module-level function so that it can be sent to
+    the worker processes of a sweep.
+    """
+    index, params, start_date, end_date, equity = task
+    store = _open_store(store_path)
+    events_queue = DequeEventBus()
+    if hasattr(strategy_cls, "precompute_indicators"):
+        strategy = strategy_cls(
+            events_queue,
+            indicators=_precomputed_indicators(store, strategy_cls, params),
+            **params
+        )
+    else:
+        strategy = strategy_cls(events_queue, **params)
+    price_handler = BarStorePriceHandler(
+        events_queue, store, tickers, start_date, end_date,
+        snapshot=snapshot
+    )
+    if trade_logs:
+        run_dir = os.path.join(output_dir, "_".join(
+            ["run{:04d}".format(index)] +
+            ["{}={}".format(k, v) for k, v in sorted(params.items())]
+        ))
+        if not os.path.exists(run_dir):
+            os.makedirs(run_dir)
+        compliance = NaiveCompliance(run_dir)
+    else:
+        run_dir = output_dir
+        compliance = NullCompliance()
+    session = TradingSession(
+        run_dir, strategy, list(price_handler.tickers.keys()), equity,
+        start_date, end_date, events_queue,
+        price_handler=price_handler, compliance=compliance
+    )
+    return session.start_trading(testing=not plot)
+
+
+class ParameterSweep(object):
+    """
+    ParameterSweep runs the same backtest over many combinations
+    of strategy parameters, fanning the runs out over a pool of
+    worker processes.
+
+    The market data is loaded only once. It is either read from
+    an existing BarStore or written into a temporary one, whose
+    memory-mapped column files are then shared by every worker
+    through the OS page cache, rather than each run rebuilding
+    its price handler from downloaded or parsed data.
+
+    The workers do not plot results nor write CSV trade logs,
+    unless asked to.
+    """
+    def __init__(
+        self, strategy_cls, output_dir,
+        store=None, tickers_data=None,
+        tickers=None, equity=100000.0,
+        start_date=None, end_date=None,
+        snapshot=False, max_workers=1,
+        trade_logs=False, plot=False
+    ):
+        """
+        Parameters:
+        strategy_cls - A (picklable, module-level) Strategy class,
+            instantiated as strategy_cls(events_queue, **params).
+        output_dir - The output directory of the runs.
+        store - A BarStore, or the path to one, holding the data.
+        tickers_data - Alternatively, a dictionary of ticker symbol
+            to DataFrame (as downloaded by the Quandl price handler)
+            which is written once into a temporary BarStore.
+        tickers - Optional list of tickers, by default all.
+        equity - The initial equity of every run.
+        start_date - Optional first date to backtest.
+        end_date - Optional date at which to stop (exclusive).
+        snapshot - If True, stream one snapshot per timestamp.
+        max_workers - The number of worker processes. With one
+            worker the runs are carried out serially in-process.
+        trade_logs - Write a CSV trade log per run.
+        plot - Plot the results of every run.
+        """
+        self.strategy_cls = strategy_cls
+        self.output_dir = output_dir
+        self.tickers = tickers
+        self.equity = equity
+        self.start_date = start_date
+        self.end_date = end_date
+        self.snapshot = snapshot
+        self.max_workers = max_workers
+        self.trade_logs = trade_logs
+        self.plot = plot
+        self.errors = {}
+        self.temp_dir = None
+        if store is None:
+            if tickers_data is None:
+                raise ValueError("Either store or tickers_data is required.")
+            self.temp_dir = tempfile.mkdtemp()
+            write_bar_store(self.temp_dir, tickers_data)
+            store = self.temp_dir
+        if isinstance(store, BarStore):
+            store = store.path
+        self.store_path = store
+
+    def run(self, params_list):
+        """
+        Runs a backtest for each dictionary of parameters (or for
+        every combination, if given a dictionary of parameter name
+        to list of values) and returns a DataFrame with one row per
+        successful run, holding the parameters followed by the
+        get_results() values. Failed runs are recorded in errors,
+        by the index of their parameters.
+        """
+        if isinstance(params_list, dict):
+            params_list = expand_grid(params_list)
+        results, self.errors = self.run_tasks([
+            (params, self.start_date, self.end_date, self.equity)
+            for params in params_list
+        ])
+        rows = []
+        for i, result in results.items():
+            row = dict(params_list[i])
+            row.update(result)
+            rows.append(row)
+        return pd.DataFrame(rows, index=list(results.keys()))
+
+    def run_tasks(self, tasks, max_workers=None):
+        """
+        Runs a backtest for each (params, start_date, end_date,
+        equity) tuple over the pool of workers, and returns a
+        tuple of (results, errors) dictionaries, keyed by the
+        index of each task, as given by load_concurrently.
+
+        The max_workers of the sweep can be overridden, e.g.
+        with one to run a single task in-process.
+
+        Each task is sent to a worker on its own, with its index.
+        """
+        if max_workers is None:
+            max_workers = self.max_workers
+        task = partial(
+            run_sweep_task, strategy_cls=self.strategy_cls,
+            store_path=self.store_path, tickers=self.tickers,
+            snapshot=self.snapshot, output_dir=self.output_dir,
+            trade_logs=self.trade_logs, plot=self.plot
+        )
+        return load_concurrently(
+            task, range(len(tasks)), max_workers, use_processes=True,
+            args=[(i,) + tuple(t) for i, t in enumerate(tasks)]
+        )
+
+    def close(self):
+        """
+        Removes the temporary BarStore, if one was written.
+        """
+        if self.temp_dir is not None:
+            _open_stores.pop(self.temp_dir, None)
+            shutil.rmtree(self.temp_dir)
+            self.temp_dir = None
@@ -0,0 +1,103 @@
+import queue
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from bar_history import BarRingBuffer, HISTORY_FIELDS
+from bar_store import BarStorePriceHandler, write_bar_store
+
+
+class TestBarRingBuffer(unittest.TestCase):
+    """
+    Test that BarRingBuffer returns the latest bars, oldest
+    first, before and after the buffer wraps around.
+    """
+    def setUp(self):
+        self.buffer = BarRingBuffer(3, ("close", "volume"))
+
+    def test_latest_before_full(self):
+        self.assertEqual(len(self.buffer.latest(2, "close")), 0)
+        self.buffer.append((1.0, 10.0))
+        self.buffer.append((2.0, 20.0))
+        self.assertEqual(len(self.buffer), 2)
+        self.assertEqual(self.buffer.latest(5, "close").tolist(), [1.0, 2.0])
+        self.assertEqual(self.buffer.latest(1, "volume").tolist(), [20.0])
+
+    def test_latest_after_wrap_around(self):
+        for i in range(1, 8):
+            self.buffer.append((float(i), 10.0 * i))
+        self.assertEqual(len(self.buffer), 3)
+        self.assertEqual(
+            self.buffer.latest(3, "close").tolist(), [5.0, 6.0, 7.0]
+        )
+        self.assertEqual(
+            self.buffer.latest(2, "volume").tolist(), [60.0, 70.0]
+        )
+
+    def test_latest_negative(self):
+        for i in range(1, 5):
+            self.buffer.append((float(i), 10.0 * i))
+        self.assertRaises(ValueError, self.buffer.latest, -1, "close")
+        self.assertEqual(self.buffer.latest(0, "close").tolist(), [])
+
+    def test_latest_is_read_only_view(self):
+        for i in range(1, 5):
+            self.buffer.append((float(i), 10.0 * i))
+        view = self.buffer.latest(3, "close")
+        self.assertTrue(np.shares_memory(view, self.buffer.data))
+        self.assertFalse(view.flags.writeable)
+
+
+class TestPriceHandlerLatestBars(unittest.TestCase):
+    """
+    Test get_latest_bars of a BarStorePriceHandler, in both bar
+    and snapshot mode, with a lookback of three bars.
+    """
+    def setUp(self):
+        self.store_path = tempfile.mkdtemp()
+        dates = pd.bdate_range("2016-01-04", periods=6)
+        close = np.arange(1.0, 7.0)
+        self.tickers_data = {}
+        for ticker, offset in (("GOOG", 700.0), ("AMZN", 600.0)):
+            self.tickers_data[ticker] = pd.DataFrame({
+                "Open": close + offset - 0.5, "High": close + offset + 1.0,
+                "Low": close + offset - 1.0, "Close": close + offset,
+                "Volume": close * 1000.0, "Adj Close": close + offset
+            }, index=dates)
+        write_bar_store(self.store_path, self.tickers_data)
+
+    def tearDown(self):
+        shutil.rmtree(self.store_path)
+
+    def _stream(self, **kwargs):
+        price_handler = BarStorePriceHandler(
+            queue.Queue(), self.store_path, **kwargs
+        )
+        while price_handler.continue_backtest:
+            price_handler.stream_next()
+        return price_handler
+
+    def test_get_latest_bars(self):
+        for snapshot in (False, True):
+            price_handler = self._stream(lookback=3, snapshot=snapshot)
+            self.assertEqual(
+                price_handler.get_latest_bars("GOOG", 2, "close").tolist(),
+                [705.0, 706.0]
+            )
+            bars = price_handler.get_latest_bars("AMZN", 5)
+            self.assertEqual(sorted(bars.keys()), sorted(HISTORY_FIELDS))
+            self.assertEqual(bars["open"].tolist(), [603.5, 604.5, 605.5])
+            self.assertEqual(bars["volume"].tolist(), [4000.0, 5000.0, 6000.0])
+            self.assertIsNone(price_handler.get_latest_bars("MSFT", 2))
+
+    def test_lookback_disabled(self):
+        price_handler = self._stream()
+        self.assertEqual(price_handler.bar_history, {})
+        self.assertIsNone(price_handler.get_latest_bars("GOOG", 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
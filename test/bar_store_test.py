@@ -0,0 +1,76 @@
+import queue
+import shutil
+import tempfile
+import unittest
+
+import pandas as pd
+
+from bar_store import BarStore, BarStorePriceHandler, write_bar_store
+from bar_stream import ColumnarBarStream
+from helpers import make_ticker_data
+
+
+class TestBarStore(unittest.TestCase):
+    """
+    Test writing a BarStore from Quandl-format DataFrames
+    and streaming it through BarStorePriceHandler.
+    """
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.tickers_data = {
+            "GOOG": make_ticker_data(
+                "GOOG", ["2015-01-02", "2015-01-05", "2015-01-06"], 500.0,
+                adj_factor=0.5
+            ),
+            "AMZN": make_ticker_data(
+                "AMZN", ["2015-01-05", "2015-01-06", "2015-01-07"], 300.0,
+                adj_factor=0.5
+            ),
+        }
+        write_bar_store(self.path, self.tickers_data)
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_index_and_window(self):
+        store = BarStore(self.path)
+        self.assertEqual(store.tickers, ["AMZN", "GOOG"])
+        self.assertEqual(store.index["AMZN"], (0, 3))
+        self.assertEqual(store.index["GOOG"], (3, 6))
+        self.assertEqual(store.window("GOOG", "2015-01-05", "2015-01-06"), (4, 5))
+
+    def test_round_trip(self):
+        store = BarStore(self.path)
+        df = store.to_frame("GOOG")
+        expected = self.tickers_data["GOOG"][df.columns]
+        pd.testing.assert_frame_equal(
+            df, expected, check_freq=False, check_index_type=False
+        )
+
+    def test_stream_matches_in_memory_stream(self):
+        """
+        The handler emits the same bars as streaming the
+        original DataFrames.
+        """
+        expected = list(ColumnarBarStream(
+            self.tickers_data, start_date="2015-01-05"
+        ))
+        price_handler = BarStorePriceHandler(
+            queue.Queue(), self.path, start_date="2015-01-05", chunksize=1
+        )
+        events = []
+        while price_handler.continue_backtest:
+            price_handler.stream_next()
+        while not price_handler.events_queue.empty():
+            events.append(price_handler.events_queue.get())
+
+        self.assertEqual(len(events), len(expected))
+        for event, bar in zip(events, expected):
+            self.assertEqual((event.time, event.ticker), bar[:2])
+            self.assertEqual(event.close_price, bar[5])
+            self.assertEqual(event.adj_close_price, bar[7])
+        self.assertEqual(price_handler.get_last_close("AMZN"), 302.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import unittest
+import pandas as pd
+
+from bar_stream import ColumnarBarStream, MergedBarStream, iter_frame_chunks
+from helpers import make_ticker_data
+
+
+class TestColumnarBarStream(unittest.TestCase):
+    """
+    Test ColumnarBarStream with tickers including "GOOG"
+    and "AMZN" over a few days.
+    """
+    def setUp(self):
+        self.tickers_data = {
+            "GOOG": make_ticker_data(
+                "GOOG", ["2015-01-02", "2015-01-05", "2015-01-06"], 500.0
+            ),
+            "AMZN": make_ticker_data(
+                "AMZN", ["2015-01-05", "2015-01-06", "2015-01-07"], 300.0
+            ),
+        }
+
+    def test_order_matches_dataframe_sort(self):
+        """
+        The stream must emit bars in the same (timestamp, ticker)
+        order as sorting the concatenated DataFrames.
+        """
+        df = pd.concat(self.tickers_data.values())
+        df["colFromIndex"] = df.index
+        df = df.sort_values(by=["colFromIndex", "Ticker"])
+        expected = [
+            (index, row["Ticker"], row["Close"])
+            for index, row in df.iterrows()
+        ]
+
+        stream = ColumnarBarStream(self.tickers_data)
+        result = [(bar[0], bar[1], bar[5]) for bar in stream]
+        self.assertEqual(result, expected)
+
+    def test_start_and_end_date(self):
+        """
+        The start date is inclusive and the end date exclusive.
+        """
+        stream = ColumnarBarStream(
+            self.tickers_data,
+            start_date="2015-01-05", end_date="2015-01-07"
+        )
+        result = [(bar[0], bar[1]) for bar in stream]
+        self.assertEqual(result, [
+            (pd.Timestamp("2015-01-05"), "AMZN"),
+            (pd.Timestamp("2015-01-05"), "GOOG"),
+            (pd.Timestamp("2015-01-06"), "AMZN"),
+            (pd.Timestamp("2015-01-06"), "GOOG"),
+        ])
+
+    def test_cursor_exhaustion(self):
+        """
+        Once every bar has been read the stream raises StopIteration.
+        """
+        stream = ColumnarBarStream(self.tickers_data)
+        self.assertEqual(len(stream), 6)
+        for _ in range(6):
+            next(stream)
+        self.assertEqual(stream.cursor, 6)
+        self.assertRaises(StopIteration, next, stream)
+
+    def test_merge_across_chunks(self):
+        """
+        Splitting each ticker into single-row chunks must not
+        change the merged (timestamp, ticker) order.
+        """
+        expected = [bar[:2] for bar in ColumnarBarStream(self.tickers_data)]
+        stream = MergedBarStream(dict(
+            (ticker, iter_frame_chunks(df, ["Close"], chunksize=1))
+            for ticker, df in self.tickers_data.items()
+        ))
+        result = list(stream)
+        self.assertEqual([bar[:2] for bar in result], expected)
+        self.assertEqual(result[0][2], 500.0)
+        self.assertEqual(result[-1][2], 302.0)
+
+    def test_resume(self):
+        """
+        A stream created from the resume state of another, part
+        way through a chunk, must emit the remaining bars.
+        """
+        expected = list(ColumnarBarStream(self.tickers_data))
+        for n in range(len(expected)):
+            stream = ColumnarBarStream(self.tickers_data, chunksize=2)
+            for _ in range(n):
+                next(stream)
+            resumed = ColumnarBarStream(
+                self.tickers_data, chunksize=2,
+                resume=stream.get_resume_state()
+            )
+            self.assertEqual(list(resumed), expected[n:])
+
+
+if __name__ == "__main__":
+    unittest.main()
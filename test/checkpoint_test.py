@@ -0,0 +1,206 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import pandas as pd
+
+from bar_store import BarStorePriceHandler, write_bar_store
+from checkpoint import SessionCheckpointer
+from event import SignalEvent
+from event_bus import DequeEventBus
+from helpers import TICKERS, TradeEveryNthBarStrategy, make_tickers_data
+from trading_session import TradingSession
+
+
+class TradeEveryThirdBarStrategy(TradeEveryNthBarStrategy):
+    """
+    Alternately buys and sells a ticker on every third bar of
+    that ticker, and sells 5 GOOG on a weekly schedule.
+    """
+    def __init__(self, events_queue):
+        super(TradeEveryThirdBarStrategy, self).__init__(events_queue, 3)
+        self.rebalances = []
+
+    def rebalance(self):
+        self.rebalances.append(len(self.counts))
+        self.events_queue.put(SignalEvent("GOOG", "SLD", 5))
+
+
+class StreamFailure(Exception):
+    pass
+
+
+class TestSessionCheckpointer(unittest.TestCase):
+    """
+    Test that a session resumed from a checkpoint gives results
+    identical to those of an uninterrupted session.
+    """
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+        self.store_path = tempfile.mkdtemp()
+        write_bar_store(self.store_path, make_tickers_data(40, 5))
+        self.checkpoint_path = os.path.join(self.output_dir, "session.ckpt")
+
+    def tearDown(self):
+        shutil.rmtree(self.output_dir)
+        shutil.rmtree(self.store_path)
+
+    def _create_session(self, snapshot, checkpoint=None, name="resumed"):
+        events_queue = DequeEventBus()
+        strategy = TradeEveryThirdBarStrategy(events_queue)
+        output_dir = os.path.join(self.output_dir, name)
+        if not os.path.exists(output_dir):
+            os.mkdir(output_dir)
+        session = TradingSession(
+            output_dir, strategy, TICKERS, 100000.0,
+            None, None, events_queue,
+            price_handler=BarStorePriceHandler(
+                events_queue, self.store_path, snapshot=snapshot
+            ),
+            checkpoint=checkpoint
+        )
+        return session
+
+    def _strategy(self, session):
+        return getattr(session.strategy, "strategy", session.strategy)
+
+    def _schedule(self, session):
+        session.scheduler.schedule_periodic(
+            pd.Timestamp("2015-01-07"), pd.Timedelta(days=7),
+            self._strategy(session).rebalance
+        )
+
+    def _fail_after(self, session, n):
+        stream_next = session.price_handler.stream_next
+        calls = []
+
+        def failing_stream_next():
+            calls.append(1)
+            if len(calls) > n:
+                raise StreamFailure()
+            stream_next()
+        session.price_handler.stream_next = failing_stream_next
+
+    def _trade_log(self, session):
+        compliance = session.compliance
+        fname = os.path.join(compliance.output_dir, compliance.csv_filename)
+        with open(fname) as f:
+            return f.read()
+
+    def _assert_identical(self, session, expected):
+        self.assertEqual(session.statistics.equity, expected.statistics.equity)
+        self.assertEqual(
+            session.statistics.timeseries, expected.statistics.timeseries
+        )
+        self.assertEqual(
+            session.statistics.drawdowns, expected.statistics.drawdowns
+        )
+        positions = session.portfolio_handler.portfolio.positions
+        expected_positions = expected.portfolio_handler.portfolio.positions
+        self.assertEqual(sorted(positions), sorted(expected_positions))
+        for ticker in positions:
+            self.assertEqual(
+                positions[ticker].__dict__, expected_positions[ticker].__dict__
+            )
+        strategy = self._strategy(session)
+        expected_strategy = self._strategy(expected)
+        self.assertEqual(strategy.counts, expected_strategy.counts)
+        self.assertEqual(strategy.rebalances, expected_strategy.rebalances)
+        self.assertEqual(self._trade_log(session), self._trade_log(expected))
+
+    def _run_expected(self, snapshot):
+        expected = self._create_session(snapshot, name="expected")
+        self._schedule(expected)
+        expected.start_trading(testing=True)
+        return expected
+
+    def _run_failed(self, snapshot, log_filename=None):
+        """
+        Runs a session, writing its trade log to log_filename
+        if given, which fails after writing a checkpoint.
+        """
+        checkpoint = SessionCheckpointer(self.checkpoint_path, every=7)
+        failed = self._create_session(snapshot, checkpoint)
+        if log_filename is not None:
+            failed.compliance.csv_filename = log_filename
+        self._schedule(failed)
+        self._fail_after(failed, 25 if snapshot else 95)
+        with self.assertRaises(StreamFailure):
+            failed.start_trading(testing=True)
+        self.assertTrue(checkpoint.exists())
+        return failed
+
+    def test_resume(self):
+        for snapshot in (False, True):
+            expected = self._run_expected(snapshot)
+            self.assertTrue(self._strategy(expected).rebalances)
+            failed = self._run_failed(snapshot)
+            failed_log = self._trade_log(failed)
+
+            resumed = self._create_session(
+                snapshot, SessionCheckpointer(self.checkpoint_path, every=7)
+            )
+            resumed.checkpoint.restore(resumed)
+            self.assertGreater(resumed.price_handler.bar_stream.cursor, 0)
+            # The trades recorded after the checkpoint are dropped
+            restored_log = self._trade_log(resumed)
+            self.assertLess(len(restored_log), len(failed_log))
+            self.assertTrue(failed_log.startswith(restored_log))
+            self.assertEqual(
+                resumed.price_handler.dirty_sets,
+                (resumed.portfolio_handler.portfolio.dirty,)
+            )
+            resumed.start_trading(testing=True)
+
+            self._assert_identical(resumed, expected)
+            # A finished session removes its checkpoint
+            self.assertFalse(resumed.checkpoint.exists())
+            self.assertFalse(
+                os.path.exists(resumed.checkpoint.history_path)
+            )
+
+    def test_resume_trade_log_of_earlier_day(self):
+        """
+        A session resumed on a later day than the checkpoint
+        carries on the trade log of the day it was written.
+        """
+        expected = self._run_expected(False)
+        self._run_failed(False, "tradelog_2015-01-01.csv")
+
+        resumed = self._create_session(
+            False, SessionCheckpointer(self.checkpoint_path, every=7)
+        )
+        today_filename = resumed.compliance.csv_filename
+        resumed.checkpoint.restore(resumed)
+        resumed.start_trading(testing=True)
+
+        self._assert_identical(resumed, expected)
+        self.assertEqual(
+            resumed.compliance.csv_filename, "tradelog_2015-01-01.csv"
+        )
+        self.assertEqual(
+            os.listdir(resumed.compliance.output_dir),
+            ["tradelog_2015-01-01.csv"]
+        )
+        self.assertNotEqual(today_filename, "tradelog_2015-01-01.csv")
+
+    def test_fresh_session_cleans_trade_log(self):
+        """
+        A session that is not restored starts a new trade log,
+        even if a checkpoint exists at its path.
+        """
+        expected = self._run_expected(False)
+        self._run_failed(False)
+
+        fresh = self._create_session(
+            False, SessionCheckpointer(self.checkpoint_path, every=7)
+        )
+        self._schedule(fresh)
+        fresh.start_trading(testing=True)
+        self._assert_identical(fresh, expected)
+        self.assertFalse(fresh.checkpoint.exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import time
+import unittest
+
+from concurrent_loader import load_concurrently
+
+
+def _slow_square(x):
+    """
+    Squares x, sleeping for longer the smaller x is, so that
+    loads complete in the reverse of the order submitted.
+    """
+    time.sleep(0.01 * (5 - x))
+    if x == 3:
+        raise ValueError("Could not load 3")
+    return x * x
+
+
+class TestLoadConcurrently(unittest.TestCase):
+    """
+    Test load_concurrently with serial, thread pool
+    and process pool loading.
+    """
+    def _check(self, max_workers, use_processes=False):
+        results, errors = load_concurrently(
+            _slow_square, [1, 2, 3, 4], max_workers, use_processes
+        )
+        self.assertEqual(list(results.items()), [(1, 1), (2, 4), (4, 16)])
+        self.assertEqual(list(errors.keys()), [3])
+        self.assertIsInstance(errors[3], ValueError)
+
+    def test_serial(self):
+        self._check(1)
+
+    def test_thread_pool(self):
+        self._check(4)
+
+    def test_process_pool(self):
+        self._check(2, use_processes=True)
+
+    def test_args(self):
+        """
+        Each key is loaded with its own argument, in place
+        of the key itself.
+        """
+        results, errors = load_concurrently(
+            _slow_square, ["a", "b", "c"], 2, True, args=[4, 3, 2]
+        )
+        self.assertEqual(list(results.items()), [("a", 16), ("c", 4)])
+        self.assertEqual(list(errors.keys()), ["b"])
+
+
+if __name__ == "__main__":
+    unittest.main()
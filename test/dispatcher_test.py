@@ -0,0 +1,73 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from dispatcher import EventDispatcher
+from event import BarEvent, BarSnapshotEvent, EventType, SignalEvent
+
+
+class TestEventDispatcher(unittest.TestCase):
+    """
+    Test that the EventDispatcher calls the handlers subscribed
+    to each event type and ticker, in subscription order.
+    """
+    def setUp(self):
+        self.calls = []
+        self.dispatcher = EventDispatcher()
+        self.dispatcher.subscribe(EventType.BAR, self._handler("all"))
+        self.dispatcher.subscribe(
+            EventType.BAR, self._handler("goog"), tickers=["GOOG"]
+        )
+        self.dispatcher.subscribe_many(
+            [EventType.BAR, EventType.SNAPSHOT],
+            self._handler("last"), tickers=["AMZN", "GOOG"]
+        )
+        self.time = pd.Timestamp("2016-01-04")
+
+    def _handler(self, name):
+        def handler(event):
+            self.calls.append(name)
+        return handler
+
+    def _bar(self, ticker):
+        return BarEvent(ticker, self.time, 86400, 1.0, 1.0, 1.0, 1.0, 10)
+
+    def test_dispatch_by_ticker(self):
+        self.dispatcher.dispatch(self._bar("GOOG"))
+        self.assertEqual(self.calls, ["all", "goog", "last"])
+        self.calls = []
+        self.dispatcher.dispatch(self._bar("MSFT"))
+        self.assertEqual(self.calls, ["all"])
+        self.calls = []
+        self.dispatcher.dispatch(self._bar("AMZN"))
+        self.assertEqual(self.calls, ["all", "last"])
+
+    def test_dispatch_snapshot(self):
+        prices = np.ones(2)
+        for tickers, calls in (
+            (["AMZN", "MSFT"], ["last"]), (["IBM", "MSFT"], [])
+        ):
+            self.calls = []
+            self.dispatcher.dispatch(BarSnapshotEvent(
+                self.time, 86400, tickers,
+                prices, prices, prices, prices, prices, prices
+            ))
+            self.assertEqual(self.calls, calls)
+
+    def test_subscribe_after_dispatch(self):
+        self.dispatcher.dispatch(self._bar("MSFT"))
+        self.dispatcher.subscribe(
+            EventType.BAR, self._handler("msft"), tickers=["MSFT"]
+        )
+        self.calls = []
+        self.dispatcher.dispatch(self._bar("MSFT"))
+        self.assertEqual(self.calls, ["all", "msft"])
+
+    def test_unsupported_event_type(self):
+        with self.assertRaises(NotImplementedError):
+            self.dispatcher.dispatch(SignalEvent("GOOG", "BOT", 10))
+
+
+if __name__ == "__main__":
+    unittest.main()
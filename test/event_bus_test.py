@@ -0,0 +1,54 @@
+import queue
+import threading
+import unittest
+
+from event import SignalEvent
+from event_bus import DequeEventBus, ThreadSafeEventBus, create_event_bus
+
+
+class TestEventBus(unittest.TestCase):
+    """
+    Test that both event buses return events in first-in
+    first-out order and None once empty.
+    """
+    def test_put_poll(self):
+        for bus in (DequeEventBus(), ThreadSafeEventBus()):
+            self.assertTrue(bus.empty())
+            self.assertIsNone(bus.poll())
+            signals = [SignalEvent(t, "BOT", 100) for t in ("GOOG", "AMZN")]
+            for signal in signals:
+                bus.put(signal)
+            self.assertEqual(len(bus), 2)
+            self.assertFalse(bus.empty())
+            self.assertIs(bus.poll(), signals[0])
+            self.assertIs(bus.get(), signals[1])
+            self.assertIsNone(bus.poll())
+            with self.assertRaises(queue.Empty):
+                bus.get(False)
+
+    def test_blocking_get(self):
+        """
+        A blocking get raises on a DequeEventBus, which no other
+        thread can write to, and waits on a ThreadSafeEventBus.
+        """
+        bus = DequeEventBus()
+        bus.put(SignalEvent("GOOG", "BOT", 100))
+        self.assertRaises(ValueError, bus.get, True)
+        self.assertEqual(len(bus), 1)
+
+        bus = ThreadSafeEventBus()
+        signal = SignalEvent("GOOG", "BOT", 100)
+        timer = threading.Timer(0.01, bus.put, (signal,))
+        timer.start()
+        self.assertIs(bus.get(True, 5), signal)
+        timer.join()
+        with self.assertRaises(queue.Empty):
+            bus.get(True, 0.01)
+
+    def test_create_event_bus(self):
+        self.assertIsInstance(create_event_bus(), DequeEventBus)
+        self.assertIsInstance(create_event_bus("live"), ThreadSafeEventBus)
+
+
+if __name__ == "__main__":
+    unittest.main()
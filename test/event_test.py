@@ -0,0 +1,53 @@
+import pickle
+import unittest
+
+import pandas as pd
+
+from event import (
+    BarEvent, EventType, FillEvent, OrderEvent, SignalEvent, TickEvent
+)
+
+
+class TestSlottedEvents(unittest.TestCase):
+    """
+    Test that the event classes are slotted, carry their type
+    as a class attribute and still pickle.
+    """
+    def setUp(self):
+        self.time = pd.Timestamp("2016-01-04")
+        self.bar = BarEvent(
+            "GOOG", self.time, 86400, 1.0, 2.0, 0.5, 1.5, 1000, 1.5
+        )
+
+    def test_no_instance_dict(self):
+        events = [
+            self.bar,
+            TickEvent("GOOG", self.time, 1.0, 1.1),
+            SignalEvent("GOOG", "BOT", 100),
+            OrderEvent("GOOG", "BOT", 100),
+            FillEvent(self.time, "GOOG", "BOT", 100, "ARCA", 1.5, 1.0),
+        ]
+        for event in events:
+            self.assertFalse(hasattr(event, "__dict__"))
+        self.assertEqual(
+            [event.type for event in events], [
+                EventType.BAR, EventType.TICK, EventType.SIGNAL,
+                EventType.ORDER, EventType.FILL
+            ]
+        )
+        self.assertEqual(self.bar.typename, "BAR")
+        with self.assertRaises(AttributeError):
+            self.bar.unknown = 1
+
+    def test_period_readable(self):
+        self.assertEqual(self.bar.period_readable, "1day")
+        self.bar.period = 45
+        self.assertEqual(self.bar.period_readable, "45sec")
+
+    def test_pickle(self):
+        bar = pickle.loads(pickle.dumps(self.bar))
+        self.assertEqual(str(bar), str(self.bar))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -69,7 +69,7 @@ class TestIBSimulatedExecutionHandler(unittest.TestCase):
         self.assertEqual(fill_event.quantity, 100)
         self.assertEqual(fill_event.exchange, "ARCA")
         # self.assertEqual(fill_event.price, Decimal("50.31"))
-        self.assertEqual(fill_event.price, 705.46)
+        self.assertEqual(PriceParser.display(fill_event.price), 705.46)
         self.assertEqual(PriceParser.display(fill_event.commission), 1)
 
 
@@ -0,0 +1,212 @@
+import gc
+import os
+import queue
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from file_price_handler import HistoricFileBarPriceHandler
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+
+def _make_ticker_frame(dates, start_price):
+    """
+    Creates a small daily DataFrame with a "Date" column and
+    an unused "Extra" column, which must not be loaded.
+    """
+    n = len(dates)
+    prices = [start_price + i for i in range(n)]
+    return pd.DataFrame({
+        "Date": pd.to_datetime(dates),
+        "Open": prices, "High": prices, "Low": prices,
+        "Close": prices, "Volume": [1000] * n,
+        "Adj Close": [p / 2.0 for p in prices],
+        "Extra": ["x"] * n,
+    })
+
+
+class TestHistoricFileBarPriceHandler(unittest.TestCase):
+    """
+    Test HistoricFileBarPriceHandler, with tickers including
+    "GOOG" and "AMZN", stored as CSV, NumPy and Parquet files.
+    """
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp()
+        self.frames = {
+            "GOOG": _make_ticker_frame(
+                ["2015-01-02", "2015-01-05", "2015-01-06", "2015-01-07"], 500.0
+            ),
+            "AMZN": _make_ticker_frame(
+                ["2015-01-05", "2015-01-06", "2015-01-07", "2015-01-08"], 300.0
+            ),
+        }
+        for ticker, df in self.frames.items():
+            df.to_csv(os.path.join(self.data_dir, ticker + ".csv"), index=False)
+            records = df.drop(columns="Extra").to_records(index=False)
+            np.save(os.path.join(self.data_dir, ticker + ".npy"), records)
+
+    def tearDown(self):
+        shutil.rmtree(self.data_dir)
+
+    def _stream_all(self, price_handler):
+        events = []
+        while price_handler.continue_backtest:
+            price_handler.stream_next()
+        while not price_handler.events_queue.empty():
+            events.append(price_handler.events_queue.get())
+        return events
+
+    def _check_window(self, file_format):
+        price_handler = HistoricFileBarPriceHandler(
+            queue.Queue(), self.data_dir, ["GOOG", "AMZN"],
+            start_date="2015-01-05", end_date="2015-01-07",
+            file_format=file_format, chunksize=2
+        )
+        events = self._stream_all(price_handler)
+        self.assertEqual(
+            [(e.time, e.ticker) for e in events], [
+                (pd.Timestamp("2015-01-05"), "AMZN"),
+                (pd.Timestamp("2015-01-05"), "GOOG"),
+                (pd.Timestamp("2015-01-06"), "AMZN"),
+                (pd.Timestamp("2015-01-06"), "GOOG"),
+            ]
+        )
+        self.assertEqual(events[-1].close_price, 502.0)
+        self.assertEqual(events[-1].adj_close_price, 251.0)
+        self.assertEqual(events[-1].volume, 1000)
+        self.assertEqual(events[-1].period, 86400)
+
+        # results from _store_event
+        self.assertEqual(price_handler.tickers["AMZN"]["close"], 301.0)
+        self.assertEqual(
+            price_handler.tickers["GOOG"]["timestamp"],
+            pd.Timestamp("2015-01-06")
+        )
+
+    def test_subscribe_ticker(self):
+        price_handler = HistoricFileBarPriceHandler(
+            queue.Queue(), self.data_dir, ["GOOG", "AMZN", "MSFT"]
+        )
+        self.assertEqual(sorted(price_handler.tickers.keys()), ["AMZN", "GOOG"])
+
+    def test_stream_csv(self):
+        self._check_window("csv")
+
+    def test_stream_npy(self):
+        self._check_window("npy")
+
+    @unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+    def test_stream_parquet(self):
+        for ticker, df in self.frames.items():
+            df.to_parquet(os.path.join(self.data_dir, ticker + ".parquet"))
+        self._check_window("parquet")
+
+    def test_csv_stops_reading_after_end_date(self):
+        """
+        Chunks after the end date are never read from the file.
+        """
+        price_handler = HistoricFileBarPriceHandler(
+            queue.Queue(), self.data_dir, ["GOOG"],
+            end_date="2015-01-05", chunksize=1
+        )
+        chunks = list(price_handler._iter_ticker_chunks("GOOG"))
+        self.assertEqual(len(chunks), 1)
+        self.assertEqual(chunks[0][1].shape, (1, 6))
+
+    @unittest.skipIf(
+        not os.path.isdir("/proc/self/fd"), "open files cannot be counted"
+    )
+    def test_csv_holds_no_file_open_between_chunks(self):
+        """
+        No file handle is kept open per ticker while the
+        merged stream waits on its chunks.
+        """
+        # Descriptors left by other tests may be closed meanwhile
+        gc.collect()
+        n_open = len(os.listdir("/proc/self/fd"))
+        price_handler = HistoricFileBarPriceHandler(
+            queue.Queue(), self.data_dir, ["GOOG", "AMZN"], chunksize=1
+        )
+        price_handler.stream_next()
+        self.assertLessEqual(len(os.listdir("/proc/self/fd")), n_open)
+
+    def test_csv_skips_rows_before_start_date(self):
+        """
+        The rows before the start date are skipped without being
+        parsed, so unparseable prices within them are never seen,
+        for start dates before, within and after the data.
+        """
+        dates = pd.bdate_range("2015-01-02", periods=200)
+        df = _make_ticker_frame(dates, 100.0)
+        df["Close"] = df["Close"].astype(object)
+        df.loc[:149, "Close"] = "unparseable"
+        df.to_csv(os.path.join(self.data_dir, "MSFT.csv"), index=False)
+        for start, n_rows in (
+            (dates[150], 50), (dates[150] - pd.Timedelta(hours=1), 50),
+            (dates[173], 27), (dates[199], 1),
+            (dates[199] + pd.Timedelta(days=1), 0),
+        ):
+            price_handler = HistoricFileBarPriceHandler(
+                queue.Queue(), self.data_dir, ["MSFT"],
+                start_date=start, chunksize=16
+            )
+            chunks = list(price_handler._iter_ticker_chunks("MSFT"))
+            times = np.concatenate([c[0] for c in chunks] or [[]])
+            self.assertEqual(len(times), n_rows)
+            if n_rows:
+                self.assertEqual(pd.Timestamp(times[0]), dates[200 - n_rows])
+                self.assertEqual(chunks[0][1][0, 3], 100.0 + 200 - n_rows)
+
+
+    def test_csv_resume_skips_streamed_rows(self):
+        """
+        A handler restored from a checkpoint seeks to the chunk
+        of each ticker, so unparseable prices within the rows
+        streamed after the first chunk are never seen.
+        """
+        dates = pd.bdate_range("2015-01-02", periods=10)
+        for ticker in ("GOOG", "AMZN"):
+            _make_ticker_frame(dates, 100.0).to_csv(
+                os.path.join(self.data_dir, ticker + ".csv"), index=False
+            )
+        price_handler = HistoricFileBarPriceHandler(
+            queue.Queue(), self.data_dir, ["GOOG", "AMZN"], chunksize=2
+        )
+        expected = self._stream_all(price_handler)
+        price_handler = HistoricFileBarPriceHandler(
+            queue.Queue(), self.data_dir, ["GOOG", "AMZN"], chunksize=2
+        )
+        for _ in range(11):
+            price_handler.stream_next()
+        state = price_handler.get_checkpoint_state()
+        for ticker, (offset, _) in state["resume"].items():
+            filename = os.path.join(self.data_dir, ticker + ".csv")
+            with open(filename, "r+b") as f:
+                for _ in range(3):
+                    f.readline()
+                start = f.tell()
+                rows = f.read(offset - start)
+                f.seek(start)
+                f.write(rows.translate(None, b"0123456789").ljust(
+                    len(rows), b"x"
+                ))
+
+        resumed = HistoricFileBarPriceHandler(
+            queue.Queue(), self.data_dir, ["GOOG", "AMZN"], chunksize=2
+        )
+        resumed.restore_checkpoint_state(state)
+        self.assertEqual(
+            [(e.time, e.ticker, e.close_price)
+             for e in self._stream_all(resumed)],
+            [(e.time, e.ticker, e.close_price) for e in expected[11:]]
+        )
+
+if __name__ == "__main__":
+    unittest.main()
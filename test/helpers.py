@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+
+from event import SignalEvent
+from strategy import Strategy
+
+
+TICKERS = ["AMZN", "GOOG", "MSFT"]
+
+
+def make_tickers_data(
+    n_days, seed, tickers=TICKERS, start_price=100.0, late_start=5
+):
+    """
+    Creates random-walk daily DataFrames in the format produced
+    by _download_quandl_data(), where MSFT starts trading later.
+
+    Parameters:
+    n_days - The number of business days, from 2015-01-02.
+    seed - The seed of the random walks.
+    tickers - The ticker symbols.
+    start_price - The price about which the walk of the first
+        ticker starts, which is multiplied by i + 1 for the ith.
+    late_start - The number of days for which MSFT does not trade.
+    """
+    rng = np.random.RandomState(seed)
+    dates = pd.bdate_range("2015-01-02", periods=n_days)
+    tickers_data = {}
+    for i, ticker in enumerate(tickers):
+        close = start_price * (i + 1) + np.cumsum(
+            rng.normal(0.0, 1.0, n_days)
+        )
+        df = pd.DataFrame({
+            "Open": close, "High": close, "Low": close, "Close": close,
+            "Volume": 1000.0, "Adj Close": close
+        }, index=dates)
+        if ticker == "MSFT":
+            df = df.iloc[late_start:]
+        tickers_data[ticker] = df
+    return tickers_data
+
+
+def make_ticker_data(ticker, dates, start_price, adj_factor=1.0):
+    """
+    Creates a small daily DataFrame in the same format as
+    the one produced by _download_quandl_data(), whose prices
+    rise by one each day.
+
+    Parameters:
+    ticker - The ticker symbol.
+    dates - The dates of the rows.
+    start_price - The price on the first date.
+    adj_factor - The ratio of the adjusted to the unadjusted close.
+    """
+    n = len(dates)
+    prices = [start_price + i for i in range(n)]
+    df = pd.DataFrame({
+        "Open": prices, "Low": prices, "High": prices,
+        "Close": prices, "Volume": [1000.0] * n,
+        "Adj Close": [p * adj_factor for p in prices]
+    }, index=pd.to_datetime(dates))
+    df["Ticker"] = ticker
+    return df
+
+
+class TradeEveryNthBarStrategy(Strategy):
+    """
+    Alternately buys and sells quantity units of a ticker on
+    every nth bar of that ticker.
+    """
+    def __init__(self, events_queue, n, quantity=10):
+        self.events_queue = events_queue
+        self.n = n
+        self.quantity = quantity
+        self.counts = {}
+
+    def calculate_signals(self, event):
+        count = self.counts.get(event.ticker, 0) + 1
+        self.counts[event.ticker] = count
+        if count % self.n == 0:
+            action = "BOT" if count % (2 * self.n) else "SLD"
+            self.events_queue.put(
+                SignalEvent(event.ticker, action, self.quantity)
+            )
@@ -0,0 +1,150 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from bar_store import BarStorePriceHandler, write_bar_store
+from event import EventType
+from event_bus import DequeEventBus
+from helpers import TradeEveryNthBarStrategy, make_tickers_data
+from instrumentation import CallStats, SessionProfiler
+from trading_session import TradingSession
+
+
+TICKERS = ["AMZN", "GOOG"]
+
+
+class TestCallStats(unittest.TestCase):
+    def test_record(self):
+        stats = CallStats()
+        for elapsed in (0, 1, 3, 1000, 1000, 5000):
+            stats.record(elapsed)
+        self.assertEqual(stats.count, 6)
+        self.assertEqual(stats.total_ns, 7004)
+        self.assertEqual(stats.max_ns, 5000)
+        self.assertEqual(sum(stats.histogram), 6)
+        self.assertEqual(stats.histogram[0], 1)
+        self.assertEqual(stats.histogram[2], 1)
+        self.assertEqual(stats.histogram[10], 2)
+        self.assertEqual(stats.percentile_ns(50), 4)
+        self.assertEqual(stats.percentile_ns(100), 5000)
+
+
+class TestSessionProfiler(unittest.TestCase):
+    """
+    Test profiling a TradingSession backtest streaming 20
+    daily bars for each of two tickers.
+    """
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+        self.store_path = tempfile.mkdtemp()
+        write_bar_store(self.store_path, make_tickers_data(20, 7, TICKERS))
+
+    def tearDown(self):
+        shutil.rmtree(self.output_dir)
+        shutil.rmtree(self.store_path)
+
+    def _create_session(self, profiler=None):
+        events_queue = DequeEventBus()
+        return TradingSession(
+            self.output_dir, TradeEveryNthBarStrategy(events_queue, 5),
+            TICKERS, 100000.0, None, None, events_queue,
+            price_handler=BarStorePriceHandler(events_queue, self.store_path),
+            profiler=profiler
+        )
+
+    def test_profile(self):
+        profiler = SessionProfiler()
+        session = self._create_session(profiler)
+        session.start_trading(testing=True)
+
+        self.assertEqual(profiler.events["BAR"].count, 40)
+        self.assertEqual(profiler.events["SIGNAL"].count, 8)
+        self.assertEqual(profiler.events["ORDER"].count, 8)
+        self.assertEqual(profiler.events["FILL"].count, 8)
+        components = profiler.components
+        self.assertEqual(
+            components["TradeEveryNthBarStrategy.calculate_signals"].count, 40
+        )
+        self.assertEqual(components["PortfolioHandler.on_signal"].count, 8)
+        self.assertEqual(
+            components["PortfolioHandler.update_portfolio_value"].count, 40
+        )
+        self.assertEqual(components["NaiveCompliance.record_trade"].count, 8)
+        self.assertEqual(components["BarStorePriceHandler.stream_next"].count, 41)
+        for stats in list(profiler.events.values()) + list(components.values()):
+            self.assertEqual(sum(stats.histogram), stats.count)
+        self.assertGreaterEqual(profiler.wall_ns, profiler.events["BAR"].total_ns)
+
+        summary = profiler.summary()
+        self.assertIn("BAR", summary)
+        self.assertIn("NaiveCompliance.record_trade", summary)
+
+        path = os.path.join(self.output_dir, "profile.json")
+        profiler.export_json(path)
+        with open(path) as f:
+            exported = json.load(f)
+        self.assertEqual(exported, profiler.to_dict())
+        self.assertEqual(exported["events"]["FILL"]["count"], 8)
+
+    def test_disabled(self):
+        """
+        Without a profiler the handlers are not wrapped, and the
+        results are those of a profiled session.
+        """
+        session = self._create_session()
+        session.start_trading(testing=True)
+        for subscriptions in session.dispatcher.subscriptions.values():
+            for handler, _ in subscriptions:
+                self.assertFalse(hasattr(handler, "__wrapped__"))
+        self.assertNotIn("stream_next", session.price_handler.__dict__)
+
+        profiled = self._create_session(SessionProfiler())
+        profiled.start_trading(testing=True)
+        self.assertEqual(
+            profiled.statistics.equity, session.statistics.equity
+        )
+        self._assert_uninstrumented(profiled)
+
+    def _assert_uninstrumented(self, session):
+        for subscriptions in session.dispatcher.subscriptions.values():
+            for handler, _ in subscriptions:
+                self.assertFalse(hasattr(handler, "__wrapped__"))
+        self.assertNotIn("stream_next", session.price_handler.__dict__)
+        self.assertNotIn(
+            "update_portfolio_value", session.portfolio_handler.__dict__
+        )
+        self.assertNotIn("record_trade", session.compliance.__dict__)
+        self.assertEqual(session.scheduler.sink, session.dispatcher.dispatch)
+
+    def test_exception(self):
+        """
+        A session raising while profiled is uninstrumented, with
+        the time up to the exception recorded.
+        """
+        profiler = SessionProfiler()
+        session = self._create_session(profiler)
+        strategy = session.strategy
+
+        def failing_calculate_signals(event):
+            if len(strategy.counts) == 2:
+                raise ValueError("Strategy failure")
+            TradeEveryNthBarStrategy.calculate_signals(strategy, event)
+        session.dispatcher.subscriptions[EventType.BAR] = [
+            (failing_calculate_signals, None)
+            if handler == strategy.calculate_signals else (handler, tickers)
+            for handler, tickers in session.dispatcher.subscriptions[
+                EventType.BAR
+            ]
+        ]
+        session.dispatcher.routes[EventType.BAR] = {}
+        with self.assertRaises(ValueError):
+            session.start_trading(testing=True)
+        self.assertGreater(profiler.wall_ns, 0)
+        self.assertEqual(profiler.events["BAR"].count, 2)
+        self._assert_uninstrumented(session)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import shutil
+import tempfile
+import unittest
+
+from bar_store import BarStorePriceHandler, write_bar_store
+from event_bus import DequeEventBus
+from helpers import TICKERS, TradeEveryNthBarStrategy, make_tickers_data
+from trading_session import MultiStrategySession, TradingSession
+
+
+class TestMultiStrategySession(unittest.TestCase):
+    """
+    Test that backtesting many strategies over one pass of the
+    data gives the same results as one session per strategy.
+    """
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+        self.store_path = tempfile.mkdtemp()
+        write_bar_store(self.store_path, make_tickers_data(30, 7))
+
+    def tearDown(self):
+        shutil.rmtree(self.output_dir)
+        shutil.rmtree(self.store_path)
+
+    def _run_single(self, n, snapshot):
+        events_queue = DequeEventBus()
+        session = TradingSession(
+            self.output_dir, TradeEveryNthBarStrategy(events_queue, n),
+            TICKERS, 100000.0, None, None, events_queue,
+            price_handler=BarStorePriceHandler(
+                events_queue, self.store_path, snapshot=snapshot
+            )
+        )
+        session.start_trading(testing=True)
+        return session
+
+    def _run_multi(self, ns, snapshot):
+        events_queue = DequeEventBus()
+        session = MultiStrategySession(
+            self.output_dir,
+            [TradeEveryNthBarStrategy(DequeEventBus(), n) for n in ns],
+            TICKERS, 100000.0, None, None, events_queue,
+            price_handler=BarStorePriceHandler(
+                events_queue, self.store_path, snapshot=snapshot
+            )
+        )
+        results = session.start_trading(testing=True)
+        return session, results
+
+    def test_matches_single_sessions(self):
+        ns = [2, 3, 5]
+        for snapshot in (False, True):
+            multi, results = self._run_multi(ns, snapshot)
+            self.assertEqual(len(results), len(ns))
+            for n, lane, result in zip(ns, multi.sessions, results):
+                single = self._run_single(n, snapshot)
+                self.assertEqual(lane.statistics.equity, single.statistics.equity)
+                self.assertEqual(
+                    lane.statistics.timeseries, single.statistics.timeseries
+                )
+                self.assertEqual(
+                    result["sharpe"], single.statistics.get_results()["sharpe"]
+                )
+                positions = lane.portfolio_handler.portfolio.positions
+                single_positions = single.portfolio_handler.portfolio.positions
+                self.assertEqual(sorted(positions), sorted(single_positions))
+                for ticker in positions:
+                    self.assertEqual(
+                        positions[ticker].quantity,
+                        single_positions[ticker].quantity
+                    )
+                    self.assertEqual(
+                        positions[ticker].realized_pnl,
+                        single_positions[ticker].realized_pnl
+                    )
+
+    def test_lanes_need_own_events_queue(self):
+        events_queue = DequeEventBus()
+        lane_queue = DequeEventBus()
+        price_handler = BarStorePriceHandler(events_queue, self.store_path)
+        for strategies in (
+            [TradeEveryNthBarStrategy(events_queue, 2)],
+            [TradeEveryNthBarStrategy(lane_queue, 2),
+             TradeEveryNthBarStrategy(lane_queue, 3)],
+        ):
+            with self.assertRaises(ValueError):
+                MultiStrategySession(
+                    self.output_dir, strategies, TICKERS, 100000.0,
+                    None, None, events_queue, price_handler=price_handler
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
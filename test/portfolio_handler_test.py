@@ -1,20 +1,23 @@
 import datetime
-from decimal import Decimal
 import queue
 import unittest
 
 from event import FillEvent, OrderEvent, SignalEvent
 from portfolio_handler import PortfolioHandler
+from price_parser import PriceParser
 
 class PriceHandlerMock(object):
     def __init__(self):
         pass
 
+    def istick(self):
+        return True
+
     def get_best_bid_ask(self, ticker):
         prices = {
-            "MSFT": (Decimal("50.28"), Decimal("50.31")),
-            "GOOG": (Decimal("705.46"), Decimal("705.46")),
-            "AMZN": (Decimal("564.14"), Decimal("565.14")),
+            "MSFT": (50.28, 50.31),
+            "GOOG": (705.46, 705.46),
+            "AMZN": (564.14, 565.14),
         }
         return prices[ticker]
 
@@ -57,7 +60,7 @@ class TestSimpleSignalOrderFillCycleForPortfolioHandler(unittest.TestCase):
         Set up the PortfolioHandler object supplying it with
         $500,000.00 USD in initial cash.
         """
-        initial_cash = Decimal("500000.00")
+        initial_cash = PriceParser.parse("500000.00")
         events_queue = queue.Queue()
         price_handler = PriceHandlerMock()
         position_sizer = PositionSizerMock()
@@ -99,13 +102,13 @@ class TestSimpleSignalOrderFillCycleForPortfolioHandler(unittest.TestCase):
         """
         fill_event_buy = FillEvent(
             datetime.datetime.utcnow(), "MSFT", "BOT",
-            100, "ARCA", Decimal("50.25"), Decimal("1.00")
+            100, "ARCA", PriceParser.parse("50.25"), PriceParser.parse("1.00")
         )
         self.portfolio_handler._convert_fill_to_portfolio_update(fill_event_buy)
 
         # Check the Portfolio values within the PortfolioHandler
         port = self.portfolio_handler.portfolio
-        self.assertEqual(port.cur_cash, Decimal("494974.00"))
+        self.assertEqual(PriceParser.display(port.cur_cash), 494974.00)
 
     def test_on_signal_basic_check(self):
         """
@@ -1,16 +1,20 @@
-from decimal import Decimal
+import pickle
 import unittest
 
 from portfolio import Portfolio
+from price_parser import PriceParser
 
 class PriceHandlerMock(object):
     def __init__(self):
         pass
 
+    def istick(self):
+        return True
+
     def get_best_bid_ask(self, ticker):
         prices = {
-            "GOOG": (Decimal("705.46"), Decimal("705.46")),
-            "AMZN": (Decimal("564.14"), Decimal("565.14")),
+            "GOOG": (705.46, 705.46),
+            "AMZN": (564.14, 565.14),
         }
         return prices[ticker]
 
@@ -32,9 +36,28 @@ class TestAmazonGooglePortfolio(unittest.TestCase):
         $500,000.00 USD in initial cash.
         """
         ph = PriceHandlerMock()
-        cash = Decimal("500000.00")
+        cash = PriceParser.parse("500000.00")
         self.portfolio = Portfolio(ph, cash)
 
+    def test_open_short(self):
+        """
+        The market value of a position opened by a sale is
+        deducted from the equity, as the shares are owed.
+        """
+        self.portfolio.transact_position(
+            "SLD", "GOOG", 100,
+            PriceParser.parse("705.46"), PriceParser.parse("1.00")
+        )
+        self.assertEqual(self.portfolio.positions["GOOG"].quantity, -100)
+        self.assertEqual(
+            self.portfolio.cur_cash, PriceParser.parse("570545.00")
+        )
+        self.assertEqual(self.portfolio.equity, PriceParser.parse("499999.00"))
+        self.assertEqual(
+            self.portfolio.unrealized_pnl, PriceParser.parse("-1.00")
+        )
+        self.assertTrue(self.portfolio.reconcile())
+
     def test_calculate_round_trip(self):
         """
         Purchase/sell multiple lots of AMZN and GOOG
@@ -44,68 +67,254 @@ class TestAmazonGooglePortfolio(unittest.TestCase):
         # Buy 300 of AMZN over two transactions
         self.portfolio.transact_position(
             "BOT", "AMZN", 100,
-            Decimal("566.56"), Decimal("1.00")
+            PriceParser.parse("566.56"), PriceParser.parse("1.00")
         )
         self.portfolio.transact_position(
             "BOT", "AMZN", 200,
-            Decimal("566.395"), Decimal("1.00")
+            PriceParser.parse("566.395"), PriceParser.parse("1.00")
         )
 
         # Buy 200 GOOG over one transaction
         self.portfolio.transact_position(
             "BOT", "GOOG", 200,
-            Decimal("707.50"), Decimal("1.00")
+            PriceParser.parse("707.50"), PriceParser.parse("1.00")
         )
 
         # Add to the AMZN position by 100 shares
         self.portfolio.transact_position(
             "SLD", "AMZN", 100,
-            Decimal("565.83"), Decimal("1.00")
+            PriceParser.parse("565.83"), PriceParser.parse("1.00")
         )
 
         # Add to the GOOG position by 200 shares
         self.portfolio.transact_position(
             "BOT", "GOOG", 200,
-            Decimal("705.545"), Decimal("1.00")
+            PriceParser.parse("705.545"), PriceParser.parse("1.00")
         )
 
         # Sell 200 of the AMZN shares
         self.portfolio.transact_position(
             "SLD", "AMZN", 200,
-            Decimal("565.59"), Decimal("1.00")
+            PriceParser.parse("565.59"), PriceParser.parse("1.00")
         )
 
         # Multiple transactions bundled into one (in IB)
         # Sell 300 GOOG from the portfolio
         self.portfolio.transact_position(
             "SLD", "GOOG", 100,
-            Decimal("704.92"), Decimal("1.00")
+            PriceParser.parse("704.92"), PriceParser.parse("1.00")
         )
 
         self.portfolio.transact_position(
             "SLD", "GOOG", 100,
-            Decimal("704.90"), Decimal("0.00")
+            PriceParser.parse("704.90"), PriceParser.parse("0.00")
         )
 
         self.portfolio.transact_position(
             "SLD", "GOOG", 100,
-            Decimal("704.92"), Decimal("0.50")
+            PriceParser.parse("704.92"), PriceParser.parse("0.50")
         )
 
         # Finally, sell the remaining GOOG 100 shares
         self.portfolio.transact_position(
             "SLD", "GOOG", 100,
-            Decimal("704.78"), Decimal("1.00")
+            PriceParser.parse("704.78"), PriceParser.parse("1.00")
         )
 
         # The figures below are derived from Interactive Brokers
         # demo account using the above trades with prices provided
         # by their demo feed.
-        self.assertEqual(self.portfolio.cur_cash, Decimal("499100.50"))
-        self.assertEqual(self.portfolio.equity, Decimal("499100.50"))
-        self.assertEqual(self.portfolio.unrealized_pnl, Decimal("0.00"))
-        self.assertEqual(self.portfolio.realized_pnl, Decimal("-899.50"))
+        self.assertEqual(
+            PriceParser.display(self.portfolio.cur_cash), 499100.50
+        )
+        self.assertEqual(PriceParser.display(self.portfolio.equity), 499100.50)
+        self.assertEqual(
+            PriceParser.display(self.portfolio.unrealized_pnl), 0.00
+        )
+        self.assertEqual(
+            PriceParser.display(self.portfolio.realized_pnl), -899.50
+        )
+
+
+class BarPriceHandlerMock(object):
+    def __init__(self, prices):
+        self.prices = prices
+
+    def istick(self):
+        return False
+
+    def isbar(self):
+        return True
+
+    def get_last_close(self, ticker):
+        return self.prices[ticker]
+
+
+class TestIncrementalPortfolio(unittest.TestCase):
+    """
+    Test that the running Portfolio totals, adjusted by the
+    change in value of each transacted or revalued Position,
+    agree exactly with totals calculated from scratch.
+    """
+    def setUp(self):
+        self.prices = {"AMZN": 564.0, "GOOG": 705.0, "MSFT": 55.0}
+        self.cash = PriceParser.parse(500000)
+        self.portfolio = Portfolio(
+            BarPriceHandlerMock(self.prices), self.cash
+        )
+
+    def _assert_reconciles(self):
+        portfolio = self.portfolio
+        positions = portfolio.positions.values()
+        closed_pnl = portfolio.round_trips.total_pnl()
+        self.assertEqual(
+            portfolio.cur_cash,
+            self.cash + closed_pnl +
+            sum(pt.net_incl_comm for pt in positions)
+        )
+        self.assertEqual(
+            portfolio.equity,
+            self.cash + closed_pnl + sum(pt.realized_pnl for pt in positions)
+        )
+        self.assertEqual(
+            portfolio.unrealized_pnl,
+            sum(pt.unrealized_pnl for pt in positions)
+        )
+        self.assertTrue(portfolio.reconcile())
+
+    def test_running_totals(self):
+        trades = [
+            ("BOT", "AMZN", 100, "566.56", "1.00"),
+            ("SLD", "MSFT", 300, "55.10", "1.50"),
+            ("BOT", "GOOG", 200, "707.50", "1.00"),
+            ("SLD", "AMZN", 50, "565.83", "1.00"),
+            ("BOT", "MSFT", 100, "54.80", "1.00"),
+            ("SLD", "GOOG", 200, "704.92", "1.00"),
+        ]
+        for i, (action, ticker, quantity, price, commission) in enumerate(
+            trades
+        ):
+            self.portfolio.transact_position(
+                action, ticker, quantity,
+                PriceParser.parse(price), PriceParser.parse(commission)
+            )
+            self._assert_reconciles()
+            self.prices[ticker] += 1.25 * (-1) ** i
+            if ticker in self.portfolio.positions:
+                self.portfolio.update_market_value(ticker)
+                self._assert_reconciles()
+            for t in self.prices:
+                self.prices[t] *= 1.01
+            self.portfolio.update_market_values()
+            self._assert_reconciles()
+        self.assertEqual(self.portfolio.positions["MSFT"].quantity, -200)
+        self.assertNotIn("GOOG", self.portfolio.positions)
+        self.assertEqual(len(self.portfolio.round_trips), 1)
 
+    def test_reconcile(self):
+        self.portfolio.transact_position(
+            "BOT", "AMZN", 100,
+            PriceParser.parse("566.56"), PriceParser.parse("1.00")
+        )
+        equity = self.portfolio.equity
+        self.portfolio.equity += PriceParser.parse(10)
+        self.assertFalse(self.portfolio.reconcile())
+        self.assertEqual(self.portfolio.equity, equity)
+
+        # The running totals are reconciled on every second
+        # revaluation
+        self.portfolio.reconcile_every = 2
+        cash = self.portfolio.cur_cash
+        self.portfolio.cur_cash += PriceParser.parse(10)
+        self.portfolio.update_market_values()
+        self.assertEqual(self.portfolio.cur_cash, cash + PriceParser.parse(10))
+        self.portfolio.update_market_values()
+        self.assertEqual(self.portfolio.cur_cash, cash)
+
+
+class DirtyBarPriceHandlerMock(BarPriceHandlerMock):
+    dirty_sets = ()
+
+    def register_dirty_set(self):
+        dirty = {}
+        self.dirty_sets = self.dirty_sets + (dirty,)
+        return dirty
+
+    def store_price(self, ticker, price):
+        self.prices[ticker] = price
+        for dirty in self.dirty_sets:
+            dirty[ticker] = None
+
+
+class TestDirtyPortfolio(unittest.TestCase):
+    """
+    Test that only the Positions in tickers whose prices have
+    been stored since they were last valued are revalued, once
+    the equity is read.
+    """
+    def setUp(self):
+        self.tickers = ["T{:03d}".format(i) for i in range(200)]
+        self.price_handler = DirtyBarPriceHandlerMock(
+            dict((ticker, 100.0) for ticker in self.tickers)
+        )
+        self.portfolio = Portfolio(
+            self.price_handler, PriceParser.parse(1000000)
+        )
+        for ticker in self.tickers:
+            self.portfolio.transact_position(
+                "BOT", ticker, 10, PriceParser.parse(100), PriceParser.parse(1)
+            )
+
+    def _count_revaluations(self):
+        revalued = []
+        update_market_value = self.portfolio.update_market_value
+
+        def counting_update(ticker):
+            revalued.append(ticker)
+            update_market_value(ticker)
+        self.portfolio.update_market_value = counting_update
+        return revalued
+
+    def test_revalues_dirty_positions(self):
+        revalued = self._count_revaluations()
+        self.portfolio.update_market_values()
+        self.assertEqual(revalued, [])
+        self.assertEqual(
+            self.portfolio.equity, PriceParser.parse(1000000 - 200)
+        )
+
+        changed = self.tickers[10:15]
+        for ticker in changed:
+            self.price_handler.store_price(ticker, 101.0)
+        self.price_handler.store_price("NOTHELD", 50.0)
+
+        # The equity is marked to market when read, without
+        # an explicit revaluation
+        self.assertEqual(
+            self.portfolio.equity, PriceParser.parse(1000000 - 200 + 50)
+        )
+        self.assertEqual(revalued, changed)
+        self.assertEqual(
+            self.portfolio.unrealized_pnl, PriceParser.parse(50 - 200)
+        )
+        self.portfolio.update_market_values()
+        self.assertEqual(revalued, changed)
+        self.assertTrue(self.portfolio.reconcile())
+
+    def test_pickle(self):
+        """
+        An unpickled Portfolio registers a new dirty set with its
+        price handler, marking every Position dirty.
+        """
+        portfolio = pickle.loads(pickle.dumps(self.portfolio))
+        price_handler = portfolio.price_handler
+        self.assertIs(portfolio.dirty, price_handler.dirty_sets[-1])
+        self.assertEqual(list(portfolio.dirty), self.tickers)
+        self.assertEqual(portfolio.equity, self.portfolio.equity)
+        price_handler.store_price(self.tickers[0], 110.0)
+        self.assertEqual(
+            portfolio.equity, self.portfolio.equity + PriceParser.parse(100)
+        )
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,188 @@
+import pickle
+import unittest
+
+import numpy as np
+
+from portfolio import Portfolio
+from position import Position
+from position_book import POSITION_FIELDS, PositionBook, PositionView
+from price_parser import PriceParser
+
+
+class BarPriceHandlerMock(object):
+    def __init__(self, prices, dirty=True):
+        self.prices = prices
+        self.dirty_sets = ()
+        if not dirty:
+            self.register_dirty_set = None
+
+    def istick(self):
+        return False
+
+    def isbar(self):
+        return True
+
+    def get_last_close(self, ticker):
+        return self.prices[ticker]
+
+    def register_dirty_set(self):
+        dirty = {}
+        self.dirty_sets = self.dirty_sets + (dirty,)
+        return dirty
+
+    def store_price(self, ticker, price):
+        self.prices[ticker] = price
+        for dirty in self.dirty_sets:
+            dirty[ticker] = None
+
+
+TRADES = [
+    (action, ticker, quantity,
+     PriceParser.parse(price), PriceParser.parse(commission))
+    for action, ticker, quantity, price, commission in [
+        ("BOT", "AMZN", 100, "566.56", "1.00"),
+        ("SLD", "MSFT", 300, "55.10", "1.50"),
+        ("BOT", "GOOG", 200, "707.50", "1.00"),
+        ("SLD", "AMZN", 50, "565.83", "1.00"),
+        ("BOT", "MSFT", 100, "54.80", "1.00"),
+        ("SLD", "GOOG", 200, "704.92", "1.00"),
+        ("BOT", "AMZN", 25, "567.10", "0.50"),
+    ]
+]
+
+
+class TestPositionBook(unittest.TestCase):
+    """
+    Test that a Portfolio holding its Positions in a PositionBook
+    gives the same values as one holding a dictionary of them.
+    """
+    def _portfolios(self, dirty=True):
+        portfolios = []
+        for positions in (None, PositionBook(capacity=2)):
+            price_handler = BarPriceHandlerMock(
+                {"AMZN": 564.0, "GOOG": 705.0, "MSFT": 55.0}, dirty
+            )
+            portfolios.append((price_handler, Portfolio(
+                price_handler, PriceParser.parse(500000), positions=positions
+            )))
+        return portfolios
+
+    def _assert_same(self, portfolio, book_portfolio):
+        self.assertEqual(
+            list(book_portfolio.positions), list(portfolio.positions)
+        )
+        for ticker, pt in portfolio.positions.items():
+            view = book_portfolio.positions[ticker]
+            self.assertIsInstance(view, PositionView)
+            self.assertEqual(view.ticker, ticker)
+            self.assertEqual(view.action, pt.action)
+            for name in POSITION_FIELDS:
+                self.assertEqual(getattr(view, name), getattr(pt, name), name)
+        for name in ("cur_cash", "equity", "unrealized_pnl", "realized_pnl"):
+            self.assertEqual(
+                getattr(book_portfolio, name), getattr(portfolio, name)
+            )
+
+    def test_transactions_and_revaluation(self):
+        for dirty in (True, False):
+            portfolios = self._portfolios(dirty)
+            for i, trade in enumerate(TRADES):
+                for price_handler, portfolio in portfolios:
+                    portfolio.transact_position(*trade)
+                    for ticker in sorted(price_handler.prices):
+                        price_handler.store_price(
+                            ticker,
+                            price_handler.prices[ticker] * (1.0 + 0.01 * i)
+                        )
+                    portfolio.update_market_values()
+                self._assert_same(portfolios[0][1], portfolios[1][1])
+            book_portfolio = portfolios[1][1]
+            self.assertEqual(book_portfolio.positions["MSFT"].quantity, -200)
+            self.assertTrue(book_portfolio.reconcile())
+
+    def test_revalue(self):
+        book = PositionBook(capacity=1)
+        positions = []
+        rng = np.random.RandomState(3)
+        for i in range(10):
+            position = Position(
+                "BOT" if i % 3 else "SLD", "T{}".format(i), 10 * (i + 1),
+                PriceParser.parse(100 + i), PriceParser.parse(1),
+                PriceParser.parse(100), PriceParser.parse(100)
+            )
+            book["T{}".format(i)] = position
+            positions.append(position)
+        self.assertEqual(len(book), 10)
+
+        bids = PriceParser.parse_array(100.0 + rng.normal(0.0, 1.0, 10))
+        asks = bids + PriceParser.parse("0.02")
+        index = book.index_of(["T7", "T2", "T5"])
+        d_unrealized, _, d_market_value = book.revalue(
+            bids[index], asks[index], index
+        )
+        old_values = sum(positions[i].market_value for i in index)
+        for i in index:
+            positions[i].update_market_value(int(bids[i]), int(asks[i]))
+        self.assertEqual(
+            d_market_value,
+            sum(positions[i].market_value for i in index) - old_values
+        )
+
+        book.revalue(bids, asks)
+        for i, position in enumerate(positions):
+            position.update_market_value(int(bids[i]), int(asks[i]))
+            view = book["T{}".format(i)]
+            for name in ("market_value", "unrealized_pnl", "realized_pnl"):
+                self.assertEqual(getattr(view, name), getattr(position, name))
+        np.testing.assert_array_equal(
+            book.column("quantity"), [p.quantity for p in positions]
+        )
+
+        with self.assertRaises(ValueError):
+            book["T0"] = positions[0]
+
+    def test_revalue_overflow(self):
+        # Each position, worth $8e11, fits the int64 columns, but
+        # their total of $3.2e12 does not
+        book = PositionBook()
+        positions = []
+        for i in range(4):
+            position = Position(
+                "BOT", "T{}".format(i), 10 ** 9, PriceParser.parse(800),
+                0, PriceParser.parse(800), PriceParser.parse(800)
+            )
+            book["T{}".format(i)] = position
+            positions.append(position)
+        self.assertEqual(
+            book.revalue([0] * 4, [0] * 4)[2],
+            -sum(position.market_value for position in positions)
+        )
+        prices = np.full(4, PriceParser.parse(810))
+        d_unrealized, d_realized, d_market_value = book.revalue(prices, prices)
+        self.assertEqual(d_market_value, 4 * 10 ** 9 * PriceParser.parse(810))
+        self.assertEqual(d_unrealized, d_market_value)
+        self.assertEqual(d_realized, d_market_value)
+
+        # A position worth $1e12 does not fit, and is left unchanged
+        prices[0] = PriceParser.parse(1000)
+        with self.assertRaises(OverflowError):
+            book.revalue(prices, prices)
+        self.assertEqual(
+            book["T0"].market_value, 10 ** 9 * PriceParser.parse(810)
+        )
+
+    def test_pickle(self):
+        _, portfolio = self._portfolios()[1]
+        for trade in TRADES:
+            portfolio.transact_position(*trade)
+        restored = pickle.loads(pickle.dumps(portfolio))
+        self.assertIs(restored.positions["MSFT"].book, restored.positions)
+        self.assertEqual(restored.equity, portfolio.equity)
+        self.assertEqual(
+            restored.positions["AMZN"].avg_bot,
+            portfolio.positions["AMZN"].avg_bot
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,7 @@
-from decimal import Decimal
 import unittest
 
 from position import Position
+from price_parser import PriceParser
 
 
 class TestRoundTripXOMPosition(unittest.TestCase):
@@ -15,9 +15,9 @@ class TestRoundTripXOMPosition(unittest.TestCase):
         Set up the Position object that will store the PnL.
         """
         self.position = Position(
-            "BOT", "XOM", Decimal('100'),
-            Decimal("74.78"), Decimal("1.00"),
-            Decimal("74.78"), Decimal("74.80")
+            "BOT", "XOM", 100,
+            PriceParser.parse("74.78"), PriceParser.parse("1.00"),
+            PriceParser.parse("74.78"), PriceParser.parse("74.80")
         )
 
     def test_calculate_round_trip(self):
@@ -29,39 +29,55 @@ class TestRoundTripXOMPosition(unittest.TestCase):
         via Interactive Brokers' Trader Workstation (TWS).
         """
         self.position.transact_shares(
-            "BOT", Decimal("100"), Decimal("74.63"), Decimal("1.00")
+            "BOT", 100, PriceParser.parse("74.63"),
+            PriceParser.parse("1.00")
         )
         self.position.transact_shares(
-            "BOT", Decimal("250"), Decimal("74.620"), Decimal("1.25")
+            "BOT", 250, PriceParser.parse("74.620"),
+            PriceParser.parse("1.25")
         )
         self.position.transact_shares(
-            "SLD", Decimal("200"), Decimal("74.58"), Decimal("1.00")
+            "SLD", 200, PriceParser.parse("74.58"),
+            PriceParser.parse("1.00")
         )
         self.position.transact_shares(
-            "SLD", Decimal("250"), Decimal("75.26"), Decimal("1.25")
+            "SLD", 250, PriceParser.parse("75.26"),
+            PriceParser.parse("1.25")
+        )
+        self.position.update_market_value(
+            PriceParser.parse("77.75"), PriceParser.parse("77.77")
         )
-        self.position.update_market_value(Decimal("77.75"), Decimal("77.77"))
 
         self.assertEqual(self.position.action, "BOT")
         self.assertEqual(self.position.ticker, "XOM")
-        self.assertEqual(self.position.quantity, Decimal("0"))
-
-        self.assertEqual(self.position.buys, Decimal("450"))
-        self.assertEqual(self.position.sells, Decimal("450"))
-        self.assertEqual(self.position.net, Decimal("0"))
-        self.assertEqual(self.position.avg_bot, Decimal("74.65778"))
-        self.assertEqual(self.position.avg_sld, Decimal("74.95778"))
-        self.assertEqual(self.position.total_bot, Decimal("33596.00"))
-        self.assertEqual(self.position.total_sld, Decimal("33731.00"))
-        self.assertEqual(self.position.total_commission, Decimal("5.50"))
-        self.assertEqual(self.position.net_incl_comm, Decimal("129.50"))
+        self.assertEqual(self.position.quantity, 0)
+
+        self.assertEqual(self.position.buys, 450)
+        self.assertEqual(self.position.sells, 450)
+        self.assertEqual(self.position.net, 0)
+        self.assertEqual(self.position.avg_bot, 746577777)
+        self.assertEqual(self.position.avg_sld, 749577777)
+        self.assertEqual(
+            self.position.total_bot, PriceParser.parse("33596.00")
+        )
+        self.assertEqual(
+            self.position.total_sld, PriceParser.parse("33731.00")
+        )
+        self.assertEqual(
+            self.position.total_commission, PriceParser.parse("5.50")
+        )
+        self.assertEqual(
+            self.position.net_incl_comm, PriceParser.parse("129.50")
+        )
 
         # need to understand more the following
-        self.assertEqual(self.position.avg_price, Decimal("74.665"))
-        self.assertEqual(self.position.cost_basis, Decimal("0.00"))
-        self.assertEqual(self.position.market_value, Decimal("0.00"))
-        self.assertEqual(self.position.unrealized_pnl, Decimal("0.00"))
-        self.assertEqual(self.position.realized_pnl, Decimal("129.50"))
+        self.assertEqual(self.position.avg_price, PriceParser.parse("74.665"))
+        self.assertEqual(self.position.cost_basis, 0)
+        self.assertEqual(self.position.market_value, 0)
+        self.assertEqual(self.position.unrealized_pnl, 0)
+        self.assertEqual(
+            self.position.realized_pnl, PriceParser.parse("129.50")
+        )
 
 
 
@@ -73,9 +89,9 @@ class TestRoundTripPGPosition(unittest.TestCase):
     """
     def setUp(self):
         self.position = Position(
-            "SLD", "PG", Decimal('100'),
-            Decimal("77.69"), Decimal("1.00"),
-            Decimal('77.68'), Decimal('77.70')
+            "SLD", "PG", 100,
+            PriceParser.parse("77.69"), PriceParser.parse("1.00"),
+            PriceParser.parse("77.68"), PriceParser.parse("77.70")
         )
 
     def test_calculate_round_trip(self):
@@ -87,39 +103,97 @@ class TestRoundTripPGPosition(unittest.TestCase):
         via Interactive Brokers' Trader Workstation (TWS).
         """
         self.position.transact_shares(
-            "SLD", Decimal('100'), Decimal('77.68'), Decimal('1.00')
+            "SLD", 100, PriceParser.parse("77.68"),
+            PriceParser.parse("1.00")
         )
         self.position.transact_shares(
-            "SLD", Decimal('50'), Decimal('77.70'), Decimal('1.00')
+            "SLD", 50, PriceParser.parse("77.70"),
+            PriceParser.parse("1.00")
         )
         self.position.transact_shares(
-            "BOT", Decimal('100'), Decimal('77.77'), Decimal('1.00')
+            "BOT", 100, PriceParser.parse("77.77"),
+            PriceParser.parse("1.00")
         )
         self.position.transact_shares(
-            "BOT", Decimal('150'), Decimal('77.73'), Decimal('1.00')
+            "BOT", 150, PriceParser.parse("77.73"),
+            PriceParser.parse("1.00")
+        )
+        self.position.update_market_value(
+            PriceParser.parse("77.72"), PriceParser.parse("77.72")
         )
-        self.position.update_market_value(Decimal("77.72"), Decimal("77.72"))
 
         self.assertEqual(self.position.action, "SLD")
         self.assertEqual(self.position.ticker, "PG")
-        self.assertEqual(self.position.quantity, Decimal("0"))
-
-        self.assertEqual(self.position.buys, Decimal("250"))
-        self.assertEqual(self.position.sells, Decimal("250"))
-        self.assertEqual(self.position.net, Decimal("0"))
-        self.assertEqual(self.position.avg_bot, Decimal("77.746"))
-        self.assertEqual(self.position.avg_sld, Decimal("77.688"))
-        self.assertEqual(self.position.total_bot, Decimal("19436.50"))
-        self.assertEqual(self.position.total_sld, Decimal("19422.00"))
-        self.assertEqual(self.position.net_total, Decimal("-14.50"))
-        self.assertEqual(self.position.total_commission, Decimal("5.00"))
-        self.assertEqual(self.position.net_incl_comm, Decimal("-19.50"))
-
-        self.assertEqual(self.position.avg_price, Decimal("77.67600"))
-        self.assertEqual(self.position.cost_basis, Decimal("0.00"))
-        self.assertEqual(self.position.market_value, Decimal("0.00"))
-        self.assertEqual(self.position.unrealized_pnl, Decimal("0.00"))
-        self.assertEqual(self.position.realized_pnl, Decimal("-19.50"))
+        self.assertEqual(self.position.quantity, 0)
+
+        self.assertEqual(self.position.buys, 250)
+        self.assertEqual(self.position.sells, 250)
+        self.assertEqual(self.position.net, 0)
+        self.assertEqual(self.position.avg_bot, PriceParser.parse("77.746"))
+        self.assertEqual(self.position.avg_sld, PriceParser.parse("77.688"))
+        self.assertEqual(
+            self.position.total_bot, PriceParser.parse("19436.50")
+        )
+        self.assertEqual(
+            self.position.total_sld, PriceParser.parse("19422.00")
+        )
+        self.assertEqual(self.position.net_total, PriceParser.parse("-14.50"))
+        self.assertEqual(
+            self.position.total_commission, PriceParser.parse("5.00")
+        )
+        self.assertEqual(
+            self.position.net_incl_comm, PriceParser.parse("-19.50")
+        )
+
+        self.assertEqual(self.position.avg_price, PriceParser.parse("77.676"))
+        self.assertEqual(self.position.cost_basis, 0)
+        self.assertEqual(self.position.market_value, 0)
+        self.assertEqual(self.position.unrealized_pnl, 0)
+        self.assertEqual(
+            self.position.realized_pnl, PriceParser.parse("-19.50")
+        )
+
+
+class TestShortPosition(unittest.TestCase):
+    """
+    Test that a Position opened by a sale of 100 shares of PG
+    holds a negative quantity, and so a negative market value,
+    before any further transaction.
+    """
+    def test_open_short(self):
+        position = Position(
+            "SLD", "PG", 100,
+            PriceParser.parse("77.69"), PriceParser.parse("1.00"),
+            PriceParser.parse("77.68"), PriceParser.parse("77.70")
+        )
+        self.assertEqual(position.quantity, -100)
+        self.assertEqual(position.net, -100)
+        self.assertEqual(position.avg_price, PriceParser.parse("77.68"))
+        self.assertEqual(position.cost_basis, PriceParser.parse("-7768.00"))
+        self.assertEqual(
+            position.market_value, PriceParser.parse("-7769.00")
+        )
+        self.assertEqual(position.unrealized_pnl, PriceParser.parse("-1.00"))
+        self.assertEqual(position.realized_pnl, PriceParser.parse("-1.00"))
+
+class TestExactTotals(unittest.TestCase):
+    """
+    Test that the totals bought and sold are exact, rather than
+    rebuilt from averages rounded down to the multiplier.
+    """
+    def test_large_buy_after_small_buy(self):
+        position = Position(
+            "BOT", "XOM", 3,
+            PriceParser.parse("10.00"), 0,
+            PriceParser.parse("10.00"), PriceParser.parse("10.00")
+        )
+        position.transact_shares(
+            "BOT", 1000000, PriceParser.parse("10.01"), 0
+        )
+        self.assertEqual(position.total_bot, PriceParser.parse("10010030.00"))
+        self.assertEqual(position.net_total, PriceParser.parse("-10010030.00"))
+        # The average is rounded down from 10.00999997...
+        self.assertEqual(position.avg_bot, PriceParser.parse("10.0099999"))
 
 
 if __name__ == "__main__":
@@ -1,10 +1,11 @@
 import unittest
 from price_handler import HistoricQuandlBarPriceHandler
+from bar_stream import ColumnarBarStream
 import queue
 import quandl
 import numpy as np
-import types
 import pandas as pd
+from unittest import mock
 
 
 class TestHistoricQuandlBarPriceHandler(unittest.TestCase):
@@ -37,7 +38,7 @@ class TestHistoricQuandlBarPriceHandler(unittest.TestCase):
         """
         check _merge_sort_ticker_data()
         """
-        self.assertEqual(type(self.price_handler.bar_stream), types.GeneratorType)
+        self.assertIsInstance(self.price_handler.bar_stream, ColumnarBarStream)
         # need to also check adding start_date, end_date will mess things up
 
     def test_subscribe_ticker(self):
@@ -104,7 +105,7 @@ class TestHistoricQuandlBarPriceHandlerWithStartAndEndDate(unittest.TestCase):
         """
         check _merge_sort_ticker_data()
         """
-        self.assertEqual(type(self.price_handler.bar_stream), types.GeneratorType)
+        self.assertIsInstance(self.price_handler.bar_stream, ColumnarBarStream)
         # need to also check adding start_date, end_date will mess things up
 
     def test_subscribe_ticker(self):
@@ -139,5 +140,96 @@ class TestHistoricQuandlBarPriceHandlerWithStartAndEndDate(unittest.TestCase):
         self.assertEqual(self.price_handler.tickers["AMZN"]["timestamp"], pd.to_datetime("2015-01-02"))
 
 
+def _quandl_get_mock(code):
+    """
+    Stands in for quandl.get, returning a few days of data
+    for "GOOG", "AMZN" and "MSFT" and failing for any other code.
+    """
+    ticker = code.split("/")[1]
+    prices = {"AMZN": 300.0, "GOOG": 500.0, "MSFT": 50.0}
+    if ticker not in prices:
+        raise ValueError("Unknown code {}".format(code))
+    dates = pd.bdate_range("2015-01-02", periods=3)
+    close = [prices[ticker] + i for i in range(3)]
+    return pd.DataFrame({
+        "Open": close, "Low": close, "High": close, "Close": close,
+        "Volume": [1000.0] * 3, "Adj_Close": close
+    }, index=dates)
+
+
+class TestHistoricQuandlBarPriceHandlerConcurrentSubscription(unittest.TestCase):
+    """
+    Test the concurrent subscription of tickers to the
+    HistoricQuandlBarPriceHandler, with a mocked Quandl.
+    """
+    def _create_price_handler(self, max_workers):
+        with mock.patch("price_handler.quandl.get", _quandl_get_mock):
+            return HistoricQuandlBarPriceHandler(
+                queue.Queue(), init_tickers=["MSFT", "XXXX", "GOOG", "AMZN"],
+                max_workers=max_workers
+            )
+
+    def test_subscribe_tickers(self):
+        """
+        The subscribed tickers are ordered as given whatever the
+        number of workers, and failures are collected.
+        """
+        for max_workers in (1, 4):
+            price_handler = self._create_price_handler(max_workers)
+            self.assertEqual(
+                list(price_handler.tickers.keys()), ["MSFT", "GOOG", "AMZN"]
+            )
+            self.assertEqual(
+                list(price_handler.tickers_data.keys()), ["MSFT", "GOOG", "AMZN"]
+            )
+            self.assertEqual(list(price_handler.subscribe_errors.keys()), ["XXXX"])
+            self.assertEqual(price_handler.tickers["GOOG"]["close"], 500.0)
+
+
+class TestHistoricQuandlBarPriceHandlerAdjReturns(unittest.TestCase):
+    """
+    Test the precalculated adjusted closing price returns of
+    the HistoricQuandlBarPriceHandler, with a mocked Quandl.
+    """
+    def _stream(self, start_date=None, snapshot=False):
+        with mock.patch("price_handler.quandl.get", _quandl_get_mock):
+            price_handler = HistoricQuandlBarPriceHandler(
+                queue.Queue(), init_tickers=["GOOG", "AMZN"],
+                start_date=start_date, calc_adj_returns=True,
+                max_workers=1, snapshot=snapshot
+            )
+        rets = []
+        while True:
+            price_handler.stream_next()
+            if not price_handler.continue_backtest:
+                break
+            if price_handler.adj_close_return_index["GOOG"] > len(rets):
+                rets.append(price_handler.tickers["GOOG"]["adj_close_ret"])
+        return price_handler, rets
+
+    def test_adj_close_returns(self):
+        """
+        The first bar of each ticker has no return, and the
+        first bar after start_date is relative to the bar before.
+        """
+        price_handler, rets = self._stream()
+        self.assertEqual(len(price_handler.adj_close_returns["GOOG"]), 3)
+        self.assertTrue(np.isnan(rets[0]))
+        self.assertAlmostEqual(rets[-1], 502.0 / 501.0 - 1.0)
+        self.assertAlmostEqual(
+            price_handler.tickers["AMZN"]["adj_close_ret"], 302.0 / 301.0 - 1.0
+        )
+
+        for snapshot in (False, True):
+            price_handler, rets = self._stream(
+                start_date=pd.Timestamp("2015-01-05"), snapshot=snapshot
+            )
+            self.assertEqual(
+                price_handler.adj_close_returns["AMZN"].tolist(),
+                [301.0 / 300.0 - 1.0, 302.0 / 301.0 - 1.0]
+            )
+            self.assertAlmostEqual(rets[0], 501.0 / 500.0 - 1.0)
+
+
 if __name__ == "__main__":
     unittest.main()
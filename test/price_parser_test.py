@@ -1,26 +1,55 @@
 import unittest
+from decimal import Decimal
+
+import numpy as np
+
 from price_parser import PriceParser
 
 
-print(PriceParser.display("10"))
-
-
-
-# class TestPriceParser(unittest.TestCase):
-#     """
-#     Test PriceParser
-#     """
-#
-#     def test_parse(self):
-#         """
-#         Test parse.
-#         """
-#         self.assertEqual(PriceParser.parse(10), "MSFT")
-#         self.assertEqual(PriceParser.parse("10"), "BOT")
-#         self.assertEqual(PriceParser.parse(10.0), 0)
-#
-#
-#
-#
-# if __name__ == "__main__":
-#     unittest.main()
+class TestPriceParser(unittest.TestCase):
+    """
+    Test PriceParser
+    """
+
+    def test_parse(self):
+        """
+        Test parse.
+        """
+        self.assertEqual(PriceParser.parse(10), 100000000)
+        self.assertEqual(PriceParser.parse("10"), 100000000)
+        self.assertEqual(PriceParser.parse(10.0), 100000000)
+        self.assertEqual(PriceParser.parse(Decimal("10.5")), 105000000)
+        self.assertEqual(PriceParser.parse(0.1), 1000000)
+        self.assertEqual(PriceParser.parse("50.28"), 502800000)
+        self.assertEqual(PriceParser.parse(50.28), 502800000)
+        self.assertEqual(PriceParser.parse(-705.46), -7054600000)
+        self.assertIsInstance(PriceParser.parse(np.int64(3)), int)
+        with self.assertRaises(ValueError):
+            PriceParser.parse(float("nan"))
+
+    def test_parse_array(self):
+        """
+        Test parse_array.
+        """
+        parsed = PriceParser.parse_array([50.28, 705.46, -0.1])
+        self.assertEqual(parsed.dtype, np.int64)
+        self.assertEqual(
+            parsed.tolist(),
+            [PriceParser.parse("50.28"), PriceParser.parse("705.46"),
+             PriceParser.parse("-0.1")]
+        )
+        with self.assertRaises(ValueError):
+            PriceParser.parse_array([50.28, np.nan])
+
+    def test_display(self):
+        """
+        Test display.
+        """
+        self.assertEqual(PriceParser.display(PriceParser.parse(10)), 10.0)
+        self.assertEqual(PriceParser.display(502812345), 50.28)
+        self.assertEqual(PriceParser.display(502812345, 4), 50.2812)
+        self.assertEqual(PriceParser.display(502812345, None), 50.2812345)
+
+
+if __name__ == "__main__":
+    unittest.main()
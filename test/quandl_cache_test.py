@@ -0,0 +1,119 @@
+import datetime
+import os
+import shutil
+import tempfile
+import unittest
+
+import pandas as pd
+
+from quandl_cache import QuandlCache
+
+
+class DownloaderMock(object):
+    """
+    Stands in for quandl.get, returning a daily series, with the
+    column names of the Quandl EOD dataset, up to the "end" date
+    and recording every request made.
+    """
+    def __init__(self, end="2015-01-09"):
+        self.end = end
+        self.adjustment = 1.0
+        self.calls = []
+
+    def __call__(self, code, start_date=None):
+        self.calls.append((code, start_date))
+        dates = pd.bdate_range("2015-01-01", self.end)
+        close = [100.0 + i for i in range(len(dates))]
+        df = pd.DataFrame({
+            "Open": close, "High": close, "Low": close,
+            "Close": close, "Volume": [1000.0] * len(close),
+            "Adj_Close": [c * self.adjustment for c in close]
+        }, index=dates)
+        if start_date is not None:
+            df = df[df.index >= pd.Timestamp(start_date)]
+        return df
+
+
+class TestQuandlCache(unittest.TestCase):
+    """
+    Test QuandlCache with a mocked Quandl downloader.
+    """
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.downloader = DownloaderMock()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def test_cold_then_warm(self):
+        """
+        The first request downloads and writes the series, the
+        second is served from disk without touching the network.
+        """
+        cache = QuandlCache(self.cache_dir, downloader=self.downloader)
+        cold = cache.get("EOD", "GOOG")
+        self.assertTrue(
+            os.path.exists(os.path.join(self.cache_dir, "EOD", "GOOG.pkl"))
+        )
+        warm = cache.get("EOD", "GOOG")
+        self.assertEqual(self.downloader.calls, [("EOD/GOOG", None)])
+        pd.testing.assert_frame_equal(cold, warm)
+
+    def test_incremental_top_up(self):
+        """
+        A stale series only requests the dates from the
+        last cached bar.
+        """
+        QuandlCache(self.cache_dir, downloader=self.downloader).get("EOD", "GOOG")
+        self.downloader.end = "2015-01-14"
+        cache = QuandlCache(
+            self.cache_dir, max_age=datetime.timedelta(0),
+            downloader=self.downloader
+        )
+        data = cache.get("EOD", "GOOG")
+        self.assertEqual(self.downloader.calls[-1], ("EOD/GOOG", "2015-01-09"))
+        self.assertEqual(len(self.downloader.calls), 2)
+        self.assertEqual(data.index[-1], pd.Timestamp("2015-01-14"))
+        self.assertTrue(data.index.is_unique)
+        self.assertEqual(len(data), 10)
+        self.assertEqual(
+            os.listdir(os.path.join(self.cache_dir, "EOD")), ["GOOG.pkl"]
+        )
+
+    def test_revised_adjusted_close(self):
+        """
+        A stale series whose last adjusted close has been revised
+        since it was cached is downloaded again in full.
+        """
+        QuandlCache(self.cache_dir, downloader=self.downloader).get("EOD", "GOOG")
+        self.downloader.end = "2015-01-14"
+        self.downloader.adjustment = 0.5
+        cache = QuandlCache(
+            self.cache_dir, max_age=datetime.timedelta(0),
+            downloader=self.downloader
+        )
+        data = cache.get("EOD", "GOOG")
+        self.assertEqual(
+            self.downloader.calls[1:],
+            [("EOD/GOOG", "2015-01-09"), ("EOD/GOOG", None)]
+        )
+        self.assertEqual(len(data), 10)
+        self.assertEqual(data["Adj_Close"].iloc[0], 50.0)
+        pd.testing.assert_frame_equal(data, cache.get("EOD", "GOOG"))
+
+    def test_offline(self):
+        """
+        Offline mode never calls the downloader and raises
+        if the series has not been cached.
+        """
+        cache = QuandlCache(
+            self.cache_dir, offline=True, downloader=self.downloader
+        )
+        self.assertRaises(IOError, cache.get, "EOD", "GOOG")
+        QuandlCache(self.cache_dir, downloader=self.downloader).get("EOD", "GOOG")
+        self.assertEqual(len(cache.get("EOD", "GOOG")), 7)
+        self.assertEqual(len(self.downloader.calls), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
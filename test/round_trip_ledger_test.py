@@ -0,0 +1,169 @@
+import pickle
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from portfolio import Portfolio
+from position import Position
+from position_book import PositionBook
+from price_parser import PriceParser
+from round_trip_ledger import RoundTripLedger
+
+
+class BarPriceHandlerMock(object):
+    def __init__(self, prices):
+        self.prices = prices
+
+    def istick(self):
+        return False
+
+    def isbar(self):
+        return True
+
+    def get_last_close(self, ticker):
+        return self.prices[ticker]
+
+
+class TestRoundTripLedger(unittest.TestCase):
+    """
+    Test recording closed Positions in a RoundTripLedger.
+    """
+    def _closed_position(self, action, ticker, quantity, entry, exit):
+        position = Position(
+            action, ticker, quantity, PriceParser.parse(entry),
+            PriceParser.parse(1), PriceParser.parse(entry),
+            PriceParser.parse(entry)
+        )
+        position.transact_shares(
+            "SLD" if action == "BOT" else "BOT", quantity,
+            PriceParser.parse(exit), PriceParser.parse(1)
+        )
+        return position
+
+    def test_append(self):
+        ledger = RoundTripLedger(capacity=1)
+        ledger.append(
+            self._closed_position("BOT", "AMZN", 100, "500.00", "510.00"),
+            pd.Timestamp("2015-01-02"), pd.Timestamp("2015-01-05")
+        )
+        ledger.append(
+            self._closed_position("SLD", "GOOG", 10, "700.00", "690.50")
+        )
+        ledger.append(
+            self._closed_position("BOT", "AMZN", 50, "510.00", "505.00"),
+            pd.Timestamp("2015-01-06"), pd.Timestamp("2015-01-07")
+        )
+        self.assertEqual(len(ledger), 3)
+        self.assertEqual(ledger.tickers, ["AMZN", "GOOG"])
+        np.testing.assert_array_equal(ledger.column("ticker_id"), [0, 1, 0])
+        np.testing.assert_array_equal(ledger.column("direction"), [1, -1, 1])
+        self.assertEqual(ledger.total_pnl(), PriceParser.parse(
+            (1000 - 2) + (95 - 2) + (-250 - 2)
+        ))
+        with self.assertRaises(ValueError):
+            ledger.column("quantity")[0] = 0
+
+        frame = ledger.to_frame()
+        self.assertEqual(list(frame["ticker"]), ["AMZN", "GOOG", "AMZN"])
+        self.assertEqual(list(frame["action"]), ["BOT", "SLD", "BOT"])
+        self.assertEqual(list(frame["quantity"]), [100, 10, 50])
+        self.assertEqual(list(frame["avg_sld"]), [510.0, 700.0, 505.0])
+        self.assertEqual(list(frame["commission"]), [2.0, 2.0, 2.0])
+        self.assertEqual(list(frame["realized_pnl"]), [998.0, 93.0, -252.0])
+        self.assertEqual(frame["entry_time"][0], pd.Timestamp("2015-01-02"))
+        self.assertTrue(pd.isnull(frame["exit_time"][1]))
+
+    def test_open_position(self):
+        position = Position(
+            "BOT", "AMZN", 100, PriceParser.parse(500), PriceParser.parse(1),
+            PriceParser.parse(500), PriceParser.parse(500)
+        )
+        with self.assertRaises(ValueError):
+            RoundTripLedger().append(position)
+
+
+class TestPortfolioArchival(unittest.TestCase):
+    """
+    Test that a Portfolio, holding its Positions in a dictionary
+    or a PositionBook, archives each closed Position without
+    changing its totals.
+    """
+    def _portfolio(self, positions=None):
+        return Portfolio(
+            BarPriceHandlerMock({"AMZN": 500.0, "GOOG": 700.0}),
+            PriceParser.parse(100000), positions=positions
+        )
+
+    def _trade(self, portfolio, action, ticker, quantity, price, day):
+        portfolio.transact_position(
+            action, ticker, quantity, PriceParser.parse(price),
+            PriceParser.parse(1), pd.Timestamp("2015-01-01") +
+            pd.Timedelta(days=day)
+        )
+
+    def test_archival(self):
+        for positions in (None, PositionBook(capacity=1)):
+            portfolio = self._portfolio(positions)
+            self._trade(portfolio, "BOT", "AMZN", 100, "500.00", 1)
+            self._trade(portfolio, "SLD", "GOOG", 10, "700.00", 1)
+            self._trade(portfolio, "SLD", "AMZN", 60, "505.00", 2)
+            self._trade(portfolio, "SLD", "AMZN", 40, "502.00", 3)
+            self.assertEqual(list(portfolio.positions), ["GOOG"])
+            self.assertEqual(portfolio.positions["GOOG"].quantity, -10)
+
+            # The closed round trip remains in the totals
+            self.assertEqual(
+                portfolio.cur_cash,
+                PriceParser.parse(100000 + 380 - 3 + 7000 - 1)
+            )
+            self.assertEqual(
+                portfolio.equity, PriceParser.parse(100000 + 380 - 3 - 1)
+            )
+            self.assertEqual(
+                portfolio.realized_pnl, PriceParser.parse(380 - 3 - 1)
+            )
+            self.assertTrue(portfolio.reconcile())
+
+            frame = portfolio.round_trips.to_frame()
+            self.assertEqual(len(frame), 1)
+            self.assertEqual(frame["ticker"][0], "AMZN")
+            self.assertEqual(frame["entry_time"][0], pd.Timestamp("2015-01-02"))
+            self.assertEqual(frame["exit_time"][0], pd.Timestamp("2015-01-04"))
+            self.assertEqual(frame["avg_sld"][0], 503.8)
+            self.assertEqual(frame["realized_pnl"][0], 377.0)
+
+            # Reopening a closed ticker starts a new round trip
+            self._trade(portfolio, "SLD", "AMZN", 20, "501.00", 4)
+            self._trade(portfolio, "BOT", "AMZN", 20, "499.00", 5)
+            self._trade(portfolio, "BOT", "GOOG", 10, "690.00", 5)
+            self.assertEqual(len(portfolio.positions), 0)
+            frame = portfolio.round_trips.to_frame()
+            self.assertEqual(list(frame["ticker"]), ["AMZN", "AMZN", "GOOG"])
+            self.assertEqual(list(frame["action"]), ["BOT", "SLD", "SLD"])
+            self.assertEqual(
+                list(frame["entry_time"].dt.day), [2, 5, 2]
+            )
+            self.assertEqual(
+                portfolio.cur_cash,
+                PriceParser.parse(100000 + 377 + 38 + 98)
+            )
+            self.assertEqual(portfolio.cur_cash, portfolio.equity)
+            self.assertTrue(portfolio.reconcile())
+
+    def test_pickle(self):
+        portfolio = self._portfolio(PositionBook())
+        self._trade(portfolio, "BOT", "AMZN", 100, "500.00", 1)
+        self._trade(portfolio, "SLD", "AMZN", 100, "505.00", 2)
+        restored = pickle.loads(pickle.dumps(portfolio))
+        self.assertEqual(len(restored.round_trips), 1)
+        self.assertEqual(restored.equity, portfolio.equity)
+        self.assertTrue(
+            restored.round_trips.to_frame().equals(
+                portfolio.round_trips.to_frame()
+            )
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+
+import pandas as pd
+
+from event import EventType, SignalEvent
+from scheduler import Scheduler
+
+
+class TestScheduler(unittest.TestCase):
+    """
+    Test that the Scheduler fires items in (time, sequence)
+    order as its simulated clock is advanced.
+    """
+    def setUp(self):
+        self.fired = []
+        self.scheduler = Scheduler(self.fired.append)
+        self.t0 = pd.Timestamp("2016-01-04")
+        self.day = pd.Timedelta(days=1)
+
+    def _record(self, name):
+        self.fired.append((self.scheduler.now, name))
+
+    def test_fire_in_order(self):
+        signal = SignalEvent("GOOG", "BOT", 10)
+        self.scheduler.schedule_callback(self.t0 + self.day, self._record, "b")
+        self.scheduler.schedule_event(self.t0, signal)
+        self.scheduler.schedule_callback(self.t0 + self.day, self._record, "c")
+        self.scheduler.schedule_callback(self.t0, self._record, "a")
+
+        self.assertEqual(self.scheduler.advance_to(self.t0), 2)
+        self.assertEqual(self.fired, [signal, (self.t0, "a")])
+        self.assertEqual(self.scheduler.advance_to(self.t0 + 3 * self.day), 2)
+        self.assertEqual(self.fired[2:], [
+            (self.t0 + self.day, "b"), (self.t0 + self.day, "c")
+        ])
+        self.assertEqual(self.scheduler.now, self.t0 + 3 * self.day)
+        self.assertEqual(len(self.scheduler), 0)
+        with self.assertRaises(ValueError):
+            self.scheduler.schedule_callback(self.t0, self._record, "d")
+
+    def test_periodic_and_cancel(self):
+        item = self.scheduler.schedule_periodic(
+            self.t0, 2 * self.day, self._record, "p"
+        )
+        timer = self.scheduler.schedule_timer(self.t0, "eod", self.day)
+        self.scheduler.advance_to(self.t0 + 4 * self.day)
+        self.assertEqual(
+            [f[0] for f in self.fired if isinstance(f, tuple)],
+            [self.t0, self.t0 + 2 * self.day, self.t0 + 4 * self.day]
+        )
+        timers = [f for f in self.fired if not isinstance(f, tuple)]
+        self.assertEqual([t.type for t in timers], [EventType.TIMER] * 5)
+        self.assertEqual(timers[-1].time, self.t0 + 4 * self.day)
+        self.assertEqual(timers[-1].name, "eod")
+
+        self.scheduler.cancel(item)
+        self.scheduler.cancel(timer)
+        self.assertIsNone(self.scheduler.peek_time())
+        self.assertEqual(self.scheduler.advance_to(self.t0 + 9 * self.day), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from helpers import TradeEveryNthBarStrategy, make_tickers_data
+import sweep
+from sweep import ParameterSweep, expand_grid
+
+
+class IndicatorStrategy(TradeEveryNthBarStrategy):
+    """
+    Trades on every nth bar, given n as a precomputed indicator.
+    """
+    def __init__(self, events_queue, n, quantity=10, indicators=None):
+        super(IndicatorStrategy, self).__init__(
+            events_queue, indicators, quantity
+        )
+
+    @classmethod
+    def precompute_indicators(cls, store, n, quantity=10):
+        return n
+
+
+class TestParameterSweep(unittest.TestCase):
+    """
+    Test a ParameterSweep, with serial and parallel runs.
+    """
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+        self.params = {"n": [2, 3, 5], "quantity": [10, 20]}
+
+    def tearDown(self):
+        shutil.rmtree(self.output_dir)
+
+    def _run(self, max_workers, trade_logs=False):
+        sweep = ParameterSweep(
+            TradeEveryNthBarStrategy, self.output_dir,
+            tickers_data=make_tickers_data(30, 3, ["AMZN", "GOOG"]),
+            max_workers=max_workers, trade_logs=trade_logs
+        )
+        try:
+            return sweep.run(self.params)
+        finally:
+            sweep.close()
+
+    def test_expand_grid(self):
+        self.assertEqual(expand_grid(self.params)[:3], [
+            {"n": 2, "quantity": 10}, {"n": 2, "quantity": 20},
+            {"n": 3, "quantity": 10},
+        ])
+
+    def test_serial_and_parallel_runs_match(self):
+        serial = self._run(max_workers=1)
+        parallel = self._run(max_workers=2)
+        self.assertEqual(len(serial), 6)
+        self.assertEqual(list(serial["n"]), [2, 2, 3, 3, 5, 5])
+        for column in ("sharpe", "max_drawdown", "max_drawdown_pct"):
+            np.testing.assert_array_equal(
+                serial[column].values, parallel[column].values
+            )
+        for i in range(6):
+            pd.testing.assert_series_equal(
+                serial["equity"][i], parallel["equity"][i]
+            )
+        self.assertNotEqual(serial["sharpe"][0], serial["sharpe"][1])
+        # No trade logs are written unless asked for
+        self.assertEqual(os.listdir(self.output_dir), [])
+
+    def test_trade_logs(self):
+        self._run(max_workers=1, trade_logs=True)
+        self.assertEqual(len(os.listdir(self.output_dir)), 6)
+
+    def test_indicator_cache_is_bounded(self):
+        """
+        The indicators precomputed within a process are evicted,
+        least recently used first, beyond INDICATOR_CACHE_SIZE.
+        """
+        self.params = {
+            "n": list(range(2, 2 + sweep.INDICATOR_CACHE_SIZE + 4))
+        }
+        expected = self._run(max_workers=1)
+        sweep._indicator_cache.clear()
+        parameter_sweep = ParameterSweep(
+            IndicatorStrategy, self.output_dir,
+            tickers_data=make_tickers_data(30, 3, ["AMZN", "GOOG"]),
+            max_workers=1
+        )
+        try:
+            results = parameter_sweep.run(self.params)
+        finally:
+            parameter_sweep.close()
+        self.assertEqual(
+            len(sweep._indicator_cache), sweep.INDICATOR_CACHE_SIZE
+        )
+        self.assertEqual(
+            [key[2] for key in sweep._indicator_cache],
+            [(("n", n),) for n in self.params["n"][4:]]
+        )
+        np.testing.assert_array_equal(
+            results["sharpe"].values, expected["sharpe"].values
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+import gc
+import os
+import queue
+import shutil
+import tempfile
+import unittest
+
+import pandas as pd
+
+from tick_price_handler import HistoricCSVTickPriceHandler
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+TICKS = {
+    "GOOG": [
+        ("2016-01-04 09:30:00.100", 700.10, 700.20),
+        ("2016-01-04 09:30:00.300", 700.11, 700.21),
+        ("2016-01-04 09:30:00.500", 700.12, 700.22),
+        ("2016-01-04 09:30:00.700", 700.13, 700.23),
+    ],
+    "AMZN": [
+        ("2016-01-04 09:30:00.200", 600.10, 600.20),
+        ("2016-01-04 09:30:00.300", 600.11, 600.21),
+        ("2016-01-04 09:30:00.600", 600.12, 600.22),
+    ],
+}
+
+
+class TestHistoricCSVTickPriceHandler(unittest.TestCase):
+    """
+    Test HistoricCSVTickPriceHandler, with tickers including
+    "GOOG" and "AMZN", streamed in chunks of two ticks.
+    """
+    def setUp(self):
+        self.csv_dir = tempfile.mkdtemp()
+        for ticker, ticks in TICKS.items():
+            with open(os.path.join(self.csv_dir, ticker + ".csv"), "w") as f:
+                f.write("Ticker,Time,Bid,Ask\n")
+                for time, bid, ask in ticks:
+                    f.write("{},{},{},{}\n".format(ticker, time, bid, ask))
+        self.price_handler = HistoricCSVTickPriceHandler(
+            queue.Queue(), self.csv_dir, ["GOOG", "AMZN"], chunksize=2,
+            time_format="%Y-%m-%d %H:%M:%S.%f"
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.csv_dir)
+
+    def test_stream_next(self):
+        """
+        Ticks are merged by (timestamp, ticker) and never more
+        than one chunk per ticker is held in memory.
+        """
+        events = []
+        while self.price_handler.continue_backtest:
+            self.price_handler.stream_next()
+            self.assertLessEqual(
+                self.price_handler.tick_stream.buffered_rows(), 2 * 2
+            )
+            if not self.price_handler.events_queue.empty():
+                events.append(self.price_handler.events_queue.get())
+
+        self.assertEqual(
+            [(e.time.strftime("%S.%f"), e.ticker) for e in events], [
+                ("00.100000", "GOOG"),
+                ("00.200000", "AMZN"),
+                ("00.300000", "AMZN"),
+                ("00.300000", "GOOG"),
+                ("00.500000", "GOOG"),
+                ("00.600000", "AMZN"),
+                ("00.700000", "GOOG"),
+            ]
+        )
+        self.assertEqual(events[0].bid, 700.10)
+        self.assertEqual(events[0].ask, 700.20)
+
+        # results from _store_event
+        self.assertEqual(
+            self.price_handler.get_best_bid_ask("AMZN"), (600.12, 600.22)
+        )
+        self.assertEqual(
+            self.price_handler.get_last_timestamp("GOOG"),
+            pd.Timestamp("2016-01-04 09:30:00.700")
+        )
+
+    @unittest.skipIf(
+        resource is None or not os.path.isdir("/proc/self/fd"),
+        "open files cannot be limited and counted"
+    )
+    def test_many_tickers_open_files_bounded(self):
+        """
+        Far more tickers than the limit on open files are merged,
+        as no file is held open per ticker between chunks.
+        """
+        tickers = ["T{:03d}".format(i) for i in range(200)]
+        for i, ticker in enumerate(tickers):
+            with open(os.path.join(self.csv_dir, ticker + ".csv"), "w") as f:
+                f.write("Ticker,Time,Bid,Ask\n")
+                for j in range(3):
+                    f.write("{},2016-01-04 09:30:0{}.{:03d},{},{}\n".format(
+                        ticker, j, i, 10.0 + j, 10.1 + j
+                    ))
+
+        # Descriptors left by other tests may be closed meanwhile
+        gc.collect()
+        n_open = len(os.listdir("/proc/self/fd"))
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        resource.setrlimit(resource.RLIMIT_NOFILE, (n_open + 32, hard))
+        try:
+            price_handler = HistoricCSVTickPriceHandler(
+                queue.Queue(), self.csv_dir, tickers, chunksize=2,
+                time_format="%Y-%m-%d %H:%M:%S.%f"
+            )
+            self.assertLessEqual(len(os.listdir("/proc/self/fd")), n_open)
+            n_events = 0
+            while price_handler.continue_backtest:
+                price_handler.stream_next()
+                if not price_handler.events_queue.empty():
+                    price_handler.events_queue.get()
+                    n_events += 1
+                self.assertLessEqual(
+                    len(os.listdir("/proc/self/fd")), n_open + 1
+                )
+        finally:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (soft, hard))
+        self.assertEqual(n_events, 3 * len(tickers))
+
+
+if __name__ == "__main__":
+    unittest.main()
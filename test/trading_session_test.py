@@ -0,0 +1,249 @@
+import queue
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from bar_store import BarStorePriceHandler, write_bar_store
+from event import EventType, SignalEvent
+from event_bus import DequeEventBus
+from helpers import TICKERS, make_tickers_data
+from strategy import SnapshotStrategyAdapter, Strategy
+from trading_session import TradingSession
+
+
+class BuyEveryFifthBarStrategy(Strategy):
+    """
+    Buys 10 units of a ticker on every fifth bar of that
+    ticker, recording every bar event that it receives.
+    """
+    def __init__(self, events_queue):
+        self.events_queue = events_queue
+        self.bars = []
+
+    def calculate_signals(self, event):
+        self.bars.append((event.time, event.ticker))
+        if len([b for b in self.bars if b[1] == event.ticker]) % 5 == 0:
+            self.events_queue.put(SignalEvent(event.ticker, "BOT", 10))
+
+
+class TestTradingSessionSnapshot(unittest.TestCase):
+    """
+    Test a TradingSession backtest, streaming from a BarStore,
+    with and without snapshot mode.
+    """
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+        self.store_path = tempfile.mkdtemp()
+        write_bar_store(self.store_path, make_tickers_data(20, 42))
+
+    def tearDown(self):
+        shutil.rmtree(self.output_dir)
+        shutil.rmtree(self.store_path)
+
+    def _run(self, snapshot, events_queue=None, tickers=None):
+        if events_queue is None:
+            events_queue = queue.Queue()
+        strategy = BuyEveryFifthBarStrategy(events_queue)
+        strategy.tickers = tickers
+        price_handler = BarStorePriceHandler(
+            events_queue, self.store_path, snapshot=snapshot
+        )
+        session = TradingSession(
+            self.output_dir, strategy, TICKERS, 100000.0,
+            None, None, events_queue, price_handler=price_handler
+        )
+
+        updates = []
+        update_portfolio_value = session.portfolio_handler.update_portfolio_value
+
+        def counting_update():
+            updates.append(session.cur_time)
+            update_portfolio_value()
+        session.portfolio_handler.update_portfolio_value = counting_update
+
+        session.start_trading(testing=True)
+        return session, strategy, updates
+
+    def test_snapshot_mode(self):
+        """
+        In snapshot mode the wrapped per-ticker strategy still sees
+        every bar in the same order, but the portfolio is revalued
+        once per timestamp rather than once per bar.
+        """
+        bar_session, bar_strategy, bar_updates = self._run(snapshot=False)
+        snap_session, snap_strategy, snap_updates = self._run(snapshot=True)
+
+        self.assertIsInstance(snap_session.strategy, SnapshotStrategyAdapter)
+        self.assertEqual(len(bar_strategy.bars), 20 + 20 + 15)
+        self.assertEqual(snap_strategy.bars, bar_strategy.bars)
+        self.assertEqual(len(bar_updates), 55)
+        self.assertEqual(len(snap_updates), 20)
+        self.assertEqual(
+            snap_session.statistics.timeseries[1:],
+            bar_session.statistics.timeseries[1:]
+        )
+
+        # Every order is filled at the close of the bar that
+        # triggered it in both modes
+        for session in (bar_session, snap_session):
+            positions = session.portfolio_handler.portfolio.positions
+            self.assertEqual(positions["AMZN"].quantity, 40)
+            self.assertEqual(positions["MSFT"].quantity, 30)
+        self.assertEqual(
+            snap_session.portfolio_handler.portfolio.positions["GOOG"].avg_bot,
+            bar_session.portfolio_handler.portfolio.positions["GOOG"].avg_bot
+        )
+
+    def test_deque_event_bus(self):
+        """
+        The session drains a DequeEventBus exactly as it
+        does a queue.Queue.
+        """
+        queue_session, queue_strategy, _ = self._run(snapshot=False)
+        bus_session, bus_strategy, _ = self._run(
+            snapshot=False, events_queue=DequeEventBus()
+        )
+        self.assertEqual(bus_strategy.bars, queue_strategy.bars)
+        self.assertEqual(
+            bus_session.statistics.timeseries,
+            queue_session.statistics.timeseries
+        )
+        self.assertEqual(
+            bus_session.statistics.equity, queue_session.statistics.equity
+        )
+
+    def test_strategy_tickers(self):
+        """
+        A strategy subscribing to a subset of the tickers is only
+        given their bars, while the portfolio is still revalued
+        on every bar.
+        """
+        for snapshot, n_updates in ((False, 55), (True, 20)):
+            session, strategy, updates = self._run(
+                snapshot=snapshot, tickers=["MSFT"]
+            )
+            self.assertEqual(len(strategy.bars), 15)
+            self.assertEqual(set(b[1] for b in strategy.bars), set(["MSFT"]))
+            self.assertEqual(len(updates), n_updates)
+            positions = session.portfolio_handler.portfolio.positions
+            self.assertEqual(list(positions.keys()), ["MSFT"])
+            self.assertEqual(positions["MSFT"].quantity, 30)
+
+    def test_scheduled_timer(self):
+        """
+        A weekly timer fires at its scheduled times, before any
+        bar at the same time, and the signal it generates is
+        filled before that bar is handled.
+        """
+        events_queue = DequeEventBus()
+        strategy = BuyEveryFifthBarStrategy(events_queue)
+        price_handler = BarStorePriceHandler(events_queue, self.store_path)
+        session = TradingSession(
+            self.output_dir, strategy, TICKERS, 100000.0,
+            None, None, events_queue, price_handler=price_handler
+        )
+        calls = []
+
+        def on_timer(event):
+            calls.append((event.time, len(strategy.bars)))
+            events_queue.put(SignalEvent("GOOG", "BOT", 1))
+        session.dispatcher.subscribe(EventType.TIMER, on_timer)
+        session.scheduler.schedule_timer(
+            pd.Timestamp("2015-01-05"), "rebalance", pd.Timedelta(days=7)
+        )
+        session.start_trading(testing=True)
+
+        # The 20 business days run from Friday 2015-01-02 to
+        # 2015-01-29, and MSFT starts trading on 2015-01-09
+        self.assertEqual(calls, [
+            (pd.Timestamp("2015-01-05"), 2),
+            (pd.Timestamp("2015-01-12"), 13),
+            (pd.Timestamp("2015-01-19"), 28),
+            (pd.Timestamp("2015-01-26"), 43),
+        ])
+        positions = session.portfolio_handler.portfolio.positions
+        self.assertEqual(positions["GOOG"].quantity, 40 + 4)
+
+    def test_nan_closes(self):
+        """
+        Bars with a NaN close are still given to the strategy but
+        do not reprice their ticker, so the session gives the same
+        equity as with the previous closes carried forward.
+        """
+        tickers_data = make_tickers_data(20, 42)
+        nan_data = dict(
+            (ticker, df.copy()) for ticker, df in tickers_data.items()
+        )
+        for ticker, rows in (("AMZN", [3, 4, 11]), ("GOOG", [7])):
+            nan_data[ticker].iloc[rows, 3] = np.nan
+            tickers_data[ticker] = nan_data[ticker].ffill()
+        for snapshot in (False, True):
+            equities = []
+            for data in (nan_data, tickers_data):
+                store_path = tempfile.mkdtemp()
+                try:
+                    write_bar_store(store_path, data)
+                    events_queue = DequeEventBus()
+                    strategy = BuyEveryFifthBarStrategy(events_queue)
+                    session = TradingSession(
+                        self.output_dir, strategy, TICKERS, 100000.0,
+                        None, None, events_queue,
+                        price_handler=BarStorePriceHandler(
+                            events_queue, store_path, snapshot=snapshot
+                        )
+                    )
+                    session.start_trading(testing=True)
+                finally:
+                    shutil.rmtree(store_path)
+                self.assertEqual(len(strategy.bars), 55)
+                equities.append(session.statistics.equity)
+            self.assertEqual(equities[0], equities[1])
+            self.assertFalse(np.isnan(equities[0]).any())
+
+    def test_strategy_timer(self):
+        """
+        A timer scheduled on a default session is given to the
+        strategy, also when it is wrapped for snapshot mode, and
+        is ignored by a strategy not handling timers.
+        """
+        class TimerStrategy(BuyEveryFifthBarStrategy):
+            def __init__(self, events_queue):
+                super(TimerStrategy, self).__init__(events_queue)
+                self.timers = []
+
+            def on_timer(self, event):
+                self.timers.append((event.time, event.name))
+
+        for strategy_class in (TimerStrategy, BuyEveryFifthBarStrategy):
+            for snapshot in (False, True):
+                events_queue = DequeEventBus()
+                strategy = strategy_class(events_queue)
+                session = TradingSession(
+                    self.output_dir, strategy, TICKERS, 100000.0,
+                    None, None, events_queue,
+                    price_handler=BarStorePriceHandler(
+                        events_queue, self.store_path, snapshot=snapshot
+                    )
+                )
+                session.scheduler.schedule_timer(
+                    pd.Timestamp("2015-01-14"), "close"
+                )
+                session.scheduler.schedule_timer(
+                    pd.Timestamp("2015-01-20"), "rebalance",
+                    pd.Timedelta(days=7)
+                )
+                session.start_trading(testing=True)
+                if strategy_class is TimerStrategy:
+                    self.assertEqual(strategy.timers, [
+                        (pd.Timestamp("2015-01-14"), "close"),
+                        (pd.Timestamp("2015-01-20"), "rebalance"),
+                        (pd.Timestamp("2015-01-27"), "rebalance"),
+                    ])
+                self.assertEqual(len(strategy.bars), 55)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from bar_store import BarStorePriceHandler, write_bar_store
+from event_bus import DequeEventBus
+from execution_handler import IBSimulatedExecutionHandler
+from helpers import TICKERS, make_tickers_data
+from price_parser import PriceParser
+from strategy import TargetPositionStrategy
+from trading_session import TradingSession
+from vectorized import calculate_equity, ib_commission, vectorized_backtest
+
+
+def _crossover_targets(close, window, quantity):
+    """
+    Holds quantity units long when the close is above its moving
+    average and quantity units short when below.
+    """
+    signal = np.sign(close - close.rolling(window).mean())
+    return (signal * quantity).ffill().fillna(0).astype(int)
+
+
+class TestVectorizedBacktest(unittest.TestCase):
+    """
+    Test that the vectorized backtester matches the event-driven
+    TradingSession, in snapshot mode, on shared strategies.
+    """
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+        self.store_path = tempfile.mkdtemp()
+        self.tickers_data = make_tickers_data(60, 7, start_price=50.0, late_start=10)
+        write_bar_store(self.store_path, self.tickers_data)
+        self.close = pd.DataFrame(dict(
+            (ticker, df["Close"]) for ticker, df in self.tickers_data.items()
+        ))
+
+    def tearDown(self):
+        shutil.rmtree(self.output_dir)
+        shutil.rmtree(self.store_path)
+
+    def _run_event_driven(self, targets):
+        events_queue = DequeEventBus()
+        session = TradingSession(
+            self.output_dir, TargetPositionStrategy(events_queue, targets),
+            TICKERS, 100000.0, None, None, events_queue,
+            price_handler=BarStorePriceHandler(
+                events_queue, self.store_path, snapshot=True
+            )
+        )
+        return session.start_trading(testing=True)
+
+    def test_ib_commission(self):
+        handler = IBSimulatedExecutionHandler(None, None)
+        for quantity, price in ((10, 1.5), (100, 50.0), (1000, 0.01)):
+            self.assertAlmostEqual(
+                ib_commission(np.array([quantity]), np.array([price]))[0],
+                PriceParser.display(handler._calculate_ib_commission(
+                    quantity, PriceParser.parse(price)
+                ), None)
+            )
+
+    def test_matches_event_driven(self):
+        all_targets = [
+            _crossover_targets(self.close, window, quantity)
+            for window, quantity in ((3, 10), (5, 250), (10, 40))
+        ]
+        all_results = vectorized_backtest(
+            self.close, all_targets, 100000.0, self.output_dir
+        )
+        for targets, results in zip(all_targets, all_results):
+            expected = self._run_event_driven(targets)
+            self.assertEqual(
+                list(results["equity"].index), list(expected["equity"].index)
+            )
+            # The event-driven session parses each close to
+            # PriceParser.PRICE_MULTIPLIER units, so agrees to within
+            # a cent
+            np.testing.assert_allclose(
+                results["equity"].values, expected["equity"].values,
+                rtol=0, atol=1e-2
+            )
+            np.testing.assert_allclose(
+                results["equity_returns"].values,
+                expected["equity_returns"].values, atol=1e-4
+            )
+            np.testing.assert_allclose(
+                results["drawdowns"].values, expected["drawdowns"].values,
+                rtol=0, atol=1e-2
+            )
+            self.assertAlmostEqual(results["sharpe"], expected["sharpe"], 3)
+            self.assertAlmostEqual(
+                results["max_drawdown_pct"], expected["max_drawdown_pct"], 3
+            )
+
+    def test_missing_target_timestamps(self):
+        """
+        The event-driven strategy skips the bars whose timestamps
+        are missing from the targets, keeping its previous target.
+        """
+        targets = _crossover_targets(self.close, 5, 10).astype(float)
+        missing = self.close.index[[12, 13, 30]]
+        targets.loc[missing] = np.nan
+        expected = self._run_event_driven(targets.ffill().astype(int))
+        results = self._run_event_driven(targets.drop(missing[1:]))
+        self.assertEqual(
+            results["equity"].tolist(), expected["equity"].tolist()
+        )
+
+    def test_target_change_without_price(self):
+        targets = pd.DataFrame(0, index=self.close.index, columns=TICKERS)
+        targets.iloc[2, 2] = 10
+        with self.assertRaises(ValueError):
+            calculate_equity(self.close.values, targets.values, 100000.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
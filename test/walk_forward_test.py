@@ -0,0 +1,151 @@
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from event import SignalEvent
+from helpers import make_tickers_data
+from statistics import SimpleStatistics
+from strategy import Strategy
+from walk_forward import WalkForward, walk_forward_windows
+
+
+class MovingAverageStrategy(Strategy):
+    """
+    Holds 10 units long when the close is above its moving
+    average over window bars and 10 units short otherwise,
+    with the moving averages precomputed over the whole store.
+    """
+    computed = []
+
+    def __init__(self, events_queue, window, indicators=None):
+        self.events_queue = events_queue
+        self.window = window
+        self.indicators = indicators
+        self.quantities = {}
+
+    @classmethod
+    def precompute_indicators(cls, store, window):
+        cls.computed.append(window)
+        return dict(
+            (ticker, store.to_frame(ticker)["Close"].rolling(window).mean())
+            for ticker in store.tickers
+        )
+
+    def calculate_signals(self, event):
+        mean = self.indicators[event.ticker][event.time]
+        if np.isnan(mean):
+            return
+        target = 10 if event.close_price > mean else -10
+        quantity = target - self.quantities.get(event.ticker, 0)
+        if quantity > 0:
+            self.events_queue.put(SignalEvent(event.ticker, "BOT", quantity))
+        elif quantity < 0:
+            self.events_queue.put(SignalEvent(event.ticker, "SLD", -quantity))
+        self.quantities[event.ticker] = target
+
+
+class BuyOnceStrategy(Strategy):
+    """
+    Buys quantity units of AMZN on its first bar, and holds them.
+    """
+    def __init__(self, events_queue, quantity):
+        self.events_queue = events_queue
+        self.quantity = quantity
+        self.bought = False
+
+    def calculate_signals(self, event):
+        if event.ticker == "AMZN" and not self.bought:
+            self.events_queue.put(SignalEvent("AMZN", "BOT", self.quantity))
+            self.bought = True
+
+
+class TestWalkForward(unittest.TestCase):
+    """
+    Test the walk-forward windows and optimisation.
+    """
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+        MovingAverageStrategy.computed = []
+
+    def tearDown(self):
+        shutil.rmtree(self.output_dir)
+
+    def test_windows(self):
+        times = pd.bdate_range("2015-01-01", periods=10)
+        windows = walk_forward_windows(times, 4, 3)
+        self.assertEqual(windows, [
+            (times[0], times[4], times[4], times[7]),
+            (times[3], times[7], times[7], None),
+        ])
+        self.assertEqual(len(walk_forward_windows(times, 4, 3, step=1)), 6)
+
+    def _run(self, max_workers):
+        walk_forward = WalkForward(
+            MovingAverageStrategy, self.output_dir, {"window": [2, 5, 10]},
+            train_bars=20, test_bars=10,
+            tickers_data=make_tickers_data(60, 11, ["AMZN", "GOOG"]),
+            max_workers=max_workers
+        )
+        try:
+            return walk_forward, walk_forward.run()
+        finally:
+            walk_forward.close()
+
+    def test_parallel_run(self):
+        _, serial = self._run(max_workers=1)
+        walk_forward, parallel = self._run(max_workers=2)
+        self.assertEqual(parallel.equity, serial.equity)
+        self.assertEqual(parallel.timeseries, serial.timeseries)
+
+    def test_run(self):
+        walk_forward, statistics = self._run(max_workers=1)
+
+        # Each indicator is computed once, whatever the windows
+        self.assertEqual(sorted(MovingAverageStrategy.computed), [2, 5, 10])
+
+        windows = walk_forward.windows
+        self.assertEqual(len(windows), 4)
+        self.assertEqual(
+            list(windows["test_start"]),
+            list(pd.bdate_range("2015-01-02", periods=60)[20::10])
+        )
+        self.assertIsInstance(statistics, SimpleStatistics)
+        results = statistics.get_results()
+        self.assertEqual(len(results["equity"]), 40 + 1)
+        self.assertEqual(
+            results["equity"].index[1], pd.Timestamp("2015-01-30")
+        )
+        self.assertEqual(results["equity"].iloc[0], 100000.0)
+        self.assertNotEqual(results["equity"].iloc[-1], 100000.0)
+
+    def test_positions_close_at_window_ends(self):
+        """
+        A position open at the end of a test window is carried into
+        the next window as cash, at its final close and without
+        commission, so the strategy buys again in every window,
+        paying only the commission of that purchase.
+        """
+        tickers_data = make_tickers_data(60, 11, ["AMZN", "GOOG"])
+        walk_forward = WalkForward(
+            BuyOnceStrategy, self.output_dir, {"quantity": [10]},
+            train_bars=20, test_bars=10, tickers_data=tickers_data
+        )
+        try:
+            results = walk_forward.run().get_results()
+        finally:
+            walk_forward.close()
+        close = tickers_data["AMZN"]["Close"].values
+        expected = 100000.0
+        for start in (20, 30, 40, 50):
+            expected += 10 * (close[start + 9] - close[start]) - 1.0
+            window_equity = results["equity"][
+                pd.Timestamp(tickers_data["AMZN"].index[start + 9])
+            ]
+            self.assertAlmostEqual(window_equity, expected, places=4)
+
+
+if __name__ == "__main__":
+    unittest.main()
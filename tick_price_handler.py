@@ -0,0 +1,117 @@
+import os
+
+from price_handler import AbstractTickPriceHandler
+from event import TickEvent
+from bar_stream import (
+    DEFAULT_CHUNKSIZE, MergedBarStream, iter_csv_chunks, resume_positions
+)
+
+
+# Columns of each ticker tick file, besides the "Time" column
+TICK_COLUMNS = ["Bid", "Ask"]
+TIME_COLUMN = "Time"
+
+
+class HistoricCSVTickPriceHandler(AbstractTickPriceHandler):
+    """
+    HistoricCSVTickPriceHandler streams historic top-of-book
+    bid/ask quotes from per-ticker CSV files, e.g.
+    "<csv_dir>/GOOG.csv", in a manner identical to a live
+    trading interface.
+
+    Each file has a header row and contains (at least) the
+    "Time", "Bid" and "Ask" columns, sorted by time.
+
+    Files are read in fixed-size chunks of chunksize rows and
+    merged across tickers by timestamp, so at most one chunk per
+    ticker is ever held in memory, however large the files are.
+    """
+    def __init__(
+        self, events_queue, csv_dir,
+        init_tickers=None,
+        start_date=None, end_date=None,
+        chunksize=DEFAULT_CHUNKSIZE, time_format=None
+    ):
+        """
+        Takes the events queue, the CSV directory and a possible
+        list of initial ticker symbols then creates an (optional)
+        list of ticker subscriptions.
+
+        Parameters:
+        events_queue - The events queue to place TickEvents onto.
+        csv_dir - The directory containing the ticker tick files.
+        init_tickers - Optional list of ticker symbols.
+        start_date - Optional first time to stream.
+        end_date - Optional time at which to stop (exclusive).
+        chunksize - Number of ticks read per ticker at a time.
+        time_format - Optional strftime format of the "Time"
+            column, which is much faster to parse than inferring it.
+        """
+        self.events_queue = events_queue
+        self.csv_dir = os.path.expanduser(csv_dir)
+        self.chunksize = chunksize
+        self.time_format = time_format
+        self.continue_backtest = True
+        self.tickers = {}
+        self.tickers_data = {}
+        self.start_date = start_date
+        self.end_date = end_date
+        if init_tickers is not None:
+            for ticker in init_tickers:
+                self.subscribe_ticker(ticker)
+        self.tick_stream = self._merge_sort_ticker_data()
+
+    def _ticker_filename(self, ticker):
+        return os.path.join(self.csv_dir, ticker + ".csv")
+
+    def _merge_sort_ticker_data(self, resume=None):
+        """
+        Merges the chunked per-ticker tick streams, by
+        (timestamp, ticker), into a single chronological stream,
+        from the positions of an optional resume state.
+        """
+        return MergedBarStream(dict(
+            (ticker, iter_csv_chunks(
+                self._ticker_filename(ticker), TIME_COLUMN,
+                TICK_COLUMNS, self.start_date, self.end_date,
+                self.chunksize, self.time_format, position
+            ))
+            for ticker, position in resume_positions(self.tickers, resume)
+        ), resume)
+
+    def subscribe_ticker(self, ticker):
+        """
+        Subscribes the price handler to a new ticker symbol.
+        """
+        if ticker not in self.tickers:
+            if os.path.exists(self._ticker_filename(ticker)):
+                self.tickers[ticker] = {
+                    "bid": None,
+                    "ask": None,
+                    "parsed_bid": None,
+                    "parsed_ask": None,
+                    "timestamp": None
+                }
+            else:
+                print(
+                    "Could not subscribe ticker {} "\
+                    "as no tick file is found for pricing.".format(ticker)
+                )
+        else:
+            print(
+                "Could not subscribe ticker {} "\
+                "as it is already subscribed".format(ticker)
+            )
+
+    def stream_next(self):
+        """
+        Place the next TickEvent onto the event queue.
+        """
+        try:
+            index, ticker, bid, ask = next(self.tick_stream)
+        except StopIteration:
+            self.continue_backtest = False
+            return
+        tev = TickEvent(ticker, index, bid, ask)
+        self._store_event(tev)
+        self.events_queue.put(tev)
@@ -1,9 +1,11 @@
 from datetime import datetime
+import os
 import queue
 from event import EventType
 
 
 from price_handler import HistoricQuandlBarPriceHandler
+from file_price_handler import HistoricFileBarPriceHandler
 
 from position_sizer import NaivePositionSizer
 from risk_manager import NaiveRiskManager
@@ -13,6 +15,54 @@ from portfolio_handler import PortfolioHandler
 from compliance import NaiveCompliance
 from execution_handler import IBSimulatedExecutionHandler
 from statistics import SimpleStatistics
+from strategy import SnapshotStrategyAdapter
+from dispatcher import EventDispatcher
+from price_parser import PriceParser
+from scheduler import Scheduler
+
+
+# Event types that carry new market prices
+MARKET_EVENT_TYPES = (EventType.TICK, EventType.BAR, EventType.SNAPSHOT)
+
+
+def _create_price_handler(
+    events_queue, tickers, start_date, end_date, data_dir, snapshot
+):
+    """
+    Creates the backtest price handler, streaming from the
+    per-ticker files within data_dir if it is given and from
+    Quandl otherwise.
+    """
+    if data_dir is not None:
+        return HistoricFileBarPriceHandler(
+            events_queue, data_dir, tickers,
+            start_date=start_date,
+            end_date=end_date,
+            snapshot=snapshot
+        )
+    return HistoricQuandlBarPriceHandler(
+        events_queue, tickers,
+        start_date=start_date,
+        end_date=end_date,
+        snapshot=snapshot
+    )
+
+
+def _event_poller(events_queue):
+    """
+    Returns a function that takes the next event off the
+    events queue, or returns None if it is empty.
+    """
+    poll = getattr(events_queue, "poll", None)
+    if poll is not None:
+        return poll
+
+    def poll_queue():
+        try:
+            return events_queue.get(False)
+        except queue.Empty:
+            return None
+    return poll_queue
 
 
 class TradingSession(object):
@@ -29,11 +79,47 @@ class TradingSession(object):
         compliance=None, position_sizer=None,
         execution_handler=None, risk_manager=None,
         statistics=None,
-        title=None, benchmark=None
+        title=None, benchmark=None,
+        data_dir=None, snapshot=False,
+        dispatcher=None, scheduler=None,
+        checkpoint=None, profiler=None
     ):
         """
         Set up the backtest variables according to
         what has been passed in.
+
+        If data_dir is given, backtest prices are streamed from
+        the per-ticker files within it rather than from Quandl.
+
+        The events_queue is preferably an EventBus, i.e. a
+        DequeEventBus for backtests or a ThreadSafeEventBus for
+        live sessions, although a queue.Queue is still accepted.
+
+        If snapshot is True, the backtest price handler emits a
+        single snapshot event per timestamp, so the portfolio is
+        revalued and the statistics updated once per time slice
+        rather than once per ticker bar.
+
+        Events are routed to the components by an EventDispatcher.
+        Market events only reach the strategy if they are for one
+        of its tickers (all tickers, if it has none). Further
+        components may subscribe to the dispatcher to handle
+        additional event types.
+
+        The scheduler holds callbacks and events scheduled for a
+        future simulated time. Its clock is advanced to the time
+        of each market event, firing any items then due (and
+        handling their consequences) before that market event.
+
+        If a SessionCheckpointer is given as checkpoint, the state
+        of the session is saved periodically, between market
+        events, so that an identically configured session can
+        resume from it with checkpoint.restore(session). The
+        checkpoint is removed once the session finishes.
+
+        If a SessionProfiler is given as profiler, the time taken
+        by each event type and hot path component is recorded,
+        and summarised at the end of the session.
         """
         self.output_dir = output_dir
         self.strategy = strategy
@@ -49,6 +135,12 @@ class TradingSession(object):
         self.position_sizer = position_sizer
         self.risk_manager = risk_manager
         self.statistics = statistics
+        self.data_dir = data_dir
+        self.snapshot = snapshot
+        self.dispatcher = dispatcher
+        self.scheduler = scheduler
+        self.checkpoint = checkpoint
+        self.profiler = profiler
 
         self.title = title
         self.benchmark = benchmark
@@ -66,12 +158,20 @@ class TradingSession(object):
         within the session.
         """
         if self.price_handler is None and self.session_type == "backtest":
-            self.price_handler = HistoricQuandlBarPriceHandler(
+            self.price_handler = _create_price_handler(
                 self.events_queue, self.tickers,
-                start_date=self.start_date,
-                end_date=self.end_date
+                self.start_date, self.end_date,
+                self.data_dir, self.snapshot
             )
 
+        # Strategies expecting per-ticker bars still work when
+        # the price handler emits snapshots
+        if (
+            getattr(self.price_handler, "snapshot", False) and
+            not getattr(self.strategy, "accepts_snapshots", False)
+        ):
+            self.strategy = SnapshotStrategyAdapter(self.strategy)
+
         if self.position_sizer is None:
             self.position_sizer = NaivePositionSizer()
 
@@ -80,7 +180,7 @@ class TradingSession(object):
 
         if self.portfolio_handler is None:
             self.portfolio_handler = PortfolioHandler(
-                self.equity,
+                PriceParser.parse(self.equity),
                 self.events_queue,
                 self.price_handler,
                 self.position_sizer,
@@ -102,12 +202,59 @@ class TradingSession(object):
                 self.output_dir, self.portfolio_handler,
             )
 
+        if self.dispatcher is None:
+            self.dispatcher = EventDispatcher()
+        self._subscribe_handlers()
+
+        if self.scheduler is None:
+            self.scheduler = Scheduler(self.dispatcher.dispatch)
+
+    def _subscribe_handlers(self):
+        """
+        Subscribes the session components to the dispatcher.
+        """
+        dispatcher = self.dispatcher
+        dispatcher.subscribe_many(MARKET_EVENT_TYPES, self._on_market_time)
+        dispatcher.subscribe_many(
+            MARKET_EVENT_TYPES, self.strategy.calculate_signals,
+            getattr(self.strategy, "tickers", None)
+        )
+        dispatcher.subscribe_many(MARKET_EVENT_TYPES, self._on_market_update)
+        dispatcher.subscribe(EventType.SIGNAL, self.portfolio_handler.on_signal)
+        dispatcher.subscribe(
+            EventType.ORDER, self.execution_handler.execute_order
+        )
+        dispatcher.subscribe(EventType.FILL, self.portfolio_handler.on_fill)
+        # Timers scheduled on the session scheduler are given to
+        # the strategy, if it handles them, rather than raising
+        # as an unsupported event type
+        dispatcher.subscribe(
+            EventType.TIMER, getattr(self.strategy, "on_timer", self._on_timer)
+        )
+
+    def _on_market_time(self, event):
+        self.cur_time = event.time
+
+    def _on_timer(self, event):
+        pass
+
+    def _on_market_update(self, event):
+        """
+        Revalues the portfolio at the latest market prices
+        and records its equity.
+        """
+        self.portfolio_handler.update_portfolio_value()
+        self.statistics.update(event.time, self.portfolio_handler)
+
     def _continue_loop_condition(self):
         if self.session_type == "backtest":
             return self.price_handler.continue_backtest
         else:
             return datetime.now() < self.end_session_time
 
+    def _event_poller(self):
+        return _event_poller(self.events_queue)
+
     def _run_session(self):
         """
         Carries out an infinite while loop that pulls the
@@ -120,34 +267,62 @@ class TradingSession(object):
         else:
             print("Running realtime session until {}".format(self.end_session_time))
 
-        while self._continue_loop_condition():
-            try:
-                event = self.events_queue.get(False) # what's the False here
-            except queue.Empty:
-                self.price_handler.stream_next()
-            else:
-                if event is not None:
-                    if (
-                        event.type == EventType.TICK or
-                        event.type == EventType.BAR
-                    ):
-                        self.cur_time = event.time
-                        self.strategy.calculate_signals(event)
-                        self.portfolio_handler.update_portfolio_value()
-                        self.statistics.update(event.time, self.portfolio_handler)
+        self._start_log()
+        poll = self._event_poller()
+        dispatch = self.dispatcher.dispatch
+        scheduler = self.scheduler
+        checkpoint = self.checkpoint
+        profiler = self.profiler
+        if profiler is not None:
+            dispatch = profiler.instrument(self)
+            profiler.start()
+        try:
+            while self._continue_loop_condition():
+                event = poll()
+                if event is None:
+                    # The events queue has been drained, so
+                    # move on to the next market event
+                    if checkpoint is not None:
+                        checkpoint.step(self)
+                    self.price_handler.stream_next()
+                    continue
 
-                    elif event.type == EventType.SIGNAL:
-                        self.portfolio_handler.on_signal(event)
+                # Advance the clock to the market event, firing the
+                # items scheduled up to it, and handle any events
+                # they generate before the market event itself
+                if (
+                    event.type in MARKET_EVENT_TYPES and
+                    scheduler.advance_to(event.time)
+                ):
+                    self._drain_events(poll, dispatch)
+                dispatch(event)
+            # The session has finished, so it will not be resumed
+            if checkpoint is not None:
+                checkpoint.remove()
+        finally:
+            if profiler is not None:
+                profiler.stop()
+                profiler.uninstrument()
 
-                    elif event.type == EventType.ORDER:
-                        self.execution_handler.execute_order(event)
-                        # how is this line different between backtest and live versions?
-
-                    elif event.type == EventType.FILL:
-                        self.portfolio_handler.on_fill(event)
+    def _start_log(self):
+        """
+        Starts the trade log of a compliance component which
+        writes one. It is started once trading starts, rather
+        than when the session is created, so that a session
+        restored from a checkpoint carries on the existing log.
+        """
+        start_log = getattr(self.compliance, "start_log", None)
+        if start_log is not None:
+            start_log()
 
-                    else:
-                        raise NotImplementedError("Unsupported event type '{}'".format(event.type))
+    def _drain_events(self, poll, dispatch):
+        """
+        Dispatches events until the events queue is empty.
+        """
+        event = poll()
+        while event is not None:
+            dispatch(event)
+            event = poll()
 
 
     def start_trading(self, testing=False):
@@ -167,10 +342,137 @@ class TradingSession(object):
                 results["max_drawdown_pct"] * 100.0
             )
         )
-
+        if self.profiler is not None:
+            self.profiler.print_summary()
 
         if not testing:
             self.statistics.plot_results()
 
 
         return results
+
+
+class MultiStrategySession(object):
+    """
+    Backtests many strategies over a single pass of the market
+    data, rather than running one TradingSession per strategy,
+    each of which would stream and decode the same bars.
+
+    Every strategy is given its own lane: a TradingSession with
+    its own events queue, PortfolioHandler, Portfolio, execution
+    handler, statistics, dispatcher and scheduler, all sharing
+    the one price handler. Each market event is taken off the
+    market events queue once and handed to every lane in turn,
+    which then handles the signals, orders and fills that it
+    leads to on its own events queue before the next lane.
+
+    Each strategy must therefore be created with its own events
+    queue (i.e. an EventBus), distinct from the market events
+    queue and from those of the other strategies.
+    """
+    def __init__(
+        self, output_dir, strategies, tickers,
+        equity, start_date, end_date, events_queue,
+        price_handler=None, data_dir=None, snapshot=False
+    ):
+        """
+        Parameters:
+        output_dir - The output directory, within which each
+            lane writes its trade log to its own subdirectory.
+        strategies - The list of Strategy instances.
+        tickers - The list of ticker symbols.
+        equity - The initial equity of every lane.
+        start_date - Optional first date to backtest.
+        end_date - Optional date at which to stop (exclusive).
+        events_queue - The events queue of the price handler.
+        price_handler - Optional price handler, created as for
+            a TradingSession if not given.
+        data_dir - Optional directory of per-ticker price files.
+        snapshot - If True, stream one snapshot per timestamp.
+        """
+        self.output_dir = output_dir
+        self.events_queue = events_queue
+        if price_handler is None:
+            price_handler = _create_price_handler(
+                events_queue, tickers, start_date, end_date,
+                data_dir, snapshot
+            )
+        self.price_handler = price_handler
+
+        lane_queues = [
+            getattr(strategy, "events_queue", None) for strategy in strategies
+        ]
+        for i, lane_queue in enumerate(lane_queues):
+            if (
+                lane_queue is None or lane_queue is events_queue or
+                any(lane_queue is q for q in lane_queues[:i])
+            ):
+                raise ValueError(
+                    "Each strategy must have its own events_queue, "
+                    "distinct from the market events queue."
+                )
+
+        self.sessions = []
+        for i, strategy in enumerate(strategies):
+            lane_dir = os.path.join(
+                output_dir, "strategy{:02d}_{}".format(
+                    i, strategy.__class__.__name__
+                )
+            )
+            if not os.path.exists(lane_dir):
+                os.makedirs(lane_dir)
+            self.sessions.append(TradingSession(
+                lane_dir, strategy, tickers, equity,
+                start_date, end_date, lane_queues[i],
+                price_handler=price_handler
+            ))
+
+    def _run_session(self):
+        """
+        Streams every market event once, handing each one to
+        every lane and draining the lane events queue after it.
+        """
+        print("Running backtest of {} strategies...".format(
+            len(self.sessions)
+        ))
+        for session in self.sessions:
+            session._start_log()
+        lanes = [
+            (session, session._event_poller(),
+             session.dispatcher.dispatch, session.scheduler)
+            for session in self.sessions
+        ]
+        price_handler = self.price_handler
+        market_poll = _event_poller(self.events_queue)
+        while price_handler.continue_backtest:
+            event = market_poll()
+            if event is None:
+                price_handler.stream_next()
+                continue
+            is_market = event.type in MARKET_EVENT_TYPES
+            for session, poll, dispatch, scheduler in lanes:
+                if is_market and scheduler.advance_to(event.time):
+                    session._drain_events(poll, dispatch)
+                dispatch(event)
+                session._drain_events(poll, dispatch)
+
+    def start_trading(self, testing=False):
+        """
+        Runs the backtest and outputs the performance of every
+        strategy, returning a list of their get_results().
+        """
+        self._run_session()
+
+        print("------------------------------")
+        print("Backtest complete.")
+        all_results = []
+        for session in self.sessions:
+            results = session.statistics.get_results()
+            print("{}: Sharpe Ratio: {:2f}, Max Drawdown: {:2f}%".format(
+                session.output_dir, results["sharpe"],
+                results["max_drawdown_pct"] * 100.0
+            ))
+            if not testing:
+                session.statistics.plot_results()
+            all_results.append(results)
+        return all_results
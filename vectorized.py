@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+
+from statistics import SimpleStatistics
+
+
+def ib_commission(quantities, fill_prices):
+    """
+    Calculates the Interactive Brokers commission of an array of
+    (absolute) transaction quantities at the corresponding fill
+    prices, by the same US Fixed pricing formula as
+    IBSimulatedExecutionHandler._calculate_ib_commission.
+    """
+    return np.minimum(
+        0.5 * fill_prices * quantities,
+        np.maximum(1.0, 0.005 * quantities)
+    )
+
+
+def calculate_equity(close, targets, initial_cash):
+    """
+    Calculates the equity curve of trading towards a matrix of
+    target positions, following the conventions of the event-driven
+    TradingSession run in snapshot mode:
+
+    - Each change in the target position is filled at the close
+      of the bar at which it occurs, and charged the IB commission.
+    - The equity recorded at a timestamp is the cash after the
+      fills of the previous timestamp plus the previous positions
+      valued at the latest close, i.e. before the fills of the
+      timestamp itself.
+
+    Parameters:
+    close - Array of shape (times, tickers) of closing prices,
+        which are NaN where a ticker has no bar.
+    targets - Array of shape (times, tickers), or (rules, times,
+        tickers) for several rules at once, of the signed quantity
+        held after trading at each time.
+    initial_cash - The initial cash of the portfolio.
+
+    Returns an array of shape (times,), or (rules, times), of
+    equity values.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    targets = np.asarray(targets, dtype=np.float64)
+
+    # The latest close of each ticker, which is zero (for a
+    # position that must also be zero) before its first bar
+    last_close = pd.DataFrame(close).ffill().fillna(0.0).values
+
+    trades = np.diff(targets, axis=-2, prepend=0.0)
+    if np.any((trades != 0.0) & np.isnan(close)):
+        raise ValueError(
+            "Target positions can only change at times "\
+            "at which the ticker has a closing price."
+        )
+    quantities = np.abs(trades)
+    commission = np.where(
+        quantities > 0.0, ib_commission(quantities, last_close), 0.0
+    )
+    cash_flow = (trades * last_close + commission).sum(axis=-1)
+    cash = initial_cash - np.cumsum(cash_flow, axis=-1)
+
+    equity = np.empty(cash.shape)
+    equity[..., 0] = initial_cash
+    equity[..., 1:] = cash[..., :-1] + (
+        targets[..., :-1, :] * last_close[1:]
+    ).sum(axis=-1)
+    return equity
+
+
+def vectorized_backtest(close, targets, initial_cash, output_dir=None):
+    """
+    Runs a vectorized backtest of trading towards a DataFrame of
+    target positions, for strategies whose signals can be
+    expressed as arrays, and returns the same dictionary of
+    results as SimpleStatistics.get_results.
+
+    Parameters:
+    close - DataFrame of closing prices indexed by timestamp
+        with a column per ticker, which is NaN where a ticker
+        has no bar.
+    targets - DataFrame of signed target quantities aligned with
+        close, or a list of them for several rules at once.
+    initial_cash - The initial cash of the portfolio.
+    output_dir - The output directory of the statistics.
+
+    Returns a results dictionary, or a list of them if a list
+    of targets was given.
+    """
+    if isinstance(targets, pd.DataFrame):
+        return vectorized_backtest(
+            close, [targets], initial_cash, output_dir
+        )[0]
+    target_values = np.array([
+        t.reindex(
+            index=close.index, columns=close.columns, fill_value=0
+        ).values
+        for t in targets
+    ])
+    equity = calculate_equity(close.values, target_values, initial_cash)
+    timestamps = list(close.index)
+    return [
+        SimpleStatistics.from_equity_curve(
+            output_dir, initial_cash, timestamps, rule_equity
+        ).get_results()
+        for rule_equity in equity
+    ]
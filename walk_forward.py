@@ -0,0 +1,181 @@
+import numpy as np
+import pandas as pd
+
+from bar_store import BarStore, TIME_FIELD
+from statistics import SimpleStatistics
+from sweep import ParameterSweep, expand_grid
+
+
+def walk_forward_windows(times, train_bars, test_bars, step=None):
+    """
+    Splits a sorted sequence of distinct timestamps into rolling
+    (train_start, train_end, test_start, test_end) windows, where
+    every end is exclusive (None meaning the end of history), as
+    used by the start_date/end_date of a TradingSession.
+
+    Parameters:
+    times - The sorted distinct timestamps of the history.
+    train_bars - The number of timestamps in each train window.
+    test_bars - The number of timestamps in each test window.
+    step - The number of timestamps between the starts of
+        consecutive windows, by default test_bars, so that the
+        test windows are contiguous and do not overlap.
+    """
+    if step is None:
+        step = test_bars
+    times = list(times)
+
+    def at(i):
+        return times[i] if i < len(times) else None
+
+    windows = []
+    start = 0
+    while start + train_bars < len(times):
+        test_start = start + train_bars
+        windows.append((
+            times[start], times[test_start],
+            times[test_start], at(test_start + test_bars)
+        ))
+        start += step
+    return windows
+
+
+class WalkForward(object):
+    """
+    WalkForward carries out a walk-forward optimisation of a
+    strategy over the history within a bar store.
+
+    The history is split into rolling train/test windows. In
+    each train window every combination of parameters is
+    backtested, with the runs of all of the train windows fanned
+    out over a single ParameterSweep worker pool, and the best
+    combination by the objective is then backtested over the
+    following test window, out-of-sample.
+
+    Every run reads its window straight from the memory-mapped
+    store, which each worker opens once, and any indicators that
+    the strategy precomputes (see run_sweep_task) are computed
+    once per worker over the whole history. Overlapping windows
+    therefore reuse the same data and indicators.
+    """
+    def __init__(
+        self, strategy_cls, output_dir, param_grid,
+        train_bars, test_bars, step=None,
+        store=None, tickers_data=None,
+        objective="sharpe", equity=100000.0,
+        max_workers=1, snapshot=False
+    ):
+        """
+        Parameters:
+        strategy_cls - A (picklable, module-level) Strategy class,
+            instantiated as strategy_cls(events_queue, **params).
+        output_dir - The output directory of the runs.
+        param_grid - A dictionary of parameter name to list of
+            values, or a list of parameter dictionaries.
+        train_bars - The number of timestamps per train window.
+        test_bars - The number of timestamps per test window.
+        step - Optional number of timestamps between windows.
+        store - A BarStore, or the path to one, holding the data.
+        tickers_data - Alternatively, a dictionary of ticker symbol
+            to DataFrame, written once into a temporary BarStore.
+        objective - The get_results() key to maximise.
+        equity - The initial equity.
+        max_workers - The number of worker processes.
+        snapshot - If True, stream one snapshot per timestamp.
+        """
+        if isinstance(param_grid, dict):
+            param_grid = expand_grid(param_grid)
+        self.params_list = param_grid
+        self.train_bars = train_bars
+        self.test_bars = test_bars
+        self.step = step
+        self.objective = objective
+        self.equity = equity
+        self.output_dir = output_dir
+        self.sweep = ParameterSweep(
+            strategy_cls, output_dir, store=store,
+            tickers_data=tickers_data, equity=equity,
+            snapshot=snapshot, max_workers=max_workers
+        )
+        self.windows = None
+
+    def _history_times(self):
+        """
+        Returns the distinct timestamps of every bar in the store.
+        """
+        times = BarStore(self.sweep.store_path).columns[TIME_FIELD]
+        return pd.DatetimeIndex(np.unique(times).view("datetime64[ns]"))
+
+    def _score(self, results):
+        score = results[self.objective]
+        if score is None or np.isnan(score):
+            return -np.inf
+        return score
+
+    def run(self):
+        """
+        Carries out the walk-forward optimisation and returns the
+        SimpleStatistics of the stitched out-of-sample equity
+        curve. Each test window starts with the equity at the end
+        of the previous one. A summary of the windows, and of the
+        parameters chosen in each, is stored in windows.
+
+        Each test window is a separate session, given only the
+        final equity of the previous window as its cash, marked
+        to market, rather than its positions. Any position still
+        open at the end of a test window is therefore in effect
+        closed at its final mid-price, without a fill, commission
+        or slippage, and the strategy starts the next window flat.
+        """
+        windows = walk_forward_windows(
+            self._history_times(), self.train_bars,
+            self.test_bars, self.step
+        )
+        n_params = len(self.params_list)
+
+        # Optimise every train window at once
+        train_results, _ = self.sweep.run_tasks([
+            (params, train_start, train_end, self.equity)
+            for train_start, train_end, _, _ in windows
+            for params in self.params_list
+        ])
+
+        # Run the winners out-of-sample, one window after another
+        equity = self.equity
+        timestamps = []
+        equity_curve = []
+        rows = []
+        for w, (train_start, train_end, test_start, test_end) in enumerate(windows):
+            scores = [
+                self._score(train_results[w * n_params + i])
+                if w * n_params + i in train_results else -np.inf
+                for i in range(n_params)
+            ]
+            best = int(np.argmax(scores))
+            results, errors = self.sweep.run_tasks([
+                (self.params_list[best], test_start, test_end, equity)
+            ], max_workers=1)
+            if 0 in errors:
+                raise errors[0]
+            test_equity = results[0]["equity"]
+            timestamps.extend(test_equity.index[1:])
+            equity_curve.extend(test_equity.values[1:].tolist())
+            rows.append({
+                "train_start": train_start, "train_end": train_end,
+                "test_start": test_start, "test_end": test_end,
+                "params": self.params_list[best],
+                "train_" + self.objective: scores[best],
+                "test_" + self.objective: results[0][self.objective],
+            })
+            equity = equity_curve[-1]
+        self.windows = pd.DataFrame(rows)
+
+        return SimpleStatistics.from_equity_curve(
+            self.output_dir, self.equity, timestamps, equity_curve
+        )
+
+    def close(self):
+        """
+        Removes the temporary BarStore, if one was written.
+        """
+        self.sweep.close()